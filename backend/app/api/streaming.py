@@ -0,0 +1,87 @@
+# app/api/streaming.py
+from __future__ import annotations
+
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app import config
+from app.services import events
+from app.services.events import Event, Subscription
+
+# WebSocket close codes
+WS_POLICY_VIOLATION = 1008   # auth failed / not a participant
+WS_TRY_AGAIN_LATER = 1013    # client too slow, reconnect with lastEventId
+
+
+def parse_event_id(*values: Optional[str]) -> Optional[int]:
+    """First value that parses as an event id (Last-Event-ID header or query)."""
+    for value in values:
+        if value:
+            try:
+                return int(value)
+            except ValueError:
+                continue
+    return None
+
+
+def event_payload(event: Event) -> dict:
+    return {"id": event.id, "type": event.type, "data": event.data}
+
+
+def format_sse(event: Event) -> str:
+    data = json.dumps(event.data, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event.id}\nevent: {event.type}\ndata: {data}\n\n"
+
+
+def sse_response(request: Request, topic: str, last_event_id: Optional[int]) -> StreamingResponse:
+    """
+    Server-Sent Events stream of `topic`. Sends a comment every
+    EVENTS_HEARTBEAT_SECONDS to keep proxies from closing the connection.
+    """
+
+    async def stream() -> AsyncIterator[str]:
+        sub = events.bus.subscribe(topic, last_event_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                event = await sub.get(timeout=config.EVENTS_HEARTBEAT_SECONDS)
+                if event is None:
+                    if sub.closed:
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            events.bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def pump_to_websocket(websocket: WebSocket, sub: Subscription) -> None:
+    """
+    Forward events from `sub` to an accepted websocket until either side
+    goes away. A subscriber dropped for being too slow is closed with 1013.
+    """
+    try:
+        while True:
+            event = await sub.get(timeout=config.EVENTS_HEARTBEAT_SECONDS)
+            if event is None:
+                if sub.closed:
+                    await websocket.close(code=WS_TRY_AGAIN_LATER)
+                    return
+                await websocket.send_json({"type": "ping"})
+                continue
+            await websocket.send_json(event_payload(event))
+    except (WebSocketDisconnect, RuntimeError):
+        return
+    finally:
+        events.bus.unsubscribe(sub)
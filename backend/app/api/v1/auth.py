@@ -1,14 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 
 from app.schemas.auth import (
     AuthRegisterRequest,
     AuthLoginRequest,
+    AuthLogoutRequest,
     AuthMeResponse,
+    AuthRefreshRequest,
     AuthResponse,
 )
 from app.schemas.orgs import Organization
 from app.services import auth as auth_service
-from app.dependencies import get_current_user
+from app.dependencies import get_bearer_token, get_current_user
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -20,21 +24,54 @@ def register(payload: AuthRegisterRequest):
     except ValueError as e:
         if str(e) == "user_with_email_exists":
             raise HTTPException(status_code=400, detail="User with this email already exists")
+        if str(e) == "auth_busy":
+            raise HTTPException(status_code=503, detail="Authentication is busy, retry later")
         raise
     return {"user": user, "org": org, "tokens": tokens}
 
 
 @router.post("/login", response_model=AuthResponse)
-def login(payload: AuthLoginRequest):
+async def login(payload: AuthLoginRequest, request: Request):
+    client_ip = request.client.host if request.client else None
     try:
-        user, org, tokens = auth_service.login(payload)
+        user, org, tokens = await auth_service.login(payload, client_ip)
     except ValueError as e:
-        if str(e) == "invalid_credentials":
+        msg = str(e)
+        if msg == "invalid_credentials":
             raise HTTPException(status_code=401, detail="Invalid credentials")
+        if msg == "too_many_attempts":
+            raise HTTPException(status_code=429, detail="Too many login attempts")
+        if msg == "auth_busy":
+            raise HTTPException(status_code=503, detail="Authentication is busy, retry later")
         raise
     return {"user": user, "org": org, "tokens": tokens}
 
 
+@router.post("/refresh", response_model=AuthResponse)
+def refresh(payload: AuthRefreshRequest):
+    """New token pair for a refresh token; the old refresh token stops working."""
+    try:
+        user, org, tokens = auth_service.refresh(payload.refreshToken)
+    except ValueError as e:
+        if str(e) == "invalid_refresh_token":
+            raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+        raise
+    return {"user": user, "org": org, "tokens": tokens}
+
+
+@router.post("/logout", status_code=204)
+def logout(
+    payload: Optional[AuthLogoutRequest] = None,
+    token: str = Depends(get_bearer_token),
+    current_user = Depends(get_current_user),
+):
+    """Revoke the current access token (and the refresh token, if given)."""
+    auth_service.revoke_token(token)
+    if payload and payload.refreshToken:
+        auth_service.revoke_token(payload.refreshToken)
+    return Response(status_code=204)
+
+
 @router.get("/me", response_model=AuthMeResponse)
 def me(current_user = Depends(get_current_user)):
     org = auth_service.orgs.get(current_user.orgId)  # type: ignore[arg-type]
@@ -1,20 +1,31 @@
 # app/api/v1/chats.py
 from __future__ import annotations
 
+import asyncio
+import json
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 
 from app.schemas.chat import (
     Chat,
+    ChatUpdateRequest,
     Message,
+    MessageBatchTranslateItem,
+    MessageBatchTranslateRequest,
     MessageCreateRequest,
     MessageTranslateRequest,
     MessageTranslateResponse,
 )
 from app.schemas.auth import User
+from app.services import auth as auth_service
 from app.services import chat as chat_service
+from app.services import events
+from app.api.streaming import WS_POLICY_VIOLATION, parse_event_id, pump_to_websocket
 from app.dependencies import get_current_user
+from app.pagination import PageParams, keyset_response, page_params
 
 router = APIRouter()
 
@@ -22,6 +33,11 @@ router = APIRouter()
 # === Chats ===
 
 
+def _can_access(chat_id: str, user_id: str) -> bool:
+    ch = chat_service.get_chat(chat_id)
+    return bool(ch) and chat_service.is_participant(chat_id, user_id)
+
+
 @router.get("/chats", response_model=List[Chat], tags=["Chats"])
 def list_chats(
     dealId: Optional[str] = Query(default=None),
@@ -50,11 +66,32 @@ def get_chat(
     current_user: User = Depends(get_current_user),
 ):
     ch = chat_service.get_chat(chat_id)
-    if not ch or current_user.id not in ch.participants:
+    if not ch or not chat_service.is_participant(chat_id, current_user.id):
         raise HTTPException(status_code=404, detail="Chat not found")
     return ch
 
 
+@router.patch("/chats/{chat_id}", response_model=Chat, tags=["Chats"])
+def update_chat(
+    chat_id: str,
+    payload: ChatUpdateRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Chat settings. autoTranslate=true pre-translates every new message into
+    each participant's preferred language in the background.
+    """
+    ch = chat_service.get_chat(chat_id)
+    if not ch or not chat_service.is_participant(chat_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Chat not found")
+    try:
+        return chat_service.update_chat(chat_id, payload)
+    except ValueError as e:
+        if str(e) == "chat_not_found":
+            raise HTTPException(status_code=404, detail="Chat not found")
+        raise
+
+
 # === Messages ===
 
 
@@ -65,16 +102,47 @@ def get_chat(
 )
 def list_messages(
     chat_id: str,
+    response: Response,
+    after: Optional[str] = Query(default=None, description="Only messages posted after this message id"),
+    since: Optional[datetime] = Query(default=None, description="Only messages newer than this timestamp"),
+    before: Optional[str] = Query(
+        default=None,
+        description="Only messages older than this message id; with limit, the newest `limit` of them",
+    ),
     current_user: User = Depends(get_current_user),
+    page: PageParams = Depends(page_params(Message)),
 ):
+    """
+    Chat history, oldest first. Polling clients pass after=<last seen id>
+    (or since=<last createdAt>) to get only new messages; before=<id> pages
+    backwards through older history.
+    """
     ch = chat_service.get_chat(chat_id)
-    if not ch or current_user.id not in ch.participants:
+    if not ch or not chat_service.is_participant(chat_id, current_user.id):
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    msgs = chat_service.list_messages(chat_id)
+    # forward pages read one message more to know whether another follows;
+    # backward pages (before=) are the newest `limit` and have no next page
+    limit = page.limit
+    if limit is not None and before is None:
+        limit += 1
+    try:
+        msgs = chat_service.list_messages_window(
+            chat_id,
+            after=after,
+            since=since,
+            before=before,
+            limit=limit,
+            cursor=page.cursor,
+        )
+    except ValueError as e:
+        if str(e) == "message_not_found":
+            raise HTTPException(status_code=404, detail="Message not found")
+        raise
     if msgs is None:
         raise HTTPException(status_code=404, detail="Chat not found")
-    return msgs
+    has_more = page.limit is not None and len(msgs) > page.limit
+    return keyset_response(msgs[: page.limit] if has_more else msgs, has_more, page, response)
 
 
 @router.post(
@@ -102,22 +170,125 @@ def create_message(
     response_model=MessageTranslateResponse,
     tags=["Messages"],
 )
-def translate_message(
+async def translate_message(
     chat_id: str,
     msg_id: str,
     payload: MessageTranslateRequest,
     current_user: User = Depends(get_current_user),
 ):
-    # check access
-    ch = chat_service.get_chat(chat_id)
-    if not ch or current_user.id not in ch.participants:
+    # check access; storage reads block, keep them off the event loop
+    if not await asyncio.to_thread(_can_access, chat_id, current_user.id):
         raise HTTPException(status_code=404, detail="Chat not found")
 
     try:
-        res = chat_service.translate_message(chat_id, msg_id, payload)
+        res = await chat_service.translate_message(chat_id, msg_id, payload)
     except ValueError as e:
         msg = str(e)
         if msg == "chat_not_found" or msg == "message_not_found":
             raise HTTPException(status_code=404, detail="Message not found")
+        if msg == "translation_timeout":
+            raise HTTPException(status_code=504, detail="Translation timed out")
         raise
-    return res
\ No newline at end of file
+    return res
+
+
+@router.post(
+    "/chats/{chat_id}/messages/translate",
+    response_model=List[MessageBatchTranslateItem],
+    tags=["Messages"],
+)
+async def translate_messages(
+    chat_id: str,
+    payload: MessageBatchTranslateRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Translate many messages in one request (e.g. when a chat is opened).
+    Without messageIds, translates the newest messages not yet in
+    targetLang (at most TRANSLATION_BATCH_LIMIT, 100 by default).
+    """
+    if not await asyncio.to_thread(_can_access, chat_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    try:
+        return await chat_service.translate_messages(
+            chat_id, payload.targetLang, payload.messageIds
+        )
+    except ValueError as e:
+        msg = str(e)
+        if msg == "chat_not_found":
+            raise HTTPException(status_code=404, detail="Chat not found")
+        if msg == "message_not_found":
+            raise HTTPException(status_code=404, detail="Message not found")
+        if msg == "translation_timeout":
+            raise HTTPException(status_code=504, detail="Translation timed out")
+        raise
+
+
+# === Realtime ===
+
+
+def _handle_client_frame(chat_id: str, user_id: str, frame: dict) -> None:
+    kind = frame.get("type")
+    if kind == "typing":
+        chat_service.publish_chat_event(chat_id, "typing", {"userId": user_id})
+    elif kind == "read" and frame.get("messageId"):
+        chat_service.publish_chat_event(
+            chat_id, "read", {"userId": user_id, "messageId": str(frame["messageId"])}
+        )
+    elif kind == "message" and frame.get("text"):
+        # create_message publishes the "message" event itself
+        chat_service.create_message(
+            chat_id,
+            user_id,
+            MessageCreateRequest(text=str(frame["text"]), lang=frame.get("lang")),
+        )
+
+
+@router.websocket("/chats/{chat_id}/ws")
+async def chat_ws(
+    websocket: WebSocket,
+    chat_id: str,
+    access_token: Optional[str] = Query(default=None),
+    lastEventId: Optional[str] = Query(default=None),
+):
+    """
+    Realtime chat channel. Server sends {"id", "type", "data"} frames with
+    type message / translation / typing / read (plus "ping" keep-alives).
+    Clients may send {"type": "typing"}, {"type": "read", "messageId": ...}
+    and {"type": "message", "text": ..., "lang": ...}.
+    """
+    # token and chat lookups read storage, keep them off the event loop
+    user = (
+        await asyncio.to_thread(auth_service.get_user_by_access_token, access_token)
+        if access_token
+        else None
+    )
+    if not user or not await asyncio.to_thread(_can_access, chat_id, user.id):
+        await websocket.close(code=WS_POLICY_VIOLATION)
+        return
+
+    sub = events.bus.subscribe(chat_service.chat_topic(chat_id), parse_event_id(lastEventId))
+    await websocket.accept()
+
+    # outgoing events are pumped by a separate task, incoming frames are
+    # read here until the client disconnects
+    pump = asyncio.create_task(pump_to_websocket(websocket, sub))
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                frame = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(frame, dict):
+                try:
+                    # storage I/O, keep it off the event loop
+                    await run_in_threadpool(_handle_client_frame, chat_id, user.id, frame)
+                except ValueError:
+                    continue  # malformed frame (pydantic validation) is ignored
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        pump.cancel()
+        events.bus.unsubscribe(sub)
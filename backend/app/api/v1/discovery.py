@@ -0,0 +1,60 @@
+# app/api/v1/discovery.py
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from app.dependencies import get_current_user
+from app.pagination import NEXT_CURSOR_HEADER, PageParams, page_params
+from app.schemas.auth import User
+from app.schemas.discovery import DiscoveryHit, DiscoverySearchResponse
+from app.schemas.orgs import KybStatus
+from app.schemas.products import CurrencyCode, UnitOfMeasure
+from app.services import discovery as discovery_service
+
+router = APIRouter(prefix="/discovery", tags=["Discovery"])
+
+DEFAULT_PAGE_SIZE = 20
+
+
+@router.get("/products", response_model=DiscoverySearchResponse)
+def search_products(
+    response: Response,
+    q: Optional[str] = Query(default=None, description="Search by name/description"),
+    country: Optional[List[str]] = Query(default=None, description="Supplier country, repeatable"),
+    kybStatus: Optional[List[KybStatus]] = Query(default=None),
+    verifiedOnly: bool = Query(default=False, description="Shortcut for kybStatus=verified"),
+    currency: Optional[List[CurrencyCode]] = Query(default=None),
+    unit: Optional[List[UnitOfMeasure]] = Query(default=None),
+    hsChapter: Optional[List[str]] = Query(default=None, description="First two digits of the HS code"),
+    priceRange: Optional[List[str]] = Query(
+        default=None, description="basePrice bucket as returned in facets, e.g. '10-100'"
+    ),
+    current_user: User = Depends(get_current_user),
+    page: PageParams = Depends(page_params(DiscoveryHit)),
+):
+    """
+    Marketplace-wide product search across all supplier orgs.
+
+    Returns one page of hits (ranked by relevance when q is given, oldest
+    first otherwise) together with facet counts over all matches, so the
+    Discovery screen needs one request. Within a facet the values are
+    OR-ed, different facets are AND-ed.
+    """
+    if verifiedOnly:
+        kybStatus = [KybStatus.verified]
+    filters = discovery_service.DiscoveryFilters(
+        country=country,
+        kybStatus=[s.value for s in kybStatus] if kybStatus else None,
+        currency=[c.value for c in currency] if currency else None,
+        unit=[u.value for u in unit] if unit else None,
+        hsChapter=hsChapter,
+        priceRange=priceRange,
+    )
+    result = discovery_service.search(
+        q, filters, limit=page.limit or DEFAULT_PAGE_SIZE, cursor=page.cursor, score=page.score
+    )
+    if result.nextCursor:
+        response.headers[NEXT_CURSOR_HEADER] = result.nextCursor
+    return result
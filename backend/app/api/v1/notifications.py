@@ -1,28 +1,53 @@
 # app/api/v1/notifications.py
 from __future__ import annotations
 
+import asyncio
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, WebSocket
 
-from app.schemas.notifications import Notification
+from app.schemas.notifications import (
+    Notification,
+    NotificationBulkReadResponse,
+    NotificationPreferences,
+    NotificationUnreadCount,
+)
 from app.schemas.auth import User
+from app.services import auth as auth_service
+from app.services import events
 from app.services import notifications as notifications_service
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_user_for_stream
+from app.api.streaming import (
+    WS_POLICY_VIOLATION,
+    parse_event_id,
+    pump_to_websocket,
+    sse_response,
+)
+from app.pagination import PageParams, decode_cursor, keyset_response, page_params
 
 router = APIRouter(tags=["Notifications"])
 
 
 @router.get("/notifications", response_model=List[Notification])
 def list_notifications(
+    response: Response,
     unreadOnly: bool = Query(default=False),
     current_user: User = Depends(get_current_user),
+    page: PageParams = Depends(page_params(Notification)),
 ):
     """
     List notifications for current user. If unreadOnly=true, return only unread.
+    Supports cursor/limit pagination and fields projection.
     """
-    items = notifications_service.list_for_user(current_user.id, unread_only=unreadOnly)
-    return items
+    # one more than the page to know whether another follows
+    items = notifications_service.list_for_user(
+        current_user.id,
+        unread_only=unreadOnly,
+        after=page.cursor,
+        limit=page.limit + 1 if page.limit is not None else None,
+    )
+    has_more = page.limit is not None and len(items) > page.limit
+    return keyset_response(items[: page.limit] if has_more else items, has_more, page, response)
 
 
 @router.post("/notifications/{notif_id}/read", response_model=Notification)
@@ -33,4 +58,108 @@ def mark_notification_read(
     notif = notifications_service.mark_read(current_user.id, notif_id)
     if not notif:
         raise HTTPException(status_code=404, detail="Notification not found")
-    return notif
\ No newline at end of file
+    return notif
+
+
+@router.get("/notifications/archive", response_model=List[Notification])
+def list_archived_notifications(
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    page: PageParams = Depends(page_params(Notification)),
+):
+    """
+    Notifications moved out by retention (read and older than the TTL, or
+    beyond the per-user cap). Oldest first, cursor/limit paginated.
+    """
+    items, has_more = notifications_service.list_archived(current_user.id, page.cursor, page.limit)
+    return keyset_response(items, has_more, page, response)
+
+
+@router.get(
+    "/notifications/preferences",
+    response_model=NotificationPreferences,
+    response_model_exclude_none=True,
+)
+def get_notification_preferences(
+    current_user: User = Depends(get_current_user),
+):
+    return notifications_service.get_preferences(current_user.id)
+
+
+@router.put(
+    "/notifications/preferences",
+    response_model=NotificationPreferences,
+    response_model_exclude_none=True,
+)
+def update_notification_preferences(
+    payload: NotificationPreferences,
+    current_user: User = Depends(get_current_user),
+):
+    """Per-user delivery settings, e.g. {"mutedTypes": ["payment_status"]}."""
+    return notifications_service.set_preferences(current_user.id, payload)
+
+
+@router.get("/notifications/unread-count", response_model=NotificationUnreadCount)
+def get_unread_count(
+    current_user: User = Depends(get_current_user),
+):
+    """Unread counter for the bell badge (maintained on write, O(1))."""
+    return NotificationUnreadCount(unread=notifications_service.unread_count(current_user.id))
+
+
+@router.post("/notifications/read-all", response_model=NotificationBulkReadResponse)
+def mark_all_notifications_read(
+    cursor: Optional[str] = Query(
+        default=None,
+        description="Mark read only up to this list cursor (inclusive), e.g. X-Next-Cursor of the last page seen",
+    ),
+    current_user: User = Depends(get_current_user),
+):
+    up_to = decode_cursor(cursor) if cursor else None
+    updated, unread = notifications_service.mark_all_read(current_user.id, up_to)
+    return NotificationBulkReadResponse(updated=updated, unread=unread)
+
+
+@router.get("/notifications/stream")
+def stream_notifications(
+    request: Request,
+    lastEventId: Optional[str] = Query(default=None),
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+    current_user: User = Depends(get_current_user_for_stream),
+):
+    """
+    Server-Sent Events stream of new notifications for current user.
+    Reconnecting clients resume after Last-Event-ID (header or lastEventId
+    query); if that is too old a "resync" event asks them to refetch.
+    """
+    return sse_response(
+        request,
+        events.user_topic(current_user.id),
+        parse_event_id(last_event_id, lastEventId),
+    )
+
+
+@router.websocket("/notifications/ws")
+async def notifications_ws(
+    websocket: WebSocket,
+    access_token: Optional[str] = Query(default=None),
+    lastEventId: Optional[str] = Query(default=None),
+):
+    """
+    WebSocket variant of /notifications/stream: every message is
+    {"id", "type", "data"}; {"type": "ping"} is sent as a keep-alive.
+    """
+    # token lookup reads storage, keep it off the event loop
+    user = (
+        await asyncio.to_thread(auth_service.get_user_by_access_token, access_token)
+        if access_token
+        else None
+    )
+    if not user:
+        await websocket.close(code=WS_POLICY_VIOLATION)
+        return
+    # subscribe before accept so nothing published right after the
+    # handshake is missed
+    sub = events.bus.subscribe(events.user_topic(user.id), parse_event_id(lastEventId))
+    await websocket.accept()
+    await pump_to_websocket(websocket, sub)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from enum import Enum
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from pydantic import BaseModel
 
 from app.schemas.orgs import (
@@ -10,15 +11,20 @@ from app.schemas.orgs import (
     OrganizationRole,
     KYBProfile,
     KYBSubmitRequest,
-    KybStatus,
 )
 from app.services import auth as auth_service
 from app.services import orgs as orgs_service
 from app.dependencies import get_current_user, get_current_org_id
+from app.pagination import PageParams, keyset_response, page_params
 
 router = APIRouter(prefix="/orgs", tags=["Organization"])
 
 
+class SupplierSort(str, Enum):
+    oldest = "createdAt"
+    newest = "-createdAt"
+
+
 class OrgUpdateRequest(BaseModel):
     name: Optional[str] = None
     country: Optional[str] = None
@@ -51,7 +57,7 @@ def update_my_org(
         data["role"] = payload.role
 
     new_org = Organization(**data)
-    auth_service.orgs[new_org.id] = new_org
+    auth_service.save_org(new_org)
     return new_org
 
 
@@ -72,6 +78,7 @@ def submit_my_kyb(
 
 @router.get("/suppliers", response_model=list[Organization])
 def list_suppliers(
+    response: Response,
     country: Optional[str] = Query(
         default=None,
         description="Filter by country ISO code, e.g. 'CN' or 'RU'",
@@ -81,18 +88,22 @@ def list_suppliers(
         alias="verifiedOnly",
         description="If true, return only KYB-verified suppliers",
     ),
+    sort: SupplierSort = Query(
+        default=SupplierSort.oldest,
+        description="createdAt (oldest first) or -createdAt (newest first)",
+    ),
+    page: PageParams = Depends(page_params(Organization)),
 ):
     """
     Return organizations that can act as suppliers (role=supplier or both),
-    optionally filtered by country and KYB status.
+    optionally filtered by country and KYB status. Served from the supplier
+    directory index: the cost follows the page size, not the number of orgs.
     """
-    result: list[Organization] = []
-    for org in auth_service.orgs.values():
-        if org.role not in (OrganizationRole.supplier, OrganizationRole.both):
-            continue
-        if country and org.country != country:
-            continue
-        if verifiedOnly and org.kybStatus != KybStatus.verified:
-            continue
-        result.append(org)
-    return result
\ No newline at end of file
+    items, has_more = orgs_service.list_suppliers(
+        country=country,
+        verified_only=verifiedOnly,
+        after=page.cursor,
+        limit=page.limit,
+        newest_first=sort == SupplierSort.newest,
+    )
+    return keyset_response(items, has_more, page, response)
@@ -2,25 +2,44 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, File as FastAPIFile, HTTPException, Query, Depends, Response, UploadFile
 
-from app.schemas.products import Product, ProductCreateRequest, ProductUpdateRequest
+from app.schemas.products import (
+    ImportFormat,
+    Product,
+    ProductCreateRequest,
+    ProductImportJob,
+    ProductUpdateRequest,
+)
+from app.services import product_imports as imports_service
 from app.services import products as products_service
 from app.dependencies import get_current_org_id
+from app.pagination import PageParams, keyset_response, page_params, rank_after, ranked_response
+from app.search import tokenize
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
 @router.get("", response_model=List[Product])
 def list_products(
+    response: Response,
     orgId: Optional[str] = Query(default=None, description="Filter by organization ID"),
-    search: Optional[str] = Query(default=None, description="Search by name/description"),
+    search: Optional[str] = Query(
+        default=None,
+        description="Search by name/description; results are ranked by relevance",
+    ),
     current_org_id: str = Depends(get_current_org_id),
+    page: PageParams = Depends(page_params(Product)),
 ):
     if orgId is None:
         orgId = current_org_id
-    items = products_service.list_products(orgId, search)
-    return items
+    if search and tokenize(search):
+        hits, has_more = products_service.search_products(
+            orgId, search, after=rank_after(page), limit=page.limit
+        )
+        return ranked_response(hits, has_more, page, response)
+    items, has_more = products_service.page_products(orgId, after=page.cursor, limit=page.limit)
+    return keyset_response(items, has_more, page, response)
 
 
 @router.post("", response_model=Product, status_code=201)
@@ -29,4 +48,42 @@ def create_product(
     org_id: str = Depends(get_current_org_id),
 ):
     product = products_service.create_product(org_id, payload)
-    return product
\ No newline at end of file
+    return product
+
+
+@router.post("/imports", response_model=ProductImportJob, status_code=202)
+def import_products(
+    file: UploadFile = FastAPIFile(...),
+    format: Optional[ImportFormat] = Query(
+        default=None,
+        description="csv or ndjson; by default taken from the file extension / content type",
+    ),
+    org_id: str = Depends(get_current_org_id),
+):
+    """
+    Bulk-create products from a CSV file (header row with the
+    ProductCreateRequest field names) or NDJSON (one product object per
+    line). The import runs in the background: poll GET /products/imports/{id}
+    for progress and per-line errors. Valid rows are imported even if other
+    rows fail.
+
+    The upload is buffered to disk, not streamed into the job: the
+    multipart parser spools the file to a temporary file first, which is
+    then copied to the job's own file. Neither step holds the whole file in
+    memory, but a large upload briefly needs its size in free disk twice.
+    """
+    fmt = format or imports_service.detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Unsupported file format, expected CSV or NDJSON")
+    return imports_service.start_import(org_id, file.file, file.filename or "import", fmt)
+
+
+@router.get("/imports/{job_id}", response_model=ProductImportJob)
+def get_import(
+    job_id: str,
+    org_id: str = Depends(get_current_org_id),
+):
+    job = imports_service.get_job(job_id)
+    if not job or job.orgId != org_id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
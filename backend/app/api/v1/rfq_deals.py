@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
 
 from app.schemas.rfq_deals import (
     RFQ,
@@ -21,6 +21,7 @@ from app.schemas.rfq_deals import (
 )
 from app.services import rfq_deals as service
 from app.dependencies import get_current_org_id
+from app.pagination import PageParams, keyset_response, page_params
 
 router = APIRouter()
 
@@ -30,15 +31,20 @@ router = APIRouter()
 
 @router.get("/rfqs", response_model=List[RFQ], tags=["RFQ"])
 def list_rfqs(
+    response: Response,
     role: str = Query(..., pattern="^(buyer|supplier)$"),
     status: Optional[RFQStatus] = Query(default=None),
     org_id: str = Depends(get_current_org_id),
+    page: PageParams = Depends(page_params(RFQ)),
 ):
     """
     List RFQs for current org as buyer or supplier.
+    Supports cursor/limit pagination and fields projection.
     """
-    items = service.list_rfqs(org_id, role, status)
-    return items
+    items, has_more = service.list_rfqs(
+        org_id, role, status, after=page.cursor, limit=page.limit
+    )
+    return keyset_response(items, has_more, page, response)
 
 
 @router.post("/rfqs", response_model=RFQ, status_code=201, tags=["RFQ"])
@@ -156,28 +162,25 @@ def accept_offer(offer_id: str):
 
 @router.get("/orders", response_model=List[Order], tags=["Orders"])
 def list_orders(
+    response: Response,
     role: str = Query(..., pattern="^(buyer|supplier)$"),
     status: Optional[OrderStatus] = Query(default=None),
     org_id: str = Depends(get_current_org_id),
+    page: PageParams = Depends(page_params(Order)),
 ):
     """
     List orders for current org as buyer or supplier.
+    Supports cursor/limit pagination and fields projection.
     """
-    items: List[Order] = []
-    for order in service.orders.values():
-        if role == "buyer" and order.buyerOrgId != org_id:
-            continue
-        if role == "supplier" and order.supplierOrgId != org_id:
-            continue
-        if status and order.status != status:
-            continue
-        items.append(order)
-    return items
+    items, has_more = service.list_orders(
+        org_id, role, status, after=page.cursor, limit=page.limit
+    )
+    return keyset_response(items, has_more, page, response)
 
 
 @router.get("/orders/{order_id}", response_model=Order, tags=["Orders"])
 def get_order(order_id: str):
-    order = service.orders.get(order_id)
+    order = service.get_order(order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
@@ -188,15 +191,20 @@ def get_order(order_id: str):
 
 @router.get("/deals", response_model=List[Deal], tags=["Deals"])
 def list_deals(
+    response: Response,
     role: str = Query(..., pattern="^(buyer|supplier)$"),
     status: Optional[DealStatus] = Query(default=None),
     org_id: str = Depends(get_current_org_id),
+    page: PageParams = Depends(page_params(Deal)),
 ):
     """
     List deals for current org as buyer or supplier.
+    Supports cursor/limit pagination and fields projection.
     """
-    items = service.list_deals_for_org(org_id, role, status)
-    return items
+    items, has_more = service.list_deals_for_org(
+        org_id, role, status, after=page.cursor, limit=page.limit
+    )
+    return keyset_response(items, has_more, page, response)
 
 
 @router.get("/deals/{deal_id}", response_model=DealAggregatedView, tags=["Deals"])
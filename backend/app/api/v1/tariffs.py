@@ -0,0 +1,26 @@
+# app/api/v1/tariffs.py
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, Depends
+
+from app.dependencies import get_current_user
+from app.schemas.auth import User
+from app.schemas.tariffs import TariffLookupRequest, TariffRate
+from app.services import tariffs as tariffs_service
+
+router = APIRouter(prefix="/tariffs", tags=["Tariffs"])
+
+
+@router.post("/lookup", response_model=List[TariffRate])
+def lookup_tariffs(
+    payload: TariffLookupRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Duty rates for up to 10000 HS codes in one call (longest matching
+    prefix of the tariff table; rate=null if nothing matches). Results are
+    in request order.
+    """
+    return tariffs_service.lookup_many(payload.hsCodes)
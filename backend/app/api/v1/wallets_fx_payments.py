@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Header, Query, Depends, Response
 
 from app.schemas.wallet_fx_payments import (
     Wallet,
@@ -17,6 +17,7 @@ from app.schemas.wallet_fx_payments import (
 from app.schemas.products import CurrencyCode
 from app.services import wallets_fx as service
 from app.dependencies import get_current_org_id
+from app.pagination import PageParams, keyset_response, page_params
 
 router = APIRouter(tags=["Wallets", "FX", "Payments"])
 
@@ -62,33 +63,48 @@ def create_fx_quote(payload: FXQuoteRequest):
 
 @router.get("/payments", response_model=List[Payment])
 def list_payments(
+    response: Response,
     dealId: Optional[str] = Query(default=None),
     role: Optional[str] = Query(default=None, pattern="^(payer|payee)$"),
     status: Optional[PaymentStatus] = Query(default=None),
     org_id: str = Depends(get_current_org_id),
+    page: PageParams = Depends(page_params(Payment)),
 ):
     """
     List payments for current org. Can filter by role (payer/payee),
-    status, and dealId.
+    status, and dealId. Supports cursor/limit pagination and fields projection.
     """
-    items = service.list_payments(org_id, role, status, dealId)
-    return items
+    items, has_more = service.list_payments(
+        org_id, role, status, dealId, after=page.cursor, limit=page.limit
+    )
+    return keyset_response(items, has_more, page, response)
 
 
 @router.post("/payments", response_model=Payment, status_code=201)
 def create_payment(
     payload: PaymentCreateRequest,
     org_id: str = Depends(get_current_org_id),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
 ):
     """
     Create payment for a deal on behalf of current org (payer).
     Funds are moved from available balance to blockedAmount (escrow),
     payment status becomes 'pending'.
+
+    Send an Idempotency-Key header to make retries safe: repeating the
+    request with the same key returns the original payment.
     """
     try:
-        payment = service.create_payment(org_id, payload)
+        payment = service.create_payment(org_id, payload, idempotency_key)
     except ValueError as e:
         msg = str(e)
+        if msg == "invalid_amount":
+            raise HTTPException(status_code=400, detail="Amount must be positive")
+        if msg == "idempotency_key_conflict":
+            raise HTTPException(
+                status_code=409,
+                detail="Idempotency-Key was already used with a different payload",
+            )
         if msg == "deal_not_found":
             raise HTTPException(status_code=404, detail="Deal not found")
         if msg == "rfq_not_found":
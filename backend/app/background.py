@@ -0,0 +1,129 @@
+# app/background.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    `workers` asyncio consumers on a private event loop in a daemon thread.
+
+    `submit()` may be called from any thread (sync request handlers run in
+    the threadpool) and never blocks the caller; the loop is started on the
+    first submit. Handler errors are logged and do not stop the worker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[None]],
+        workers: int = 4,
+    ) -> None:
+        self.name = name
+        self.workers = max(1, workers)
+        self._handler = handler
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[Any]"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, item: Any) -> None:
+        loop = self._ensure_started()
+        loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """Block until every submitted item is processed (tests, shutdown)."""
+        if self._loop is None:
+            return True
+        future = asyncio.run_coroutine_threadsafe(self._queue.join(), self._loop)
+        try:
+            future.result(timeout)
+            return True
+        except TimeoutError:
+            future.cancel()
+            return False
+
+    def stop(self) -> None:
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._queue = self._thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5.0)
+
+    # --- internal ---
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                ready = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(ready,), name=self.name, daemon=True
+                )
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        for i in range(self.workers):
+            loop.create_task(self._work(), name=f"{self.name}-{i}")
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    async def _work(self) -> None:
+        queue = self._queue
+        while True:
+            item = await queue.get()
+            try:
+                await self._handler(item)
+            except Exception:
+                logger.exception("%s: job %r failed", self.name, item)
+            finally:
+                queue.task_done()
+
+
+class PeriodicTask:
+    """Calls `func()` every `interval` seconds in a daemon thread until stopped."""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float) -> None:
+        self.name = name
+        self.interval = interval
+        self._func = func
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self._func()
+            except Exception:
+                logger.exception("%s failed", self.name)
@@ -0,0 +1,111 @@
+# app/config.py
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Каталог с файлами данных (users/orgs/passwords, журналы и т.п.)
+DATA_DIR = Path(
+    os.getenv(
+        "SILKFLOW_DATA_DIR",
+        str(Path(__file__).resolve().parent.parent / "data"),
+    )
+)
+
+# Append-only journal of auth mutations
+# fsync после каждых N записей или не реже, чем раз в N секунд
+JOURNAL_FSYNC_BATCH = int(os.getenv("SILKFLOW_JOURNAL_FSYNC_BATCH", "32"))
+JOURNAL_FSYNC_INTERVAL = float(os.getenv("SILKFLOW_JOURNAL_FSYNC_INTERVAL", "1.0"))
+# после стольких записей журнал сворачивается в snapshot
+JOURNAL_COMPACT_EVERY = int(os.getenv("SILKFLOW_JOURNAL_COMPACT_EVERY", "10000"))
+
+# Auth tokens (HMAC-SHA256, JWT format). Без SILKFLOW_AUTH_SECRET секрет
+# генерируется один раз и хранится в DATA_DIR/auth_secret.
+AUTH_SECRET = os.getenv("SILKFLOW_AUTH_SECRET", "")
+ACCESS_TOKEN_TTL_SECONDS = int(os.getenv("SILKFLOW_ACCESS_TOKEN_TTL_SECONDS", "3600"))
+REFRESH_TOKEN_TTL_SECONDS = int(os.getenv("SILKFLOW_REFRESH_TOKEN_TTL_SECONDS", str(30 * 86400)))
+# verified access tokens; a revocation made by another worker is seen after at most the TTL
+TOKEN_CACHE_SIZE = int(os.getenv("SILKFLOW_TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("SILKFLOW_TOKEN_CACHE_TTL_SECONDS", "60"))
+
+# Password hashing (scrypt) on a dedicated pool; beyond KDF_MAX_PENDING
+# queued verifications login answers 503 instead of queueing
+PASSWORD_SCRYPT_N = int(os.getenv("SILKFLOW_PASSWORD_SCRYPT_N", str(2 ** 14)))
+PASSWORD_SCRYPT_R = int(os.getenv("SILKFLOW_PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("SILKFLOW_PASSWORD_SCRYPT_P", "1"))
+PASSWORD_KDF_WORKERS = int(os.getenv("SILKFLOW_PASSWORD_KDF_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_KDF_MAX_PENDING = int(os.getenv("SILKFLOW_PASSWORD_KDF_MAX_PENDING", "64"))
+# Login attempts (token buckets): burst, then N per minute
+LOGIN_IP_BURST = int(os.getenv("SILKFLOW_LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("SILKFLOW_LOGIN_IP_PER_MINUTE", "20"))
+LOGIN_EMAIL_BURST = int(os.getenv("SILKFLOW_LOGIN_EMAIL_BURST", "5"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("SILKFLOW_LOGIN_EMAIL_PER_MINUTE", "5"))
+
+# Marketplace discovery: cached (query, filters) -> matches + facet counts
+DISCOVERY_CACHE_SIZE = int(os.getenv("SILKFLOW_DISCOVERY_CACHE_SIZE", "256"))
+
+# HS code -> duty rate table (TSV: prefix, rate, description), mmap-ed on first lookup
+TARIFF_FILE = Path(
+    os.getenv(
+        "SILKFLOW_TARIFF_FILE",
+        str(Path(__file__).resolve().parent / "resources" / "hs_tariffs.tsv"),
+    )
+)
+TARIFF_PRODUCT_CACHE_SIZE = int(os.getenv("SILKFLOW_TARIFF_PRODUCT_CACHE_SIZE", "100000"))
+# per-product duty rates are re-read from the table at least this often
+TARIFF_PRODUCT_CACHE_TTL_SECONDS = float(
+    os.getenv("SILKFLOW_TARIFF_PRODUCT_CACHE_TTL_SECONDS", "300")
+)
+
+# Bulk product import: the upload is copied to PRODUCT_IMPORTS_DIR and parsed
+# by a background job, BATCH_SIZE rows per validation/insert round
+PRODUCT_IMPORTS_DIR = Path(
+    os.getenv("SILKFLOW_PRODUCT_IMPORTS_DIR", str(DATA_DIR / "product_imports"))
+)
+PRODUCT_IMPORT_BATCH_SIZE = int(os.getenv("SILKFLOW_PRODUCT_IMPORT_BATCH_SIZE", "500"))
+PRODUCT_IMPORT_MAX_ERRORS = int(os.getenv("SILKFLOW_PRODUCT_IMPORT_MAX_ERRORS", "100"))  # kept per job
+PRODUCT_IMPORT_WORKERS = int(os.getenv("SILKFLOW_PRODUCT_IMPORT_WORKERS", "2"))
+
+# Storage backend for service repositories: "memory" (default) or "sqlite"
+STORAGE_BACKEND = os.getenv("SILKFLOW_STORAGE_BACKEND", "memory").lower()
+SQLITE_PATH = Path(os.getenv("SILKFLOW_SQLITE_PATH", str(DATA_DIR / "silkflow.db")))
+SQLITE_POOL_SIZE = int(os.getenv("SILKFLOW_SQLITE_POOL_SIZE", "8"))
+
+# In-process event bus (notification / chat streams)
+EVENTS_HISTORY_SIZE = int(os.getenv("SILKFLOW_EVENTS_HISTORY_SIZE", "500"))  # per topic, for resume
+EVENTS_QUEUE_SIZE = int(os.getenv("SILKFLOW_EVENTS_QUEUE_SIZE", "256"))      # per connection
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("SILKFLOW_EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# Chat translation
+TRANSLATION_PROVIDER = os.getenv("SILKFLOW_TRANSLATION_PROVIDER", "local").lower()
+TRANSLATION_TIMEOUT_SECONDS = float(os.getenv("SILKFLOW_TRANSLATION_TIMEOUT_SECONDS", "10"))
+TRANSLATION_CACHE_SIZE = int(os.getenv("SILKFLOW_TRANSLATION_CACHE_SIZE", "10000"))
+TRANSLATION_CACHE_TTL_SECONDS = float(os.getenv("SILKFLOW_TRANSLATION_CACHE_TTL_SECONDS", "86400"))
+TRANSLATION_CONCURRENCY = int(os.getenv("SILKFLOW_TRANSLATION_CONCURRENCY", "8"))  # engine calls in flight
+AUTO_TRANSLATE_WORKERS = int(os.getenv("SILKFLOW_AUTO_TRANSLATE_WORKERS", "4"))  # background pre-translation
+TRANSLATION_BATCH_LIMIT = int(os.getenv("SILKFLOW_TRANSLATION_BATCH_LIMIT", "100"))  # batch without messageIds
+
+# Notification retention (enforced by the background compactor)
+NOTIFICATIONS_MAX_PER_USER = int(os.getenv("SILKFLOW_NOTIFICATIONS_MAX_PER_USER", "1000"))
+NOTIFICATIONS_READ_TTL_DAYS = float(os.getenv("SILKFLOW_NOTIFICATIONS_READ_TTL_DAYS", "30"))
+NOTIFICATIONS_COMPACT_INTERVAL_SECONDS = float(
+    os.getenv("SILKFLOW_NOTIFICATIONS_COMPACT_INTERVAL_SECONDS", "300")
+)
+# evicted notifications: <dir>/<userId>.jsonl.gz, its segment index in <userId>.idx
+NOTIFICATIONS_ARCHIVE_DIR = Path(
+    os.getenv("SILKFLOW_NOTIFICATIONS_ARCHIVE_DIR", str(DATA_DIR / "notifications_archive"))
+)
+# notifications per gzip member of the archive; a page reads about one member
+NOTIFICATIONS_ARCHIVE_SEGMENT_SIZE = int(
+    os.getenv("SILKFLOW_NOTIFICATIONS_ARCHIVE_SEGMENT_SIZE", "500")
+)
+# org events of one type within this window merge into one digest
+# (0 = off, the default: every event is its own notification)
+NOTIFICATIONS_COALESCE_WINDOW_SECONDS = float(
+    os.getenv("SILKFLOW_NOTIFICATIONS_COALESCE_WINDOW_SECONDS", "0")
+)
+NOTIFICATIONS_DIGEST_FLUSH_SECONDS = float(os.getenv("SILKFLOW_NOTIFICATIONS_DIGEST_FLUSH_SECONDS", "5"))
@@ -3,24 +3,54 @@ from __future__ import annotations
 
 from typing import Optional
 
-from fastapi import Depends, Header, HTTPException
+from fastapi import Depends, Header, HTTPException, Query
 
 from app.schemas.auth import User
 from app.services import auth as auth_service
 
 
-def get_current_user(authorization: Optional[str] = Header(default=None)) -> User:
+def get_bearer_token(authorization: Optional[str] = Header(default=None)) -> str:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
+    return authorization.split(" ", 1)[1].strip()
 
-    token = authorization.split(" ", 1)[1].strip()
-    user = auth_service.get_user_by_access_token(token)
+
+def get_current_principal(token: str = Depends(get_bearer_token)) -> auth_service.Principal:
+    # FastAPI resolves this once per request for both user and org dependencies
+    principal = auth_service.resolve_access_token(token)
+    if not principal:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return principal
+
+
+def get_current_user(
+    principal: auth_service.Principal = Depends(get_current_principal),
+) -> User:
+    return principal[0]
+
+
+def get_current_user_for_stream(
+    authorization: Optional[str] = Header(default=None),
+    access_token: Optional[str] = Query(default=None),
+) -> User:
+    """
+    Like get_current_user, but also accepts ?access_token=... because
+    browser EventSource/WebSocket clients cannot set headers.
+    """
+    if authorization:
+        return get_current_user(get_current_principal(get_bearer_token(authorization)))
+    if not access_token:
+        raise HTTPException(status_code=401, detail="Missing access token")
+    user = auth_service.get_user_by_access_token(access_token)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     return user
 
 
-def get_current_org_id(current_user: User = Depends(get_current_user)) -> str:
-    if not current_user.orgId or current_user.orgId not in auth_service.orgs:
+def get_current_org_id(
+    principal: auth_service.Principal = Depends(get_current_principal),
+) -> str:
+    user, org = principal
+    if org is None:
         raise HTTPException(status_code=404, detail="Organization not found for user")
-    return current_user.orgId  # type: ignore[return-value]
\ No newline at end of file
+    return org.id
\ No newline at end of file
@@ -0,0 +1,25 @@
+# app/filelock.py
+from __future__ import annotations
+
+from typing import IO
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+def try_lock(fh: IO) -> bool:
+    """
+    Non-blocking exclusive flock on an open file, shared by all worker
+    processes; it is released when the file is closed. False while another
+    open file (in this or another process) holds it. Without flock
+    (Windows) it always succeeds: single-process deployments only.
+    """
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
@@ -0,0 +1,140 @@
+# app/hashing.py
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app import config
+
+T = TypeVar("T")
+
+# scrypt$<n>$<r>$<p>$<salt>$<hash>, salt/hash base64url
+SCHEME = "scrypt"
+_SALT_BYTES = 16
+_HASH_BYTES = 32
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=2 * 128 * n * r * p,
+        dklen=_HASH_BYTES,
+    )
+
+
+def hash_password(password: str) -> str:
+    n, r, p = config.PASSWORD_SCRYPT_N, config.PASSWORD_SCRYPT_R, config.PASSWORD_SCRYPT_P
+    salt = os.urandom(_SALT_BYTES)
+    digest = _scrypt(password, salt, n, r, p)
+    return f"{SCHEME}${n}${r}${p}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(SCHEME + "$")
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """
+    Check `password` against a stored record. Records written before
+    hashing was introduced hold the plaintext; they still verify (in
+    constant time) and `needs_rehash()` reports them.
+    """
+    if not is_hashed(stored):
+        return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        expected = _b64decode(digest)
+        actual = _scrypt(password, _b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored: str) -> bool:
+    """Plaintext legacy record, or hashed with other than the current params."""
+    if not is_hashed(stored):
+        return True
+    params = stored.split("$")[1:4]
+    current = [str(config.PASSWORD_SCRYPT_N), str(config.PASSWORD_SCRYPT_R), str(config.PASSWORD_SCRYPT_P)]
+    return params != current
+
+
+# salt and digest of the dummy record, drawn once at import: no KDF run is
+# needed to build it, verifying against it costs one like a real record
+_DUMMY_SALT_AND_DIGEST = f"{_b64encode(os.urandom(_SALT_BYTES))}${_b64encode(os.urandom(_HASH_BYTES))}"
+
+
+def dummy_hash() -> str:
+    # verified when the email is unknown, so both cases cost one KDF run
+    n, r, p = config.PASSWORD_SCRYPT_N, config.PASSWORD_SCRYPT_R, config.PASSWORD_SCRYPT_P
+    return f"{SCHEME}${n}${r}${p}${_DUMMY_SALT_AND_DIGEST}"
+
+
+class KdfBusy(Exception):
+    pass
+
+
+class KdfPool:
+    """
+    Dedicated threads for password hashing (hashlib.scrypt releases the
+    GIL). At most `max_pending` jobs may wait or run: beyond that `submit`
+    fails fast with KdfBusy instead of growing a queue, so a brute-force
+    burst cannot push everyone's login latency up without bound.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, func: Callable[..., T], *args: Any) -> "Future[T]":
+        if not self._slots.acquire(blocking=False):
+            raise KdfBusy()
+        try:
+            future = self._ensure_started().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _f: self._slots.release())
+        return future
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def run_sync(self, func: Callable[..., T], *args: Any) -> T:
+        return self.submit(func, *args).result()
+
+    def stop(self) -> None:
+        with self._start_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _ensure_started(self) -> ThreadPoolExecutor:
+        with self._start_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="kdf")
+            return self._executor
+
+
+kdf_pool = KdfPool(config.PASSWORD_KDF_WORKERS, config.PASSWORD_KDF_MAX_PENDING)
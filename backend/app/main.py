@@ -1,4 +1,6 @@
 # app/main.py
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -13,11 +15,35 @@ from app.api.v1 import documents as documents_routes
 from app.api.v1 import logistics as logistics_routes
 from app.api.v1 import chats as chats_routes
 from app.api.v1 import notifications as notifications_routes
+from app.api.v1 import discovery as discovery_routes
+from app.api.v1 import tariffs as tariffs_routes
+from app.hashing import kdf_pool
+from app.pagination import NEXT_CURSOR_HEADER
+from app.services import chat as chat_service
+from app.services import notifications as notifications_service
+from app.services import product_imports as product_imports_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # импорты, прерванные рестартом: упавшие помечаем failed, очередь поднимаем заново
+    product_imports_service.recover_jobs()
+    # фоновые задачи: ретеншн и дайджесты уведомлений
+    notifications_service.compactor.start()
+    notifications_service.digest_flusher.start()
+    yield
+    notifications_service.digest_flusher.stop()
+    notifications_service.compactor.stop()
+    chat_service.auto_translate_pool.stop()
+    product_imports_service.import_pool.stop()
+    kdf_pool.stop()
+
 
 app = FastAPI(
     title="SilkFlow API",
     version="0.1.0",
     description="Backend for SilkFlow B2B messenger (MVP)",
+    lifespan=lifespan,
 )
 
 # CORS для фронта (Vite по умолчанию на 5173)
@@ -32,6 +58,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -50,4 +77,6 @@ app.include_router(analytics_routes.router)
 app.include_router(documents_routes.router)
 app.include_router(logistics_routes.router)
 app.include_router(chats_routes.router)
-app.include_router(notifications_routes.router)   
+app.include_router(notifications_routes.router)
+app.include_router(discovery_routes.router)
+app.include_router(tariffs_routes.router)   
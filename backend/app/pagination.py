@@ -0,0 +1,159 @@
+# app/pagination.py
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, FrozenSet, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+MAX_PAGE_LIMIT = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+SortKey = Tuple[datetime, str]
+# position in a relevance-ranked list: (score, id), best score first
+RankKey = Tuple[float, str]
+
+
+@dataclass(frozen=True)
+class PageParams:
+    cursor: Optional[SortKey] = None
+    limit: Optional[int] = None
+    fields: Optional[FrozenSet[str]] = None
+    # ranked lists: relevance score of the cursor item when it was served
+    score: Optional[float] = None
+
+
+def encode_cursor(key: SortKey, score: Optional[float] = None) -> str:
+    fields: List[Any] = [key[0].isoformat(), key[1]]
+    if score is not None:
+        fields.append(score)
+    raw = json.dumps(fields, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> Tuple[SortKey, Optional[float]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id, *rest = json.loads(base64.urlsafe_b64decode(padded))
+        ts = datetime.fromisoformat(created_at)
+        score = float(rest[0]) if rest else None
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts, str(item_id)), score
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    return _decode(cursor)[0]
+
+
+def page_params(model: Type[BaseModel]) -> Callable[..., PageParams]:
+    """
+    FastAPI dependency with common list parameters for lists of `model`:
+    `Depends(page_params(Product))`. Unknown `fields` are rejected up front,
+    also when the page turns out empty.
+    """
+    known = frozenset(model.model_fields)
+
+    def dependency(
+        cursor: Optional[str] = Query(
+            default=None,
+            description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page",
+        ),
+        limit: Optional[int] = Query(
+            default=None,
+            ge=1,
+            le=MAX_PAGE_LIMIT,
+            description="Page size. If omitted, all remaining items are returned",
+        ),
+        fields: Optional[str] = Query(
+            default=None,
+            description="Comma-separated list of fields to return, e.g. 'id,status'",
+        ),
+    ) -> PageParams:
+        selected = None
+        if fields:
+            selected = frozenset(f.strip() for f in fields.split(",") if f.strip()) or None
+        unknown = selected - known if selected else None
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+        key, score = _decode(cursor) if cursor else (None, None)
+        return PageParams(cursor=key, limit=limit, fields=selected, score=score)
+
+    return dependency
+
+
+def sort_key(item: Any) -> SortKey:
+    """Stable order for list endpoints: createdAt, then id."""
+    created_at = getattr(item, "createdAt", None) or _EPOCH
+    return created_at, item.id
+
+
+def rank_after(params: PageParams) -> Optional[RankKey]:
+    """
+    Where the next page of a relevance-ranked list starts: after the cursor
+    item at its current score if it still matches, otherwise after the
+    (score, id) it had when served. A cursor without a score (not from a
+    ranked list) ranks below everything.
+    """
+    if params.cursor is None:
+        return None
+    score = params.score if params.score is not None else float("-inf")
+    return score, params.cursor[1]
+
+
+def ranked_response(
+    hits: List[Tuple[Any, float]], has_more: bool, params: PageParams, response: Response
+) -> Any:
+    """
+    keyset_response() for a relevance-ranked page of (item, score): the
+    next cursor also carries the last item's score.
+    """
+    items = [item for item, _ in hits]
+    next_cursor = None
+    if has_more and hits:
+        last, score = hits[-1]
+        next_cursor = encode_cursor(sort_key(last), score)
+    return page_response(items, next_cursor, params, response)
+
+
+def keyset_response(
+    items: List[Any], has_more: bool, params: PageParams, response: Response
+) -> Any:
+    """
+    Body for a page read from an ordered index with `limit` + 1: the next
+    cursor points after the last returned item.
+    """
+    next_cursor = encode_cursor(sort_key(items[-1])) if has_more and items else None
+    return page_response(items, next_cursor, params, response)
+
+
+def page_response(
+    page: List[Any], next_cursor: Optional[str], params: PageParams, response: Response
+) -> Any:
+    """Body for an already cut page: next cursor header + field projection."""
+    if params.fields is None:
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return page
+
+    projected = project(page, params.fields)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return JSONResponse(content=projected, headers=headers)
+
+
+def project(items: List[BaseModel], fields: FrozenSet[str]) -> List[dict]:
+    # fields are checked against the model in page_params()
+    include = set(fields) | {"id"}
+    return [item.model_dump(mode="json", include=include) for item in items]
@@ -0,0 +1,51 @@
+# app/ratelimit.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token bucket: `burst` tokens, refilled at `rate` tokens per
+    second. Tracks at most `max_keys` keys; the least recently seen bucket
+    is forgotten first (it would have refilled by then in most cases).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_keys = max(1, max_keys)
+        self._clock = clock
+        # key -> [tokens, updated_at]
+        self._buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: Hashable, cost: float = 1.0) -> bool:
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < cost:
+                return False
+            bucket[0] -= cost
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
@@ -16,6 +16,7 @@ class User(BaseModel):
     phone: Optional[str] = None
     orgId: Optional[str] = None
     createdAt: datetime
+    preferredLang: Optional[str] = None   # chat language; default derived from org country
 
 
 class AuthRegisterRequest(BaseModel):
@@ -25,6 +26,7 @@ class AuthRegisterRequest(BaseModel):
     orgName: str
     orgCountry: str
     orgRole: OrganizationRole
+    preferredLang: Optional[str] = None
 
 
 class AuthLoginRequest(BaseModel):
@@ -32,6 +34,14 @@ class AuthLoginRequest(BaseModel):
     password: str
 
 
+class AuthRefreshRequest(BaseModel):
+    refreshToken: str
+
+
+class AuthLogoutRequest(BaseModel):
+    refreshToken: Optional[str] = None
+
+
 class AuthTokens(BaseModel):
     accessToken: str
     refreshToken: str
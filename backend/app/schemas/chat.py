@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class MessageTranslation(BaseModel):
@@ -43,4 +43,22 @@ class Chat(BaseModel):
     id: str
     dealId: str
     participants: List[str]      # user ids
-    createdAt: datetime
\ No newline at end of file
+    createdAt: datetime
+    # new messages are pre-translated into every participant's language
+    autoTranslate: bool = False
+
+
+class ChatUpdateRequest(BaseModel):
+    autoTranslate: Optional[bool] = None
+
+class MessageBatchTranslateRequest(BaseModel):
+    targetLang: str
+    # if omitted: the newest messages not yet translated into targetLang
+    # (at most TRANSLATION_BATCH_LIMIT)
+    messageIds: Optional[List[str]] = Field(default=None, max_length=500)
+
+
+class MessageBatchTranslateItem(BaseModel):
+    messageId: str
+    text: str
+    targetLang: str
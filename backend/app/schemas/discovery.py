@@ -0,0 +1,43 @@
+# app/schemas/discovery.py
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from .orgs import KybStatus
+from .products import Product
+
+
+class DiscoverySupplier(BaseModel):
+    id: str
+    name: str
+    country: str
+    kybStatus: KybStatus
+
+
+class DiscoveryHit(BaseModel):
+    product: Product
+    supplier: DiscoverySupplier
+    score: Optional[float] = None  # relevance, only when searching by text
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class DiscoveryFacets(BaseModel):
+    country: List[FacetCount]
+    kybStatus: List[FacetCount]
+    currency: List[FacetCount]
+    unit: List[FacetCount]
+    hsChapter: List[FacetCount]
+    priceRange: List[FacetCount]
+
+
+class DiscoverySearchResponse(BaseModel):
+    items: List[DiscoveryHit]
+    total: int
+    facets: DiscoveryFacets
+    nextCursor: Optional[str] = None
@@ -3,9 +3,9 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class NotificationType(str, Enum):
@@ -36,4 +36,25 @@ class Notification(BaseModel):
     data: Optional[Dict[str, Any]] = None
     read: bool
     createdAt: datetime
-    readAt: Optional[datetime] = None
\ No newline at end of file
+    readAt: Optional[datetime] = None
+    # digest: several events of one type merged into this notification.
+    # Each merged event overwrites entityId/text/data, so they describe the
+    # latest event only; entityIds lists every event's entity, oldest first
+    count: int = 1
+    entityIds: Optional[List[str]] = None
+
+class NotificationUnreadCount(BaseModel):
+    unread: int
+
+
+class NotificationBulkReadResponse(BaseModel):
+    updated: int   # notifications marked read by this call
+    unread: int    # unread left
+
+
+class NotificationPreferences(BaseModel):
+    # notification types the user does not want to receive
+    mutedTypes: List[NotificationType] = Field(default_factory=list)
+    # periodic digest mode: org events are merged per type and delivered
+    # once per interval instead of one by one
+    digestIntervalMinutes: Optional[int] = Field(default=None, ge=1)
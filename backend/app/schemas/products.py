@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -50,4 +50,42 @@ class ProductUpdateRequest(BaseModel):
     hsCode: Optional[str] = None
     baseCurrency: Optional[CurrencyCode] = None
     basePrice: Optional[float] = None
-    unit: Optional[UnitOfMeasure] = None
\ No newline at end of file
+    unit: Optional[UnitOfMeasure] = None
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class ImportStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class ProductImportError(BaseModel):
+    line: int  # line number in the uploaded file (CSV header is line 1)
+    field: Optional[str] = None
+    message: str
+
+
+class ProductImportJob(BaseModel):
+    id: str
+    orgId: str
+    filename: str
+    format: ImportFormat
+    status: ImportStatus
+    bytesTotal: int
+    bytesProcessed: int = 0
+    rowsProcessed: int = 0
+    rowsImported: int = 0
+    rowsFailed: int = 0
+    # first PRODUCT_IMPORT_MAX_ERRORS row errors; rowsFailed counts all of them
+    errors: List[ProductImportError] = []
+    errorsTruncated: bool = False
+    error: Optional[str] = None  # why the whole job failed
+    createdAt: datetime
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
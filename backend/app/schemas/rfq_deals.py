@@ -139,6 +139,7 @@ class Deal(BaseModel):
     mainCurrency: CurrencyCode
     summary: Optional[dict] = None
     logistics: Optional[DealLogisticsState] = None
+    createdAt: Optional[datetime] = None
 
 class DealAggregatedView(BaseModel):
     deal: Deal
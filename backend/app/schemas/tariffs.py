@@ -0,0 +1,19 @@
+# app/schemas/tariffs.py
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+MAX_LOOKUP_CODES = 10000
+
+
+class TariffLookupRequest(BaseModel):
+    hsCodes: List[str] = Field(max_length=MAX_LOOKUP_CODES)
+
+
+class TariffRate(BaseModel):
+    hsCode: str                          # as requested
+    matchedPrefix: Optional[str] = None  # longest prefix found in the tariff table
+    rate: Optional[float] = None         # duty + VAT share of customs value
+    description: Optional[str] = None
@@ -63,4 +63,18 @@ class PaymentCreateRequest(BaseModel):
     dealId: str
     amount: float
     currency: CurrencyCode
-    fxQuoteId: Optional[str] = None
\ No newline at end of file
+    fxQuoteId: Optional[str] = None
+
+class LedgerAccount(str, Enum):
+    available = "available"   # wallet balance
+    blocked = "blocked"       # wallet blockedAmount (escrow)
+    funding = "funding"       # system counter-account for demo top-ups
+
+
+class LedgerEntry(BaseModel):
+    id: str
+    txId: str
+    walletId: str
+    account: LedgerAccount
+    amountMinor: int          # signed, in minor units (1/100)
+    createdAt: datetime
@@ -0,0 +1,339 @@
+# app/search.py
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from app.storage.index import RepositoryIndex
+
+# runs of letters/digits; CJK scripts are split out separately because they
+# are written without spaces
+_WORD_RE = re.compile(r"\w+")
+_CJK_RE = re.compile(
+    "[\u3040-\u30ff"  # hiragana, katakana
+    "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"  # han
+    "\uac00-\ud7af]+"  # hangul
+)
+
+# BM25
+K1 = 1.2
+B = 0.75
+# query token matched only as a prefix of an indexed term scores lower
+PREFIX_WEIGHT = 0.7
+MIN_PREFIX_LEN = 2
+MAX_PREFIX_EXPANSIONS = 128
+
+
+def normalize(text: str) -> str:
+    # NFKC folds full-width forms (Ｍ８ -> m8), casefold handles Cyrillic/Greek
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return text.replace("ё", "е")
+
+
+def tokenize(text: Optional[str], query: bool = False) -> List[str]:
+    """
+    Normalized tokens of `text`. Latin/Cyrillic/digits: whole words.
+    CJK runs: overlapping bigrams plus the last character, so a one- or
+    two-character query finds a longer compound ("钢" -> "不锈钢").
+    In a query the trailing character adds nothing to its bigram and is
+    left out.
+    """
+    if not text:
+        return []
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(normalize(text)):
+        pos = 0
+        for m in _CJK_RE.finditer(word):
+            if m.start() > pos:
+                tokens.append(word[pos : m.start()])
+            run = m.group()
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+            if not query or len(run) == 1:
+                tokens.append(run[-1])
+            pos = m.end()
+        if pos < len(word):
+            tokens.append(word[pos:])
+    return tokens
+
+
+Fields = Sequence[Tuple[Optional[str], float]]  # (text, weight)
+
+
+class _Doc:
+    __slots__ = ("scope", "terms")
+
+    def __init__(self, scope: Hashable, terms: Dict[str, float]) -> None:
+        self.scope = scope
+        self.terms = terms
+
+
+class TextIndex(RepositoryIndex):
+    """
+    Inverted index with BM25 ranking, split by scope (e.g. orgId).
+
+    Plugs into `Repository.add_index()` like `Index`: the repository calls
+    `update()` / `discard()` on every write, so the index follows
+    create/update/delete without extra calls. `fields(record)` returns the
+    weighted texts of a record, `scope(record)` its posting-list partition.
+
+    Postings are term -> scope -> {id: weighted tf}: a query restricted to
+    one scope never touches other scopes' documents.
+    """
+
+    def __init__(
+        self,
+        fields: Callable[[Any], Fields],
+        scope: Callable[[Any], Hashable],
+    ) -> None:
+        self._fields = fields
+        self._scope = scope
+        self._postings: Dict[str, Dict[Hashable, Dict[str, float]]] = {}
+        self._docs: Dict[str, _Doc] = {}
+        self._lengths: Dict[str, float] = {}  # id -> weighted token count
+        self._vocab: List[str] = []  # sorted, for prefix lookups
+        # scope -> [doc count, total length]
+        self._stats: Dict[Hashable, List[float]] = {}
+        self._total_length = 0.0
+        self._lock = threading.Lock()
+
+    # --- maintenance (repository protocol) ---
+
+    def update(self, record_id: str, record: Any) -> None:
+        terms: Counter = Counter()
+        for text, weight in self._fields(record):
+            for token in tokenize(text):
+                terms[token] += weight
+        doc = _Doc(self._scope(record), dict(terms))
+        with self._lock:
+            self._remove(record_id)
+            self._add(record_id, doc, sum(terms.values()))
+
+    def discard(self, record_id: str) -> None:
+        with self._lock:
+            self._remove(record_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._lengths.clear()
+            self._vocab.clear()
+            self._stats.clear()
+            self._total_length = 0.0
+
+    def rebuild(self, items: Iterable[Tuple[str, Any]]) -> None:
+        self.clear()
+        for record_id, record in items:
+            self.update(record_id, record)
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._docs)
+
+    # --- queries ---
+
+    def search(
+        self,
+        query: str,
+        scope: Optional[Hashable] = None,
+        limit: Optional[int] = None,
+        scopes: Optional[Collection[Hashable]] = None,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        (id, score) of records matching every query token, best first, ties
+        by id (only the top `limit` if given). With `after` = (score, id),
+        only records ranked below it: below that id's current score if it
+        still matches, so pages follow score changes, else below `score`.
+        A token matches an indexed term exactly or, if at least
+        MIN_PREFIX_LEN long (any length for CJK), as its prefix.
+        scope=None searches all scopes, or only `scopes` if given (a set;
+        idf then still comes from the whole index).
+        """
+        tokens = list(dict.fromkeys(tokenize(query, query=True)))
+        if not tokens:
+            return []
+        self.refresh()
+        with self._lock:
+            if scope is None:
+                n_docs, total = float(len(self._docs)), self._total_length
+            else:
+                n_docs, total = self._stats.get(scope, (0.0, 0.0))
+            if not n_docs:
+                return []
+            avg_len = total / n_docs
+
+            plans = []
+            for token in tokens:
+                plan = self._plan(token, scope, n_docs, scopes)
+                if plan is None:
+                    return []
+                plans.append(plan)
+
+            # AND: score the rarest token, then only its matches for the rest
+            plans.sort(key=lambda plan: plan[0])
+            result = self._score(plans[0][1], avg_len, None)
+            for _, terms in plans[1:]:
+                if not result:
+                    return []
+                result = self._score(terms, avg_len, result)
+
+        rank = lambda pair: (-pair[1], pair[0])  # noqa: E731
+        hits: Iterable[Tuple[str, float]] = result.items()
+        if after is not None:
+            after_score, after_id = after
+            bound = (-result.get(after_id, after_score), after_id)
+            hits = [pair for pair in hits if rank(pair) > bound]
+        if limit is not None:
+            # nsmallest by the full rank: ties at the cut are broken by id,
+            # like the sorted order, so consecutive pages never overlap
+            return heapq.nsmallest(limit, hits, key=rank)
+        return sorted(hits, key=rank)
+
+    def _plan(
+        self,
+        token: str,
+        scope: Optional[Hashable],
+        n_docs: float,
+        scopes: Optional[Collection[Hashable]],
+    ) -> Optional[Tuple[int, List[Tuple[float, Dict[Hashable, Dict[str, float]], int]]]]:
+        """(total df, [(weight * idf, postings by scope, df)]) or None if no match."""
+        terms = []
+        total_df = 0
+        for term, weight in self._expand(token):
+            by_scope = self._postings[term]
+            if scope is not None:
+                df = len(by_scope.get(scope, ()))
+                idf_df = df
+            else:
+                idf_df = sum(len(p) for p in by_scope.values())
+                if scopes is not None:
+                    if len(scopes) < len(by_scope):
+                        by_scope = {sc: by_scope[sc] for sc in scopes if sc in by_scope}
+                    else:
+                        by_scope = {sc: p for sc, p in by_scope.items() if sc in scopes}
+                    df = sum(len(p) for p in by_scope.values())
+                else:
+                    df = idf_df
+            if not df:
+                continue
+            idf = math.log(1.0 + (n_docs - idf_df + 0.5) / (idf_df + 0.5))
+            if scope is not None:
+                by_scope = {scope: by_scope[scope]}
+            terms.append((weight * idf, by_scope, df))
+            total_df += df
+        return (total_df, terms) if terms else None
+
+    def _score(
+        self,
+        terms: List[Tuple[float, Dict[Hashable, Dict[str, float]], int]],
+        avg_len: float,
+        acc: Optional[Dict[str, float]],
+    ) -> Dict[str, float]:
+        """
+        Best BM25 score of one query token per document (max over its term
+        expansions). With `acc`, only documents in `acc` are kept and their
+        accumulated score is added.
+        """
+        # BM25 term: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len))
+        base = K1 * (1 - B)
+        per_len = K1 * B / avg_len
+        lengths = self._lengths
+        scores: Dict[str, float] = {}
+        get = scores.get
+        for w_idf, by_scope, df in terms:
+            factor = w_idf * (K1 + 1)
+            if acc is not None and len(acc) < df:
+                # few candidates left: probe them instead of walking postings
+                docs = self._docs
+                for doc_id in acc:
+                    tf = by_scope.get(docs[doc_id].scope, {}).get(doc_id)
+                    if tf is not None:
+                        s = factor * tf / (tf + base + per_len * lengths[doc_id])
+                        if s > get(doc_id, 0.0):
+                            scores[doc_id] = s
+                continue
+            for postings in by_scope.values():
+                if acc is None and len(terms) == 1:
+                    # the common case: one term, no candidates - no max() needed
+                    for doc_id, tf in postings.items():
+                        scores[doc_id] = factor * tf / (tf + base + per_len * lengths[doc_id])
+                    continue
+                for doc_id, tf in postings.items():
+                    if acc is not None and doc_id not in acc:
+                        continue
+                    s = factor * tf / (tf + base + per_len * lengths[doc_id])
+                    if s > get(doc_id, 0.0):
+                        scores[doc_id] = s
+        if acc is not None:
+            for doc_id, s in scores.items():
+                scores[doc_id] = s + acc[doc_id]
+        return scores
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Indexed terms matched by a query token, with their weight."""
+        terms = [(token, 1.0)] if token in self._postings else []
+        # one CJK character is a whole word, it may start indexed bigrams
+        if len(token) < MIN_PREFIX_LEN and not _CJK_RE.match(token):
+            return terms
+        i = bisect_left(self._vocab, token)
+        vocab = self._vocab
+        while i < len(vocab) and vocab[i].startswith(token) and len(terms) < MAX_PREFIX_EXPANSIONS:
+            if vocab[i] != token:
+                terms.append((vocab[i], PREFIX_WEIGHT))
+            i += 1
+        return terms
+
+    # --- internal, under self._lock ---
+
+    def _add(self, record_id: str, doc: _Doc, length: float) -> None:
+        self._docs[record_id] = doc
+        self._lengths[record_id] = length
+        for term, tf in doc.terms.items():
+            by_scope = self._postings.get(term)
+            if by_scope is None:
+                by_scope = self._postings[term] = {}
+                insort(self._vocab, term)
+            by_scope.setdefault(doc.scope, {})[record_id] = tf
+        stats = self._stats.setdefault(doc.scope, [0.0, 0.0])
+        stats[0] += 1
+        stats[1] += length
+        self._total_length += length
+
+    def _remove(self, record_id: str) -> None:
+        doc = self._docs.pop(record_id, None)
+        if doc is None:
+            return
+        for term in doc.terms:
+            by_scope = self._postings[term]
+            postings = by_scope[doc.scope]
+            postings.pop(record_id, None)
+            if not postings:
+                del by_scope[doc.scope]
+            if not by_scope:
+                del self._postings[term]
+                del self._vocab[bisect_left(self._vocab, term)]
+        length = self._lengths.pop(record_id)
+        stats = self._stats[doc.scope]
+        stats[0] -= 1
+        stats[1] -= length
+        if not stats[0]:
+            del self._stats[doc.scope]
+        self._total_length -= length
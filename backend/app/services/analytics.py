@@ -1,29 +1,43 @@
 # app/services/analytics.py
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
 
 from app.schemas.analytics import DealCostBreakdown, DealUnitEconomicsResult
 from app.schemas.products import CurrencyCode
+from app.schemas.rfq_deals import OrderItem
 from app.services import rfq_deals as deals_service
+from app.services import tariffs as tariffs_service
 
 # Cost structure shares (as fraction of revenue).
 # These коэффициенты можно потом вынести в конфиг.
 PRODUCT_SHARE = 0.75       # Factory cost / COGS
 LOGISTICS_SHARE = 0.08     # Freight, local delivery etc.
-DUTIES_SHARE = 0.07        # Duties + VAT
+DUTIES_SHARE = tariffs_service.DEFAULT_DUTY_RATE  # Duties + VAT, if HS code unknown
 FX_SHARE = 0.03            # FX slippage / conversion
 COMMISSIONS_SHARE = 0.02   # Platform / banking fees
 OTHER_SHARE = 0.0          # Reserve for extra costs
 
 
+def _duties(items: List[OrderItem], revenue: float) -> float:
+    """Sum of line subtotal x duty rate; revenue not covered by lines pays DUTIES_SHARE."""
+    duties = 0.0
+    covered = 0.0
+    for item in items:
+        duties += item.subtotal * tariffs_service.product_duty_rate(item.productId)
+        covered += item.subtotal
+    return duties + max(revenue - covered, 0.0) * DUTIES_SHARE
+
+
 def calc_deal_unit_economics(deal_id: str) -> Optional[DealUnitEconomicsResult]:
     """
     Calculate unit economics summary for a deal.
 
     For MVP we assume:
       - revenue = order.totalAmount (in mainCurrency),
-      - each cost component is a share of revenue.
+      - each cost component is a share of revenue,
+      - except duties: each order line pays the tariff rate of its
+        product's HS code (DUTIES_SHARE if unknown).
     """
     deal = deals_service.deals.get(deal_id)
     if not deal:
@@ -51,7 +65,7 @@ def calc_deal_unit_economics(deal_id: str) -> Optional[DealUnitEconomicsResult]:
 
     product_cost = revenue * PRODUCT_SHARE
     logistics_cost = revenue * LOGISTICS_SHARE
-    duties_taxes = revenue * DUTIES_SHARE
+    duties_taxes = _duties(order.items, revenue)
     fx_cost = revenue * FX_SHARE
     commissions = revenue * COMMISSIONS_SHARE
     other_cost = revenue * OTHER_SHARE
@@ -79,7 +93,7 @@ def calc_deal_unit_economics(deal_id: str) -> Optional[DealUnitEconomicsResult]:
     notes = (
         "MVP unit economics: cost shares applied over order.totalAmount — "
         f"product {PRODUCT_SHARE*100:.1f}%, logistics {LOGISTICS_SHARE*100:.1f}%, "
-        f"duties {DUTIES_SHARE*100:.1f}%, fx {FX_SHARE*100:.1f}%, "
+        f"duties {duties_taxes / revenue * 100:.1f}% (by HS code), fx {FX_SHARE*100:.1f}%, "
         f"commissions {COMMISSIONS_SHARE*100:.1f}%."
     )
 
@@ -2,23 +2,74 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Dict, Tuple, Optional
+from typing import List, Tuple, Optional
 from uuid import uuid4
-from pathlib import Path
+import asyncio
+import atexit
+import base64
+import hashlib
+import hmac
 import json
-
+import os
+import secrets
+import threading
+import time
+
+from app import config
+from app import hashing
+from app.cache import LRUCache
+from app.ratelimit import TokenBucketLimiter
 from app.schemas.auth import User, AuthRegisterRequest, AuthLoginRequest
 from app.schemas.orgs import Organization, OrganizationRole, KybStatus
-
-# Пути к файлам (можно поменять при желании)
-DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
+from app.storage import registry as storage_registry
+from app.storage.base import Repository
+from app.storage.index import FacetIndex, Index
+from app.storage.journal import Journal, write_atomic
+from app.storage.registry import repository
+
+# Пути к файлам (можно поменять через SILKFLOW_DATA_DIR)
+DATA_DIR = config.DATA_DIR
 USERS_FILE = DATA_DIR / "users.json"
 ORGS_FILE = DATA_DIR / "orgs.json"
 PASSWORDS_FILE = DATA_DIR / "passwords.json"
+JOURNAL_FILE = DATA_DIR / "auth.journal"
+SECRET_FILE = DATA_DIR / "auth_secret"
+
+users: Repository[User] = repository("users", User)
+orgs: Repository[Organization] = repository("orgs", Organization)
+# userId -> hashing.hash_password() record (plaintext in legacy records)
+passwords: Repository[str] = repository("passwords", str)
+# jti -> exp (unix time) of revoked tokens
+revoked_tokens: Repository[int] = repository("revoked_tokens", int)
+
+# role / country / KYB status posting sets over orgs (supplier directory,
+# marketplace discovery); save_org and register keep it current
+org_directory = orgs.add_index(
+    FacetIndex(
+        lambda o: {"role": o.role.value, "country": o.country, "kybStatus": o.kybStatus.value},
+        sort_key=lambda o: (o.createdAt, o.id),
+    )
+)
+
+# orgId -> userIds (members of the org, in registration order)
+users_by_org = users.add_index(Index(lambda u: [u.orgId] if u.orgId else []))
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
 
-users: Dict[str, User] = {}
-orgs: Dict[str, Organization] = {}
-passwords: Dict[str, str] = {}
+
+# normalized email -> userId (one per email, enforced by register)
+users_by_email = users.add_index(Index(lambda u: [normalize_email(u.email)]))
+
+# In-memory backend: users/orgs/passwords.json - snapshot, auth.journal -
+# изменения после него. Persistent backend хранит всё сам, журнал не нужен.
+USE_JOURNAL = not storage_registry.is_persistent()
+journal = Journal(
+    JOURNAL_FILE,
+    fsync_batch=config.JOURNAL_FSYNC_BATCH,
+    fsync_interval=config.JOURNAL_FSYNC_INTERVAL,
+)
 
 
 def _now() -> datetime:
@@ -37,29 +88,50 @@ def _dt_from_str(s: str) -> datetime:
     return datetime.fromisoformat(s)
 
 
+def _user_to_dict(u: User) -> dict:
+    d = u.model_dump()
+    d["createdAt"] = _dt_to_str(u.createdAt)
+    return d
+
+
+def _org_to_dict(o: Organization) -> dict:
+    d = o.model_dump(mode="json")
+    d["createdAt"] = _dt_to_str(o.createdAt)
+    return d
+
+
+def _user_from_dict(item: dict) -> User:
+    item["createdAt"] = _dt_from_str(item["createdAt"])
+    return User(**item)
+
+
+def _org_from_dict(item: dict) -> Organization:
+    item["createdAt"] = _dt_from_str(item["createdAt"])
+    return Organization(**item)
+
+
+# === Snapshot ===
+
+
 def _save_users() -> None:
-    _ensure_data_dir()
-    data = []
-    for u in users.values():
-        d = u.model_dump()
-        d["createdAt"] = _dt_to_str(u.createdAt)
-        data.append(d)
-    USERS_FILE.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    data = [_user_to_dict(u) for u in list(users.values())]
+    write_atomic(USERS_FILE, json.dumps(data, ensure_ascii=False, indent=2))
 
 
 def _save_orgs() -> None:
-    _ensure_data_dir()
-    data = []
-    for o in orgs.values():
-        d = d = o.model_dump()
-        d["createdAt"] = _dt_to_str(o.createdAt)
-        data.append(d)
-    ORGS_FILE.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    data = [_org_to_dict(o) for o in list(orgs.values())]
+    write_atomic(ORGS_FILE, json.dumps(data, ensure_ascii=False, indent=2))
 
 
 def _save_passwords() -> None:
+    write_atomic(PASSWORDS_FILE, json.dumps(dict(passwords), ensure_ascii=False, indent=2))
+
+
+def _save_snapshot() -> None:
     _ensure_data_dir()
-    PASSWORDS_FILE.write_text(json.dumps(passwords, ensure_ascii=False, indent=2), encoding="utf-8")
+    _save_users()
+    _save_orgs()
+    _save_passwords()
 
 
 def _load_users() -> None:
@@ -67,8 +139,7 @@ def _load_users() -> None:
         return
     raw = json.loads(USERS_FILE.read_text(encoding="utf-8"))
     for item in raw:
-        item["createdAt"] = _dt_from_str(item["createdAt"])
-        u = User(**item)
+        u = _user_from_dict(item)
         users[u.id] = u
 
 
@@ -77,8 +148,7 @@ def _load_orgs() -> None:
         return
     raw = json.loads(ORGS_FILE.read_text(encoding="utf-8"))
     for item in raw:
-        item["createdAt"] = _dt_from_str(item["createdAt"])
-        o = Organization(**item)
+        o = _org_from_dict(item)
         orgs[o.id] = o
 
 
@@ -91,18 +161,89 @@ def _load_passwords() -> None:
             passwords[str(k)] = str(v)
 
 
+# === Journal ===
+
+
+def _apply_record(record: dict) -> None:
+    op = record.get("op")
+    if op == "user":
+        u = _user_from_dict(record["value"])
+        users[u.id] = u
+    elif op == "org":
+        o = _org_from_dict(record["value"])
+        orgs[o.id] = o
+    elif op == "password":
+        passwords[str(record["userId"])] = str(record["value"])
+
+
+def _replay_journal() -> None:
+    for record in journal.replay():
+        _apply_record(record)
+
+
+def _log(*records: dict) -> None:
+    """
+    Append mutation records; fold the journal into a snapshot once it
+    grows past JOURNAL_COMPACT_EVERY records.
+    """
+    if not USE_JOURNAL:
+        return
+    journal.append(*records)
+    if journal.records >= config.JOURNAL_COMPACT_EVERY:
+        journal.compact(_save_snapshot)
+
+
+def list_org_user_ids(org_id: str) -> List[str]:
+    return users_by_org.ids(org_id)
+
+
+def find_user_by_email(email: str) -> Optional[User]:
+    user_id = users_by_email.first(normalize_email(email))
+    return users.get(user_id) if user_id else None
+
+
+def save_org(org: Organization) -> None:
+    """Store updated organization (KYB status, profile edits) and journal it."""
+    orgs[org.id] = org
+    _log({"op": "org", "value": _org_to_dict(org)})
+
+
+def load_state() -> None:
+    """Load snapshot files and replay the journal on top of them."""
+    if not USE_JOURNAL:
+        return
+    _load_users()
+    _load_orgs()
+    _load_passwords()
+    _replay_journal()
+
+
 # Инициализация при импортe модуля
-_load_users()
-_load_orgs()
-_load_passwords()
+load_state()
+atexit.register(journal.close)
+
+
+_register_lock = threading.Lock()
 
 
 def register(data: AuthRegisterRequest) -> Tuple[User, Organization, dict]:
-    # проверяем, нет ли пользователя с таким email
-    for u in users.values():
-        if u.email == data.email:
+    if find_user_by_email(data.email) is not None:
+        raise ValueError("user_with_email_exists")
+    try:
+        password_hash = hashing.kdf_pool.run_sync(hashing.hash_password, data.password)
+    except hashing.KdfBusy:
+        raise ValueError("auth_busy")
+    # check + insert under one lock: два одновременных register с одним email
+    # (transaction() - то же между воркерами)
+    with _register_lock, storage_registry.transaction():
+        if find_user_by_email(data.email) is not None:
             raise ValueError("user_with_email_exists")
+        user, org = _create_account(data, password_hash)
+    tokens = issue_tokens(user)
+    return user, org, tokens
+
 
+def _create_account(data: AuthRegisterRequest, password_hash: str) -> Tuple[User, Organization]:
     org_id = str(uuid4())
     user_id = str(uuid4())
 
@@ -122,49 +263,256 @@ def register(data: AuthRegisterRequest) -> Tuple[User, Organization, dict]:
         phone=None,
         orgId=org_id,
         createdAt=_now(),
+        preferredLang=data.preferredLang,
     )
 
     orgs[org_id] = org
     users[user_id] = user
-    passwords[user_id] = data.password
+    passwords[user_id] = password_hash
 
-    # сохраняем всё в файлы
-    _save_users()
-    _save_orgs()
-    _save_passwords()
+    # O(1) I/O: три записи в журнал вместо перезаписи всех файлов
+    _log(
+        {"op": "org", "value": _org_to_dict(org)},
+        {"op": "user", "value": _user_to_dict(user)},
+        {"op": "password", "userId": user_id, "value": password_hash},
+    )
 
-    tokens = _make_demo_tokens(user_id)
-    return user, org, tokens
+    return user, org
 
 
-def login(data: AuthLoginRequest) -> Tuple[User, Organization, dict]:
-    user = next((u for u in users.values() if u.email == data.email), None)
-    if not user:
-        raise ValueError("invalid_credentials")
+login_ip_limiter = TokenBucketLimiter(config.LOGIN_IP_PER_MINUTE / 60, config.LOGIN_IP_BURST)
+login_email_limiter = TokenBucketLimiter(
+    config.LOGIN_EMAIL_PER_MINUTE / 60, config.LOGIN_EMAIL_BURST
+)
+
 
-    stored_pwd = passwords.get(user.id)
-    if stored_pwd != data.password:
+async def login(
+    data: AuthLoginRequest, client_ip: Optional[str] = None
+) -> Tuple[User, Organization, dict]:
+    """
+    Password check runs on hashing.kdf_pool, not on the event loop or a
+    request worker. Attempts are rate limited per client IP and per email
+    before any KDF work is spent.
+    """
+    if not login_ip_limiter.allow(client_ip or "-") or not login_email_limiter.allow(
+        normalize_email(data.email)
+    ):
+        raise ValueError("too_many_attempts")
+
+    user = await asyncio.to_thread(find_user_by_email, data.email)
+    stored = await asyncio.to_thread(passwords.get, user.id) if user else None
+    try:
+        # unknown email still costs one KDF run: no timing oracle for enumeration
+        ok = await hashing.kdf_pool.run(
+            hashing.verify_password, data.password, stored or hashing.dummy_hash()
+        )
+    except hashing.KdfBusy:
+        raise ValueError("auth_busy")
+    if not user or stored is None or not ok:
         raise ValueError("invalid_credentials")
 
-    org = orgs[user.orgId]  # type: ignore[arg-type]
-    tokens = _make_demo_tokens(user.id)
+    if hashing.needs_rehash(stored):
+        # legacy plaintext / old scrypt params: upgrade while we know the password
+        try:
+            new_hash = await hashing.kdf_pool.run(hashing.hash_password, data.password)
+        except hashing.KdfBusy:
+            pass  # next login will retry
+        else:
+            await asyncio.to_thread(_set_password, user.id, new_hash)
+
+    # storage read and token signing block: off the event loop as well
+    org, tokens = await asyncio.to_thread(_session_for, user)
     return user, org, tokens
 
 
-def _make_demo_tokens(user_id: str) -> dict:
+def _session_for(user: User) -> Tuple[Organization, dict]:
+    return orgs[user.orgId], issue_tokens(user)  # type: ignore[index]
+
+
+def _set_password(user_id: str, password_hash: str) -> None:
+    passwords[user_id] = password_hash
+    _log({"op": "password", "userId": user_id, "value": password_hash})
+
+
+# === Tokens ===
+#
+# <header>.<payload>.<signature>, base64url, HMAC-SHA256 (JWT "HS256").
+# payload: sub (user id), org, typ ("access" | "refresh"), iat, exp, jti.
+
+Principal = Tuple[User, Optional[Organization]]
+
+_TOKEN_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+# verified access token -> (user, org). The org is there for authorization
+# checks only; handlers read current org data from `orgs`.
+token_cache: LRUCache[Principal] = LRUCache(
+    config.TOKEN_CACHE_SIZE, ttl=config.TOKEN_CACHE_TTL_SECONDS
+)
+_refresh_lock = threading.Lock()
+
+
+def _epoch() -> int:
+    return int(time.time())
+
+
+def _load_secret() -> bytes:
+    if config.AUTH_SECRET:
+        return config.AUTH_SECRET.encode("utf-8")
+    _ensure_data_dir()
+    try:
+        # O_EXCL: несколько воркеров стартуют одновременно - секрет пишет один
+        fd = os.open(SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return SECRET_FILE.read_bytes().strip()
+    secret = secrets.token_urlsafe(48).encode("ascii")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(secret)
+    return secret
+
+
+_secret = _load_secret()
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(signing_input: str) -> str:
+    return _b64encode(hmac.new(_secret, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+
+def _encode_token(claims: dict) -> str:
+    header = _b64encode(json.dumps(_TOKEN_HEADER, separators=(",", ":")).encode("utf-8"))
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    signing_input = f"{header}.{payload}"
+    return f"{signing_input}.{_sign(signing_input)}"
+
+
+def _decode_token(token: str, typ: str) -> Optional[dict]:
+    """Claims of a well-signed, unexpired, unrevoked token of type `typ`."""
+    if not token.isascii():
+        return None  # never issued by us, and _sign could not encode it
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    header, payload, signature = parts
+    if not hmac.compare_digest(_sign(f"{header}.{payload}"), signature):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+    if not isinstance(claims, dict) or claims.get("typ") != typ:
+        return None
+    exp = claims.get("exp")
+    if not isinstance(exp, int) or exp <= _epoch():
+        return None
+    if claims.get("jti") in revoked_tokens:
+        return None
+    return claims
+
+
+def _make_token(user: User, typ: str, ttl: int) -> str:
+    now = _epoch()
+    return _encode_token(
+        {
+            "sub": user.id,
+            "org": user.orgId,
+            "typ": typ,
+            "iat": now,
+            "exp": now + ttl,
+            "jti": uuid4().hex,
+        }
+    )
+
+
+def issue_tokens(user: User) -> dict:
     return {
-        "accessToken": f"demo-access-{user_id}",
-        "refreshToken": f"demo-refresh-{user_id}",
-        "expiresIn": 3600,
+        "accessToken": _make_token(user, "access", config.ACCESS_TOKEN_TTL_SECONDS),
+        "refreshToken": _make_token(user, "refresh", config.REFRESH_TOKEN_TTL_SECONDS),
+        "expiresIn": config.ACCESS_TOKEN_TTL_SECONDS,
     }
 
 
+def _principal(claims: dict) -> Optional[Principal]:
+    user = users.get(str(claims.get("sub")))
+    if not user:
+        return None
+    org = orgs.get(user.orgId) if user.orgId else None
+    return user, org
+
+
+def resolve_access_token(token: str) -> Optional[Principal]:
+    """
+    (user, org) for a valid access token. Verified tokens are cached until
+    they expire (at most TOKEN_CACHE_TTL_SECONDS), so the usual request
+    costs one cache lookup instead of a signature check and storage reads.
+    """
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+    claims = _decode_token(token, "access")
+    if claims is None:
+        return None
+    principal = _principal(claims)
+    if principal is None:
+        return None
+    ttl = min(config.TOKEN_CACHE_TTL_SECONDS, claims["exp"] - _epoch())
+    if ttl > 0:
+        token_cache.put(token, principal, ttl=ttl)
+    return principal
+
+
 def get_user_by_access_token(token: str) -> Optional[User]:
+    principal = resolve_access_token(token)
+    return principal[0] if principal else None
+
+
+def refresh(refresh_token: str) -> Tuple[User, Organization, dict]:
     """
-    MVP: accessToken is either 'demo-access-<user_id>' or user_id.
+    Exchange a refresh token for a new token pair. Refresh tokens rotate:
+    the presented one is revoked, so a replayed token is rejected.
     """
-    if token.startswith("demo-access-"):
-        user_id = token[len("demo-access-") :]
-    else:
-        user_id = token
-    return users.get(user_id)
\ No newline at end of file
+    with _refresh_lock:
+        claims = _decode_token(refresh_token, "refresh")
+        principal = _principal(claims) if claims else None
+        if principal is None or principal[1] is None:
+            raise ValueError("invalid_refresh_token")
+        _revoke(claims)
+    user, org = principal
+    return user, org, issue_tokens(user)
+
+
+def revoke_token(token: str) -> bool:
+    """Revoke an access or refresh token; False if it was not valid."""
+    token_cache.pop(token)
+    for typ in ("access", "refresh"):
+        claims = _decode_token(token, typ)
+        if claims is not None:
+            _revoke(claims)
+            return True
+    return False
+
+
+_PRUNE_EVERY = 256
+_revocations = 0
+
+
+def _revoke(claims: dict) -> None:
+    global _revocations
+    revoked_tokens[claims["jti"]] = claims["exp"]
+    _revocations += 1
+    if _revocations % _PRUNE_EVERY == 0:
+        _prune_revoked()
+
+
+def _prune_revoked() -> None:
+    # an expired token fails the exp check anyway, its jti is no longer needed
+    now = _epoch()
+    for jti, exp in list(revoked_tokens.items()):
+        if exp <= now:
+            revoked_tokens.pop(jti, None)
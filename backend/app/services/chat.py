@@ -1,13 +1,20 @@
 # app/services/chat.py
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 
+from app import config
+from app.background import WorkerPool
+from app.pagination import SortKey, sort_key
 from app.schemas.chat import (
     Chat,
+    ChatUpdateRequest,
     Message,
+    MessageBatchTranslateItem,
     MessageTranslation,
     MessageCreateRequest,
     MessageTranslateRequest,
@@ -15,49 +22,100 @@ from app.schemas.chat import (
 )
 from app.services import rfq_deals as deals_service
 from app.services import auth as auth_service
+from app.services import events
+from app.services import translation as translation_service
+from app.storage.base import Repository, Timeline
+from app.storage.index import Index
+from app.storage.registry import repository, timeline, transaction
 
 
-chats: Dict[str, Chat] = {}                  # chatId -> Chat
-messages_by_chat: Dict[str, List[Message]] = {}  # chatId -> [Message]
+chats: Repository[Chat] = repository("chats", Chat)                      # chatId -> Chat
+messages_by_chat: Timeline[Message] = timeline("messages_by_chat", Message)  # chatId -> messages
+
+
+# dealId -> chatId and userId -> chatIds. The user index is the set view
+# of Chat.participants (the stored/API shape stays a list) and is what
+# membership checks go through.
+chats_by_deal = chats.add_index(Index(lambda c: [c.dealId]))
+chats_by_user = chats.add_index(Index(lambda c: c.participants))
+_chat_write_lock = threading.Lock()  # chat creation and participant updates
+
+# writers of one chat are serialized (the lock within a worker,
+# transaction() across workers): a new message reads the last one to keep
+# createdAt increasing, a translation is a read-modify-write of its message
+_message_locks = [threading.Lock() for _ in range(64)]
+
+
+def _message_lock(chat_id: str) -> threading.Lock:
+    return _message_locks[hash(chat_id) % len(_message_locks)]
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def chat_topic(chat_id: str) -> str:
+    return f"chat:{chat_id}"
+
+
+def publish_chat_event(chat_id: str, type_: str, data: dict) -> None:
+    """Fan out an event (message, translation, typing, read) to chat subscribers."""
+    events.bus.publish(chat_topic(chat_id), type_, data)
+
+
+def _chat_for_deal(deal_id: str) -> Optional[Chat]:
+    chat_id = chats_by_deal.first(deal_id)
+    return chats.get(chat_id) if chat_id else None
+
+
+def _add_participant(chat: Chat, user_id: str) -> Chat:
+    if chats_by_user.contains(user_id, chat.id):
+        return chat
+    with _chat_write_lock, transaction():
+        # re-read: with a persistent backend `chat` may be a stale copy
+        chat = chats.get(chat.id) or chat
+        if user_id not in chat.participants:
+            chat.participants.append(user_id)
+            chats[chat.id] = chat
+    return chat
+
+
 def _get_or_create_chat_for_deal(deal_id: str, user_id: str) -> Chat:
-    # Try find existing chat for deal
-    for ch in chats.values():
-        if ch.dealId == deal_id:
-            # ensure user is in participants
-            if user_id not in ch.participants:
-                ch.participants.append(user_id)
-            return ch
+    chat = _chat_for_deal(deal_id)
+    if chat:
+        return _add_participant(chat, user_id)
 
     # Ensure deal exists
     if deal_id not in deals_service.deals:
         raise ValueError("deal_not_found")
 
-    chat_id = str(uuid4())
-    chat = Chat(
-        id=chat_id,
-        dealId=deal_id,
-        participants=[user_id],
-        createdAt=_now(),
-    )
-    chats[chat_id] = chat
-    messages_by_chat[chat_id] = []
-    return chat
+    # one chat per deal even when both parties open it at the same time
+    with _chat_write_lock, transaction():
+        existing = _chat_for_deal(deal_id)
+        if existing is None:
+            chat_id = str(uuid4())
+            chat = Chat(
+                id=chat_id,
+                dealId=deal_id,
+                participants=[user_id],
+                createdAt=_now(),
+            )
+            chats[chat_id] = chat
+            return chat
+    return _add_participant(existing, user_id)
 
 
 def list_chats_for_user(user_id: str, deal_id: Optional[str] = None) -> List[Chat]:
+    if deal_id:
+        chat_id = chats_by_deal.first(deal_id)
+        ids = [chat_id] if chat_id and chats_by_user.contains(user_id, chat_id) else []
+    else:
+        ids = chats_by_user.ids(user_id)
     result: List[Chat] = []
-    for ch in chats.values():
-        if user_id not in ch.participants:
-            continue
-        if deal_id and ch.dealId != deal_id:
-            continue
-        result.append(ch)
+    for chat_id in ids:
+        ch = chats.get(chat_id)
+        if ch is not None:
+            result.append(ch)
     return result
 
 
@@ -65,10 +123,70 @@ def get_chat(chat_id: str) -> Optional[Chat]:
     return chats.get(chat_id)
 
 
-def list_messages(chat_id: str) -> Optional[List[Message]]:
-    if chat_id not in messages_by_chat:
+def is_participant(chat_id: str, user_id: str) -> bool:
+    return chats_by_user.contains(user_id, chat_id)
+
+
+def update_chat(chat_id: str, payload: ChatUpdateRequest) -> Chat:
+    with _chat_write_lock, transaction():
+        chat = chats.get(chat_id)
+        if not chat:
+            raise ValueError("chat_not_found")
+        if payload.autoTranslate is not None:
+            chat.autoTranslate = payload.autoTranslate
+        chats[chat_id] = chat
+    return chat
+
+
+def _message_key(chat_id: str, msg_id: str) -> SortKey:
+    msg = messages_by_chat.get(chat_id, msg_id)
+    if msg is None:
+        raise ValueError("message_not_found")
+    return sort_key(msg)
+
+
+def list_messages_window(
+    chat_id: str,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[SortKey] = None,
+) -> Optional[List[Message]]:
+    """
+    Slice of the chat history, oldest first, at most `limit` messages:
+      after=<messageId>  - messages posted after that message
+      since=<datetime>   - messages with createdAt strictly newer than `since`
+      before=<messageId> - messages older than that message; with `limit`
+                           the newest `limit` of them (backward paging)
+      cursor=<sort key>  - page cursor: messages after the (createdAt, id)
+                           it names, even if that message is gone
+    Messages are stored in (createdAt, id) order, so every bound is a key
+    and the slice is one range scan; the rest of the history is not read.
+    """
+    if chat_id not in chats:
         return None
-    return messages_by_chat[chat_id]
+
+    bounds: List[SortKey] = []
+    if after is not None:
+        bounds.append(_message_key(chat_id, after))
+    if since is not None:
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # ids are never empty, so this key sorts after every message of
+        # `since` itself and before those of the next microsecond
+        bounds.append((since + timedelta(microseconds=1), ""))
+    if cursor is not None:
+        bounds.append(cursor)
+    lower = max(bounds) if bounds else None
+
+    if before is not None:
+        upper = _message_key(chat_id, before)
+        if limit is not None:
+            newest = list(messages_by_chat.scan(chat_id, lower, upper, reverse=True, limit=limit))
+            return newest[::-1]
+        return list(messages_by_chat.scan(chat_id, lower, upper))
+    return list(messages_by_chat.scan(chat_id, lower, limit=limit))
 
 
 def create_message(
@@ -80,61 +198,204 @@ def create_message(
     if not chat:
         raise ValueError("chat_not_found")
 
-    if sender_id not in chat.participants:
-        chat.participants.append(sender_id)
+    _add_participant(chat, sender_id)
 
     msg_id = str(uuid4())
     original_lang = payload.lang or "ru"
+    with _message_lock(chat_id), transaction():
+        # createdAt strictly increases within a chat, even if the wall clock
+        # steps back or stands still, so (createdAt, id) order is send order
+        created_at = _now()
+        last = messages_by_chat.last(chat_id)
+        if last is not None and last.createdAt >= created_at:
+            created_at = last.createdAt + timedelta(microseconds=1)
+
+        msg = Message(
+            id=msg_id,
+            chatId=chat_id,
+            senderId=sender_id,
+            text=payload.text,
+            originalLang=original_lang,
+            translations=None,
+            createdAt=created_at,
+            editedAt=None,
+        )
+        messages_by_chat.put(chat_id, msg)
+    publish_chat_event(chat_id, "message", msg.model_dump(mode="json"))
+    if chat.autoTranslate:
+        # translations follow as "translation" events on the chat channel
+        auto_translate_pool.submit((chat_id, msg.id))
+    return msg
+
+
+def _set_translation(msg: Message, tr: MessageTranslation) -> None:
+    """One translation per language: a repeat replaces the previous one."""
+    lang = tr.lang.lower()
+    others = [t for t in (msg.translations or []) if t.lang.lower() != lang]
+    msg.translations = others + [tr]
+
 
-    msg = Message(
-        id=msg_id,
-        chatId=chat_id,
-        senderId=sender_id,
-        text=payload.text,
-        originalLang=original_lang,
-        translations=None,
-        createdAt=_now(),
-        editedAt=None,
-    )
-    messages_by_chat.setdefault(chat_id, []).append(msg)
+def _find_translation(msg: Message, lang: str) -> Optional[MessageTranslation]:
+    lang = lang.lower()
+    return next((t for t in (msg.translations or []) if t.lang.lower() == lang), None)
+
+
+def _store_translations(
+    chat_id: str, translated: List[Tuple[str, MessageTranslation]]
+) -> None:
+    """Write (messageId, translation) pairs back in one batch and announce them."""
+    with _message_lock(chat_id), transaction():
+        found = messages_by_chat.get_many((chat_id, msg_id) for msg_id, _ in translated)
+        msgs: Dict[str, Message] = {}
+        for msg_id, tr in translated:
+            msg = msgs.get(msg_id) or found.get((chat_id, msg_id))
+            if msg is None:
+                continue  # chat or message removed while translating
+            _set_translation(msg, tr)
+            msgs[msg_id] = msg
+        messages_by_chat.put_many((chat_id, msg) for msg in msgs.values())
+    for msg_id, tr in translated:
+        publish_chat_event(
+            chat_id,
+            "translation",
+            {"messageId": msg_id, **tr.model_dump(mode="json")},
+        )
+
+
+async def _translate(requests: List[translation_service.TranslationRequest]) -> List[MessageTranslation]:
+    try:
+        return await translation_service.translate_many(requests)
+    except translation_service.TranslationTimeout:
+        raise ValueError("translation_timeout")
+
+
+def _get_message(chat_id: str, msg_id: str) -> Message:
+    if chat_id not in chats:
+        raise ValueError("chat_not_found")
+    msg = messages_by_chat.get(chat_id, msg_id)
+    if msg is None:
+        raise ValueError("message_not_found")
     return msg
 
 
-def translate_message(
+def _select_for_translation(
+    chat_id: str, target: str, message_ids: Optional[List[str]]
+) -> List[Message]:
+    if chat_id not in chats:
+        raise ValueError("chat_not_found")
+    if message_ids is not None:
+        wanted = list(dict.fromkeys(message_ids))
+        found = messages_by_chat.get_many((chat_id, mid) for mid in wanted)
+        if len(found) < len(wanted):
+            raise ValueError("message_not_found")
+        return [found[(chat_id, mid)] for mid in wanted]
+
+    # implicit batch: the newest TRANSLATION_BATCH_LIMIT untranslated
+    # messages (what a freshly opened chat shows), oldest first; the scan
+    # stops as soon as the batch is full
+    selected: List[Message] = []
+    for m in messages_by_chat.scan(chat_id, reverse=True):
+        if len(selected) >= config.TRANSLATION_BATCH_LIMIT:
+            break
+        if m.originalLang.lower() != target.lower() and _find_translation(m, target) is None:
+            selected.append(m)
+    selected.reverse()
+    return selected
+
+
+async def translate_message(
     chat_id: str,
     msg_id: str,
     payload: MessageTranslateRequest,
 ) -> MessageTranslateResponse:
-    msgs = messages_by_chat.get(chat_id)
-    if not msgs:
-        raise ValueError("chat_not_found")
+    # storage reads block, keep them off the event loop
+    msg = await asyncio.to_thread(_get_message, chat_id, msg_id)
+    target = payload.targetLang
+    [tr] = await _translate([(msg.text, msg.originalLang, target)])
+    # storage write may wait on the chat lock, keep it off the event loop
+    await asyncio.to_thread(_store_translations, chat_id, [(msg.id, tr)])
+    return MessageTranslateResponse(text=tr.text, targetLang=target)
 
-    msg = next((m for m in msgs if m.id == msg_id), None)
-    if not msg:
-        raise ValueError("message_not_found")
 
-    # MVP auto-translation simulation
-    target = payload.targetLang
-    prefix = "[auto]"
+async def translate_messages(
+    chat_id: str,
+    target: str,
+    message_ids: Optional[List[str]] = None,
+) -> List[MessageBatchTranslateItem]:
+    """
+    Translate several messages in one call. Without `message_ids`, the
+    newest TRANSLATION_BATCH_LIMIT messages that are not in `target` and
+    have no translation into it yet. Messages already translated are
+    returned as they are.
+    """
+    selected = await asyncio.to_thread(_select_for_translation, chat_id, target, message_ids)
+
+    done: Dict[str, MessageTranslation] = {}
+    pending: List[Message] = []
+    for m in selected:
+        existing = _find_translation(m, target)
+        if existing is not None:
+            done[m.id] = existing
+        else:
+            pending.append(m)
+
+    if pending:
+        translated = await _translate([(m.text, m.originalLang, target) for m in pending])
+        new = [(m.id, tr) for m, tr in zip(pending, translated)]
+        await asyncio.to_thread(_store_translations, chat_id, new)
+        done.update(new)
+
+    return [
+        MessageBatchTranslateItem(messageId=m.id, text=done[m.id].text, targetLang=target)
+        for m in selected
+    ]
 
-    # Optional: more specific prefixes for RU/CN
-    if target.lower().startswith("zh"):
-        prefix = "[CN auto]"
-    elif target.lower().startswith("ru"):
-        prefix = "[RU auto]"
 
-    translated_text = f"{prefix} {msg.text}"
+# === Auto-translation ===
 
-    tr = MessageTranslation(
-        lang=target,
-        text=translated_text,
-        autoTranslated=True,
-        qualityScore=0.9,
-    )
+# default chat language by org country (ISO code)
+COUNTRY_LANGS = {"RU": "ru", "CN": "zh-CN"}
+DEFAULT_LANG = "en"
 
-    # store in message.translations
-    if msg.translations is None:
-        msg.translations = []
-    msg.translations.append(tr)
 
-    return MessageTranslateResponse(text=translated_text, targetLang=target)
\ No newline at end of file
+def preferred_lang(user_id: str) -> str:
+    user = auth_service.users.get(user_id)
+    if user and user.preferredLang:
+        return user.preferredLang
+    org = auth_service.orgs.get(user.orgId) if user and user.orgId else None
+    if org:
+        return COUNTRY_LANGS.get(org.country.upper(), DEFAULT_LANG)
+    return DEFAULT_LANG
+
+
+def _auto_translate_targets(chat_id: str, msg_id: str) -> Optional[Tuple[Message, Dict[str, str]]]:
+    """The message and the participants' languages it still lacks, if any."""
+    chat = chats.get(chat_id)
+    msg = messages_by_chat.get(chat_id, msg_id) if chat else None
+    if msg is None:
+        return None
+
+    targets: Dict[str, str] = {}
+    for user_id in chat.participants:
+        lang = preferred_lang(user_id)
+        if lang.lower() != msg.originalLang.lower() and _find_translation(msg, lang) is None:
+            targets.setdefault(lang.lower(), lang)
+    return (msg, targets) if targets else None
+
+
+async def _auto_translate(job: Tuple[str, str]) -> None:
+    """Translate one new message into the language of every participant."""
+    chat_id, msg_id = job
+    # storage reads block, keep them off the pool's event loop
+    found = await asyncio.to_thread(_auto_translate_targets, chat_id, msg_id)
+    if found is None:
+        return
+    msg, targets = found
+
+    translated = await _translate([(msg.text, msg.originalLang, lang) for lang in targets.values()])
+    await asyncio.to_thread(_store_translations, chat_id, [(msg.id, tr) for tr in translated])
+
+
+auto_translate_pool = WorkerPool(
+    "chat-auto-translate", _auto_translate, workers=config.AUTO_TRANSLATE_WORKERS
+)
@@ -0,0 +1,179 @@
+# app/services/discovery.py
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set
+
+from app import config
+from app.cache import LRUCache
+from app.pagination import SortKey, encode_cursor
+from app.schemas.discovery import (
+    DiscoveryFacets,
+    DiscoveryHit,
+    DiscoverySearchResponse,
+    DiscoverySupplier,
+    FacetCount,
+)
+from app.services import auth as auth_service
+from app.services import orgs as orgs_service
+from app.services import products as products_service
+from app.search import tokenize
+
+PRODUCT_FACETS = ("currency", "unit", "hsChapter", "priceRange")
+ORG_FACETS = ("country", "kybStatus")
+
+
+@dataclass(frozen=True)
+class DiscoveryFilters:
+    # None = no filter; otherwise any of the values
+    country: Optional[Sequence[str]] = None
+    kybStatus: Optional[Sequence[str]] = None
+    currency: Optional[Sequence[str]] = None
+    unit: Optional[Sequence[str]] = None
+    hsChapter: Optional[Sequence[str]] = None
+    priceRange: Optional[Sequence[str]] = None
+
+
+@dataclass
+class _Matches:
+    matched: Set[str]
+    ranked: Optional[List[str]]  # relevance order when searching by text
+    scores: Dict[str, float]
+    facets: DiscoveryFacets
+
+
+# (query, filters, index versions) -> _Matches. Any product or org write
+# bumps a version, so entries never go stale; paging through one query and
+# re-opening the Discovery page hit the cache.
+_matches_cache: LRUCache[_Matches] = LRUCache(config.DISCOVERY_CACHE_SIZE)
+
+
+def _supplier_orgs(filters: DiscoveryFilters) -> Set[str]:
+    return auth_service.org_directory.select(
+        {"role": orgs_service.SUPPLIER_ROLES, "country": filters.country, "kybStatus": filters.kybStatus}
+    )
+
+
+def _facet_counts(matched: Set[str]) -> DiscoveryFacets:
+    facets = products_service.product_facets
+    counts: Dict[str, Dict[str, int]] = {f: facets.count(f, matched) for f in PRODUCT_FACETS}
+
+    # org-level facets: products per org, folded by the org's country / status
+    per_org = facets.count("orgId", matched)
+    for facet in ORG_FACETS:
+        counts[facet] = Counter()
+    for org_id, n in per_org.items():
+        values = auth_service.org_directory.values(org_id)
+        for facet in ORG_FACETS:
+            if facet in values:
+                counts[facet][values[facet]] += n
+
+    def _sorted(c: Dict[str, int]) -> List[FacetCount]:
+        return [
+            FacetCount(value=str(v), count=n)
+            for v, n in sorted(c.items(), key=lambda pair: (-pair[1], str(pair[0])))
+        ]
+
+    return DiscoveryFacets(**{f: _sorted(c) for f, c in counts.items()})
+
+
+def _find(query: Optional[str], filters: DiscoveryFilters) -> _Matches:
+    facets = products_service.product_facets
+    key = (
+        query,
+        tuple(tuple(sorted(v)) if v is not None else None for v in vars(filters).values()),
+        facets.version,
+        auth_service.org_directory.version,
+    )
+    cached = _matches_cache.get(key)
+    if cached is not None:
+        return cached
+
+    orgs = _supplier_orgs(filters)
+    product_filters = {
+        "orgId": orgs,
+        "currency": filters.currency,
+        "unit": filters.unit,
+        "hsChapter": filters.hsChapter,
+        "priceRange": filters.priceRange,
+    }
+    matched = facets.select(product_filters) if orgs else set()
+
+    ranked: Optional[List[str]] = None
+    scores: Dict[str, float] = {}
+    if query is not None:
+        hits = products_service.search_index.search(query, scopes=orgs) if matched else []
+        ranked = [product_id for product_id, _ in hits if product_id in matched]
+        scores = {product_id: score for product_id, score in hits if product_id in matched}
+        matched = set(ranked)
+
+    matches = _Matches(matched, ranked, scores, _facet_counts(matched))
+    _matches_cache.put(key, matches)
+    return matches
+
+
+def search(
+    query: Optional[str],
+    filters: DiscoveryFilters,
+    limit: int,
+    cursor: Optional[SortKey] = None,
+    score: Optional[float] = None,
+) -> DiscoverySearchResponse:
+    """
+    Products of every supplier org matching `filters` (and `query`, ranked
+    by relevance), with facet counts over the whole match set.
+
+    Everything up to the page is answered from the indexes: the org
+    directory and product facet posting sets give the candidate set, the
+    text index ranks it, facet counts are set intersections. The result is
+    cached until the next product/org write; only the products on the
+    returned page are loaded. A ranked page starts after the cursor item's
+    current (score, id), or after the `score` the cursor carries if that
+    item no longer matches; it is found by bisection in the ranked list.
+    """
+    matches = _find(query if query and tokenize(query) else None, filters)
+    facets = products_service.product_facets
+
+    if matches.ranked is not None:
+        ordered = matches.ranked
+        start = 0
+        if cursor is not None:
+            fallback = score if score is not None else float("-inf")
+            bound = (-matches.scores.get(cursor[1], fallback), cursor[1])
+            start = bisect_right(ordered, bound, key=lambda pid: (-matches.scores[pid], pid))
+        page_ids = ordered[start : start + limit]
+        has_more = start + limit < len(ordered)
+    else:
+        page_ids = facets.sorted_ids(matches.matched, after=cursor, limit=limit + 1)
+        has_more = len(page_ids) > limit
+        page_ids = page_ids[:limit]
+
+    items: List[DiscoveryHit] = []
+    for product_id in page_ids:
+        product = products_service.get_product(product_id)
+        org = auth_service.orgs.get(product.orgId) if product else None
+        if not product or not org:
+            continue
+        items.append(
+            DiscoveryHit(
+                product=product,
+                supplier=DiscoverySupplier(
+                    id=org.id, name=org.name, country=org.country, kybStatus=org.kybStatus
+                ),
+                score=matches.scores.get(product_id),
+            )
+        )
+
+    next_cursor = None
+    if has_more and page_ids:
+        last = page_ids[-1]
+        next_cursor = encode_cursor(facets.sort_key(last), matches.scores.get(last))
+
+    return DiscoverySearchResponse(
+        items=items,
+        total=len(matches.matched),
+        facets=matches.facets,
+        nextCursor=next_cursor,
+    )
@@ -2,13 +2,15 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import List, Optional
 from uuid import uuid4
 
 from app.schemas.files_docs import Document, DealDocumentCreateRequest
 from app.services import rfq_deals as deals_service
+from app.storage.base import Repository
+from app.storage.registry import repository
 
-documents: Dict[str, Document] = {}  # documentId -> Document
+documents: Repository[Document] = repository("documents", Document)  # documentId -> Document
 
 
 def _now() -> datetime:
@@ -0,0 +1,181 @@
+# app/services/events.py
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+from app import config
+
+
+@dataclass
+class Event:
+    id: int          # sequence number inside the topic, used as SSE id / Last-Event-ID
+    type: str
+    data: Dict[str, Any]
+
+
+class Subscription:
+    """
+    One connected client. Events are delivered into a bounded asyncio queue
+    on the subscriber's own event loop; a client that falls behind by more
+    than `maxsize` live events is dropped (it can reconnect with
+    Last-Event-ID). Events replayed from history on resume sit in `backlog`
+    and are returned first, so a long resume never counts against the queue.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        loop: asyncio.AbstractEventLoop,
+        maxsize: int,
+        backlog: Iterable[Event] = (),
+    ) -> None:
+        self.topic = topic
+        self.loop = loop
+        self.backlog: Deque[Event] = deque(backlog)
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+        self.overflowed = False
+
+    def _deliver(self, event: Event) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.closed = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event, or None on timeout / when the subscription was dropped."""
+        if self.backlog:
+            return self.backlog.popleft()
+        if not self.queue.empty():
+            # fast path: no wait_for (it allocates a task and a timer per call)
+            return self.queue.get_nowait()
+        if self.closed:
+            return None
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+@dataclass
+class _Topic:
+    seq: int = 0
+    history: Deque[Event] = field(default_factory=deque)
+    subscribers: Set[Subscription] = field(default_factory=set)
+
+
+class EventBus:
+    """
+    In-process pub/sub. `publish()` may be called from any thread (sync
+    handlers run in the threadpool); subscribers are asyncio consumers.
+    Each topic keeps the last `history_size` events for resuming.
+    """
+
+    def __init__(self, history_size: int = 500, queue_size: int = 256) -> None:
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self._topics: Dict[str, _Topic] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, type_: str, data: Dict[str, Any]) -> Event:
+        with self._lock:
+            t = self._topics.setdefault(topic, _Topic())
+            t.seq += 1
+            event = Event(id=t.seq, type=type_, data=data)
+            t.history.append(event)
+            if len(t.history) > self.history_size:
+                t.history.popleft()
+            subscribers = list(t.subscribers)
+        # one loop callback per event loop rather than per subscriber: a chat
+        # with 1k open sockets would otherwise wake the loop 1k times per message
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for sub in subscribers:
+            by_loop.setdefault(sub.loop, []).append(sub)
+        for loop, subs in by_loop.items():
+            self._schedule(loop, subs, event)
+        return event
+
+    def subscribe(self, topic: str, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Subscribe from inside a running event loop. Events newer than
+        `last_event_id` still in history are returned first; if the gap
+        cannot be filled a single "resync" event tells the client to refetch.
+        The replay is taken under the same lock that attaches the
+        subscriber, so no event is missed or repeated in between.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            t = self._topics.setdefault(topic, _Topic())
+            backlog: List[Event] = []
+            if last_event_id is not None:
+                oldest = t.history[0].id if t.history else t.seq + 1
+                if last_event_id > t.seq or last_event_id < oldest - 1:
+                    backlog.append(Event(id=t.seq, type="resync", data={}))
+                else:
+                    backlog.extend(e for e in t.history if e.id > last_event_id)
+            sub = Subscription(topic, loop, self.queue_size, backlog)
+            t.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.closed = True
+        with self._lock:
+            t = self._topics.get(sub.topic)
+            if t is not None:
+                t.subscribers.discard(sub)
+
+    def subscriber_count(self, topic: str) -> int:
+        with self._lock:
+            t = self._topics.get(topic)
+            return len(t.subscribers) if t else 0
+
+    def history(self, topic: str) -> List[Event]:
+        with self._lock:
+            t = self._topics.get(topic)
+            return list(t.history) if t else []
+
+    def clear(self) -> None:
+        with self._lock:
+            subscribers = [s for t in self._topics.values() for s in t.subscribers]
+            self._topics.clear()
+        for sub in subscribers:
+            sub.closed = True
+
+    def _schedule(
+        self, loop: asyncio.AbstractEventLoop, subs: List[Subscription], event: Event
+    ) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            _deliver_all(subs, event)
+            return
+        try:
+            loop.call_soon_threadsafe(_deliver_all, subs, event)
+        except RuntimeError:
+            # subscribers' loop is gone (clients disconnected mid-publish)
+            for sub in subs:
+                self.unsubscribe(sub)
+
+
+def _deliver_all(subs: List[Subscription], event: Event) -> None:
+    for sub in subs:
+        sub._deliver(event)
+
+
+bus = EventBus(
+    history_size=config.EVENTS_HISTORY_SIZE,
+    queue_size=config.EVENTS_QUEUE_SIZE,
+)
+
+
+def user_topic(user_id: str) -> str:
+    return f"user:{user_id}"
@@ -2,14 +2,15 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Dict
 from uuid import uuid4
 
 from fastapi import UploadFile
 
 from app.schemas.files_docs import File
+from app.storage.base import Repository
+from app.storage.registry import repository
 
-files: Dict[str, File] = {}
+files: Repository[File] = repository("files", File)
 
 
 def _now() -> datetime:
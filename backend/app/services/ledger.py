@@ -0,0 +1,150 @@
+# app/services/ledger.py
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterator, List, NamedTuple, Sequence
+from uuid import uuid4
+
+from app.schemas.wallet_fx_payments import LedgerAccount, LedgerEntry
+from app.storage.base import Repository
+from app.storage.index import Index
+from app.storage.registry import repository
+
+# RUB / CNY / USD - all have 2 decimal places
+MINOR_UNITS = 100
+
+entries: Repository[LedgerEntry] = repository("ledger_entries", LedgerEntry)
+# "<walletId>/<account>" -> balance in minor units
+balances: Repository[int] = repository("ledger_balances", int)
+
+entries_by_wallet = entries.add_index(Index(lambda e: [e.walletId]))
+
+# one lock per wallet; always taken in sorted order to avoid deadlocks
+_wallet_locks: Dict[str, threading.Lock] = {}
+_wallet_locks_guard = threading.Lock()
+
+
+class Posting(NamedTuple):
+    wallet_id: str
+    account: LedgerAccount
+    amount_minor: int
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def to_minor(amount: float) -> int:
+    return int(
+        (Decimal(str(amount)) * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+    )
+
+
+def from_minor(amount_minor: int) -> float:
+    return amount_minor / MINOR_UNITS
+
+
+def system_wallet_id(currency: str) -> str:
+    return f"system:{currency}"
+
+
+def _balance_key(wallet_id: str, account: LedgerAccount) -> str:
+    return f"{wallet_id}/{LedgerAccount(account).value}"
+
+
+def balance(wallet_id: str, account: LedgerAccount) -> int:
+    return balances.get(_balance_key(wallet_id, account)) or 0
+
+
+def _lock_for(wallet_id: str) -> threading.Lock:
+    lock = _wallet_locks.get(wallet_id)
+    if lock is None:
+        with _wallet_locks_guard:
+            lock = _wallet_locks.setdefault(wallet_id, threading.Lock())
+    return lock
+
+
+@contextmanager
+def lock_wallets(*wallet_ids: str) -> Iterator[None]:
+    """
+    Hold the locks of all given wallets. Checks that must be atomic with a
+    posting (e.g. "payment is still pending") go inside this block.
+    """
+    locks = [_lock_for(w) for w in sorted(set(wallet_ids))]
+    for lock in locks:
+        lock.acquire()
+    try:
+        yield
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+
+def post_locked(
+    tx_id: str,
+    postings: Sequence[Posting],
+    insufficient_error: str = "insufficient_funds",
+) -> List[LedgerEntry]:
+    """
+    Apply a balanced set of postings. Caller must hold `lock_wallets()` for
+    every wallet involved (system wallets included).
+
+    Raises ValueError("unbalanced_transaction") if postings do not sum to
+    zero, or ValueError(insufficient_error) if a wallet account would go
+    negative. Nothing is written in either case.
+    """
+    if sum(p.amount_minor for p in postings) != 0:
+        raise ValueError("unbalanced_transaction")
+
+    new_balances: Dict[str, int] = {}
+    for p in postings:
+        key = _balance_key(p.wallet_id, p.account)
+        current = new_balances.get(key)
+        if current is None:
+            current = balances.get(key) or 0
+        new_balances[key] = current + p.amount_minor
+
+    for p in postings:
+        if p.account == LedgerAccount.funding:
+            continue
+        if new_balances[_balance_key(p.wallet_id, p.account)] < 0:
+            raise ValueError(insufficient_error)
+
+    now = _now()
+    written: List[LedgerEntry] = []
+    for p in postings:
+        entry = LedgerEntry(
+            id=str(uuid4()),
+            txId=tx_id,
+            walletId=p.wallet_id,
+            account=p.account,
+            amountMinor=p.amount_minor,
+            createdAt=now,
+        )
+        entries[entry.id] = entry
+        written.append(entry)
+    for key, value in new_balances.items():
+        balances[key] = value
+    return written
+
+
+def transfer(
+    tx_id: str,
+    postings: Sequence[Posting],
+    insufficient_error: str = "insufficient_funds",
+) -> List[LedgerEntry]:
+    """Lock the involved wallets and apply postings."""
+    with lock_wallets(*(p.wallet_id for p in postings)):
+        return post_locked(tx_id, postings, insufficient_error)
+
+
+def list_entries_for_wallet(wallet_id: str) -> List[LedgerEntry]:
+    result: List[LedgerEntry] = []
+    for entry_id in entries_by_wallet.ids(wallet_id):
+        e = entries.get(entry_id)
+        if e:
+            result.append(e)
+    return result
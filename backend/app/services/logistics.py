@@ -6,6 +6,7 @@ from typing import Optional
 
 from app.schemas.rfq_deals import DealLogisticsState
 from app.services import rfq_deals as deals_service
+from app.storage.registry import transaction
 
 
 def _now() -> datetime:
@@ -16,26 +17,31 @@ def get_logistics_for_deal(deal_id: str) -> Optional[DealLogisticsState]:
     deal = deals_service.deals.get(deal_id)
     if not deal:
         return None
+    if deal.logistics is not None:
+        return deal.logistics
     # if not initialized (old data), create basic state
-    if deal.logistics is None:
-        deal.logistics = DealLogisticsState(
-            current="Production",
-            delivered=False,
-            deliveredAt=None,
-        )
-        deals_service.deals[deal.id] = deal
+    with deals_service.deal_lock(deal_id), transaction():
+        deal = deals_service.deals.get(deal_id)
+        if deal.logistics is None:
+            deal.logistics = DealLogisticsState(
+                current="Production",
+                delivered=False,
+                deliveredAt=None,
+            )
+            deals_service.deals[deal.id] = deal
     return deal.logistics
 
 
 def simulate_delivery(deal_id: str) -> Optional[DealLogisticsState]:
-    deal = deals_service.deals.get(deal_id)
-    if not deal:
-        return None
-    state = DealLogisticsState(
-        current="Delivered to warehouse",
-        delivered=True,
-        deliveredAt=_now(),
-    )
-    deal.logistics = state
-    deals_service.deals[deal.id] = deal
+    with deals_service.deal_lock(deal_id), transaction():
+        deal = deals_service.deals.get(deal_id)
+        if not deal:
+            return None
+        state = DealLogisticsState(
+            current="Delivered to warehouse",
+            delivered=True,
+            deliveredAt=_now(),
+        )
+        deal.logistics = state
+        deals_service.deals[deal.id] = deal
     return state
\ No newline at end of file
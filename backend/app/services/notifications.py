@@ -1,34 +1,65 @@
 # app/services/notifications.py
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+import gzip
+import heapq
+import json
+import os
+import re
+import threading
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
 from uuid import uuid4
 
+from app import config, filelock
+from app.background import PeriodicTask
+from app.pagination import SortKey, sort_key
 from app.schemas.notifications import (
     Notification,
+    NotificationPreferences,
     NotificationType,
     NotificationEntityType,
 )
 from app.services import auth as auth_service
+from app.services import events
+from app.storage.base import Repository, Timeline
+from app.storage.registry import repository, timeline, transaction
 
 
-notifications_by_user: Dict[str, List[Notification]] = {}
+# userId -> notifications, one row each in (createdAt, id) order
+notifications_by_user: Timeline[Notification] = timeline("notifications_by_user", Notification)
+# userId -> number of unread notifications, maintained on every write so
+# the bell badge never looks at the list
+unread_by_user: Repository[int] = repository("notifications_unread", int)
+# userId -> delivery preferences (absent = defaults: everything)
+preferences: Repository[NotificationPreferences] = repository(
+    "notification_preferences", NotificationPreferences
+)
+# a user's notifications and counter are read-modify-write, writers are serialized:
+# by the lock within a worker, by transaction() across workers
+_user_locks = [threading.Lock() for _ in range(64)]
+
+
+def _user_lock(user_id: str) -> threading.Lock:
+    return _user_locks[hash(user_id) % len(_user_locks)]
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _push_to_user(
-    user_id: str,
+def _new_notification(
     type_: NotificationType,
     entity_type: NotificationEntityType,
     entity_id: str,
     text: str,
     data: Optional[dict] = None,
 ) -> Notification:
-    notif = Notification(
+    return Notification(
         id=str(uuid4()),
         type=type_,
         entityType=entity_type,
@@ -39,10 +70,164 @@ def _push_to_user(
         createdAt=_now(),
         readAt=None,
     )
-    notifications_by_user.setdefault(user_id, []).append(notif)
+
+
+def _append(user_id: str, notif: Notification) -> None:
+    # caller holds _user_lock(user_id) and a transaction()
+    unread = _unread(user_id)
+    notifications_by_user.put(user_id, notif)
+    unread_by_user[user_id] = unread + 1
+
+
+def _publish(user_id: str, notif: Notification) -> None:
+    events.bus.publish(events.user_topic(user_id), "notification", notif.model_dump(mode="json"))
+
+
+def _push_to_user(
+    user_id: str,
+    type_: NotificationType,
+    entity_type: NotificationEntityType,
+    entity_id: str,
+    text: str,
+    data: Optional[dict] = None,
+) -> Notification:
+    notif = _new_notification(type_, entity_type, entity_id, text, data)
+    with _user_lock(user_id), transaction():
+        _append(user_id, notif)
+    _publish(user_id, notif)
     return notif
 
 
+# === Digests ===
+
+
+@dataclass
+class _OpenDigest:
+    notif_id: str
+    closes_at: datetime
+    pending: bool   # merged/buffered events not delivered to the client yet
+
+
+# (userId, type, entityType) -> digest collecting events until closes_at.
+# Process-local: after a restart the next event simply opens a new digest.
+_open_digests: Dict[Tuple[str, NotificationType, NotificationEntityType], _OpenDigest] = {}
+_digests_lock = threading.Lock()   # taken inside _user_lock, never the other way
+
+
+def _digest_notif_id(
+    user_id: str, type_: NotificationType, entity_type: NotificationEntityType, now: datetime
+) -> Optional[str]:
+    """Id of the user's digest of this type if it is still open at `now`."""
+    with _digests_lock:
+        digest = _open_digests.get((user_id, type_, entity_type))
+    return digest.notif_id if digest is not None and digest.closes_at > now else None
+
+
+def _add_or_merge(
+    user_id: str,
+    prefs: NotificationPreferences,
+    current: Optional[Notification],
+    type_: NotificationType,
+    entity_type: NotificationEntityType,
+    entity_id: str,
+    text: str,
+    data: Optional[dict],
+    now: datetime,
+) -> Tuple[Notification, bool, bool]:
+    """
+    Merge bursts: while a digest of this type is open and unread, a new
+    event updates it (count, entityIds, latest entityId/text/data) instead
+    of adding a notification. The first event of a window is delivered at
+    once; merged ones are delivered as one update when the window closes.
+    In periodic digest mode nothing is delivered before the interval ends.
+
+    `current` is the stored notification of the open digest (see
+    _digest_notif_id), if any; it is updated in place. The caller holds
+    _user_lock(user_id) and a transaction() and writes the returned
+    notification. Returns (notification, whether it was added, whether to
+    publish it now).
+    """
+    digest_mode = prefs.digestIntervalMinutes is not None
+    window = (
+        prefs.digestIntervalMinutes * 60
+        if digest_mode
+        else config.NOTIFICATIONS_COALESCE_WINDOW_SECONDS
+    )
+    key = (user_id, type_, entity_type)
+    if window > 0:
+        with _digests_lock:
+            digest = _open_digests.get(key)
+        if (
+            digest is not None
+            and digest.closes_at > now
+            and current is not None
+            and current.id == digest.notif_id
+            and not current.read
+        ):
+            notif = current
+            notif.count += 1
+            notif.entityIds = (notif.entityIds or [notif.entityId]) + [entity_id]
+            notif.entityId, notif.text, notif.data = entity_id, text, data
+            digest.pending = True
+            return notif, False, False
+
+    notif = _new_notification(type_, entity_type, entity_id, text, data)
+    if window > 0:
+        with _digests_lock:
+            _open_digests[key] = _OpenDigest(
+                notif.id, now + timedelta(seconds=window), pending=digest_mode
+            )
+    return notif, True, not digest_mode
+
+
+def flush_digests(now: Optional[datetime] = None) -> int:
+    """Close digests whose window is over and deliver the pending ones."""
+    now = now or _now()
+    with _digests_lock:
+        expired = [(k, d) for k, d in _open_digests.items() if d.closes_at <= now]
+        for key, _ in expired:
+            del _open_digests[key]
+
+    delivered = 0
+    for (user_id, _, _), digest in expired:
+        if not digest.pending:
+            continue
+        with _user_lock(user_id):
+            notif = notifications_by_user.get(user_id, digest.notif_id)
+        if notif is not None:
+            _publish(user_id, notif)
+            delivered += 1
+    return delivered
+
+
+digest_flusher = PeriodicTask(
+    "notifications-digest-flusher", flush_digests, config.NOTIFICATIONS_DIGEST_FLUSH_SECONDS
+)
+
+
+def get_preferences(user_id: str) -> NotificationPreferences:
+    return preferences.get(user_id) or NotificationPreferences()
+
+
+def set_preferences(user_id: str, prefs: NotificationPreferences) -> NotificationPreferences:
+    preferences[user_id] = prefs
+    return prefs
+
+
+def _wants(prefs: NotificationPreferences, type_: NotificationType) -> bool:
+    return type_ not in prefs.mutedTypes
+
+
+@contextmanager
+def _user_locks_held(user_ids: List[str]) -> Iterator[None]:
+    # every stripe once, in a fixed order, so two batches cannot deadlock
+    stripes = sorted({hash(user_id) % len(_user_locks) for user_id in user_ids})
+    with ExitStack() as stack:
+        for i in stripes:
+            stack.enter_context(_user_locks[i])
+        yield
+
+
 def push_for_org(
     org_id: str,
     type_: NotificationType,
@@ -50,30 +235,302 @@ def push_for_org(
     entity_id: str,
     text: str,
     data: Optional[dict] = None,
-) -> Optional[Notification]:
+) -> List[Notification]:
     """
-    Send notification to the first user of given org.
-    MVP: one user per org is enough for demo.
+    Send notification to every member of the org who has not muted this
+    type. Members come from the auth orgId -> users index, so the cost
+    depends on the org size, not on the number of users on the platform.
+    Preferences, open digests and counters of all members are read and
+    their notifications and counters written in one batch each; events go
+    out after the write. Bursts of one type
+    are merged into digests (see _add_or_merge).
     """
-    for u in auth_service.users.values():
-        if u.orgId == org_id:
-            return _push_to_user(u.id, type_, entity_type, entity_id, text, data)
-    return None
+    members = auth_service.list_org_user_ids(org_id)
+    stored_prefs = preferences.get_many(members)
+    recipients = [
+        (user_id, prefs)
+        for user_id, prefs in (
+            (user_id, stored_prefs.get(user_id) or NotificationPreferences()) for user_id in members
+        )
+        if _wants(prefs, type_)
+    ]
+    if not recipients:
+        return []
+    user_ids = [user_id for user_id, _ in recipients]
+
+    sent: List[Notification] = []
+    to_publish: List[Tuple[str, Notification]] = []
+    written: List[Tuple[str, Notification]] = []
+    counters: List[Tuple[str, int]] = []
+    now = _now()
+    with _user_locks_held(user_ids), transaction():
+        digest_ids: Dict[str, str] = {}
+        for user_id in user_ids:
+            notif_id = _digest_notif_id(user_id, type_, entity_type, now)
+            if notif_id is not None:
+                digest_ids[user_id] = notif_id
+        merging = notifications_by_user.get_many(digest_ids.items())
+        unread = unread_by_user.get_many(user_ids)
+        for user_id, prefs in recipients:
+            notif, added, publish = _add_or_merge(
+                user_id, prefs, merging.get((user_id, digest_ids.get(user_id, ""))),
+                type_, entity_type, entity_id, text, dict(data) if data else data, now,
+            )
+            written.append((user_id, notif))
+            if added:
+                count = unread.get(user_id)
+                counters.append((user_id, (count if count is not None else _unread(user_id)) + 1))
+            if publish:
+                to_publish.append((user_id, notif))
+            sent.append(notif)
+        notifications_by_user.put_many(written)
+        unread_by_user.put_many(counters)
+    for user_id, notif in to_publish:
+        _publish(user_id, notif)
+    return sent
+
 
+def _unread(user_id: str) -> int:
+    count = unread_by_user.get(user_id)
+    if count is None:
+        # no counter yet (data written before counters existed): count once
+        count = sum(1 for n in notifications_by_user.scan(user_id) if not n.read)
+    return count
 
-def list_for_user(user_id: str, unread_only: bool = False) -> List[Notification]:
-    items = notifications_by_user.get(user_id, [])
-    if unread_only:
-        return [n for n in items if not n.read]
-    return list(items)
+
+def unread_count(user_id: str) -> int:
+    return _unread(user_id)
+
+
+def _publish_unread(user_id: str, unread: int) -> None:
+    # lets other open tabs update the badge after a mark-read
+    events.bus.publish(events.user_topic(user_id), "unread", {"unread": unread})
+
+
+def list_for_user(
+    user_id: str,
+    unread_only: bool = False,
+    after: Optional[SortKey] = None,
+    limit: Optional[int] = None,
+) -> List[Notification]:
+    """
+    The user's notifications in (createdAt, id) order after the list cursor
+    `after`, at most `limit`: one range scan of the user's rows, which with
+    `unread_only` goes on until `limit` unread ones are found.
+    """
+    if unread_only and _unread(user_id) == 0:
+        return []
+    if not unread_only:
+        return list(notifications_by_user.scan(user_id, after, limit=limit))
+    unread = (n for n in notifications_by_user.scan(user_id, after) if not n.read)
+    return list(islice(unread, limit))
 
 
 def mark_read(user_id: str, notif_id: str) -> Optional[Notification]:
-    items = notifications_by_user.get(user_id, [])
-    for n in items:
-        if n.id == notif_id:
+    with _user_lock(user_id), transaction():
+        n = notifications_by_user.get(user_id, notif_id)
+        if n is None:
+            return None
+        if n.read:
+            return n
+        unread = _unread(user_id)
+        n.read = True
+        n.readAt = _now()
+        notifications_by_user.put(user_id, n)
+        unread_by_user[user_id] = unread = max(0, unread - 1)
+    _publish_unread(user_id, unread)
+    return n
+
+
+def mark_all_read(user_id: str, up_to: Optional[SortKey] = None) -> Tuple[int, int]:
+    """
+    Mark read every notification, or only those up to a list cursor
+    (createdAt, id) inclusive. Returns (marked now, unread left).
+    """
+    with _user_lock(user_id), transaction():
+        unread = _unread(user_id)
+        if unread == 0:
+            return 0, 0
+        now = _now()
+        marked: List[Notification] = []
+        for n in notifications_by_user.scan(user_id):
+            if up_to is not None and sort_key(n) > up_to:
+                break
             if not n.read:
                 n.read = True
-                n.readAt = _now()
-            return n
-    return None
\ No newline at end of file
+                n.readAt = now
+                marked.append(n)
+        updated = len(marked)
+        unread = 0 if up_to is None else max(0, unread - updated)
+        if marked:
+            notifications_by_user.put_many((user_id, n) for n in marked)
+        unread_by_user[user_id] = unread
+    if updated:
+        _publish_unread(user_id, unread)
+    return updated, unread
+
+
+# === Retention / archive ===
+
+_SAFE_ID_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def _archive_path(user_id: str) -> Path:
+    return config.NOTIFICATIONS_ARCHIVE_DIR / f"{_SAFE_ID_RE.sub('_', user_id)}.jsonl.gz"
+
+
+def _index_path(user_id: str) -> Path:
+    return config.NOTIFICATIONS_ARCHIVE_DIR / f"{_SAFE_ID_RE.sub('_', user_id)}.idx"
+
+
+@dataclass(frozen=True)
+class _Segment:
+    """One gzip member of a user's archive: its byte range and key range."""
+
+    offset: int
+    length: int
+    first: SortKey
+    last: SortKey
+
+
+def _key_to_json(key: SortKey) -> list:
+    return [key[0].isoformat(), key[1]]
+
+
+def _key_from_json(value: list) -> SortKey:
+    return datetime.fromisoformat(value[0]), value[1]
+
+
+def _archive(user_id: str, items: List[Notification]) -> None:
+    """
+    Append `items` in (createdAt, id) order as gzip members of at most
+    NOTIFICATIONS_ARCHIVE_SEGMENT_SIZE notifications, and record each
+    member's byte range and key range in the index file next to it. The
+    index line is written after the data, so a member interrupted halfway
+    is never read.
+    """
+    items = sorted(items, key=sort_key)
+    path = _archive_path(user_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    size = max(1, config.NOTIFICATIONS_ARCHIVE_SEGMENT_SIZE)
+    entries = []
+    with open(path, "ab") as fh:
+        for i in range(0, len(items), size):
+            chunk = items[i : i + size]
+            data = gzip.compress("".join(n.model_dump_json() + "\n" for n in chunk).encode("utf-8"))
+            entries.append({
+                "offset": fh.tell(),
+                "length": len(data),
+                "first": _key_to_json(sort_key(chunk[0])),
+                "last": _key_to_json(sort_key(chunk[-1])),
+            })
+            fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    with open(_index_path(user_id), "a", encoding="utf-8") as fh:
+        for entry in entries:
+            fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def _segments(user_id: str) -> List[_Segment]:
+    path = _index_path(user_id)
+    if not path.exists():
+        return []
+    segments = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # torn tail of an interrupted write
+            segments.append(_Segment(
+                offset=entry["offset"],
+                length=entry["length"],
+                first=_key_from_json(entry["first"]),
+                last=_key_from_json(entry["last"]),
+            ))
+    return segments
+
+
+def _read_segment(fh: BinaryIO, segment: _Segment) -> List[Notification]:
+    fh.seek(segment.offset)
+    text = gzip.decompress(fh.read(segment.length)).decode("utf-8")
+    return [Notification.model_validate_json(line) for line in text.splitlines()]
+
+
+def list_archived(
+    user_id: str, after: Optional[SortKey] = None, limit: Optional[int] = None
+) -> Tuple[List[Notification], bool]:
+    """
+    Archived notifications after `after` in (createdAt, id) order, plus
+    whether more follow. Only the index is scanned in full: segments ending
+    at or before `after` are skipped, and once the page is full no segment
+    starting past it is opened, so a page decompresses about one segment.
+    """
+    segments = [s for s in _segments(user_id) if after is None or s.last > after]
+    if not segments:
+        return [], False
+    segments.sort(key=lambda s: s.first)
+
+    page: List[Notification] = []
+    with open(_archive_path(user_id), "rb") as fh:
+        for segment in segments:
+            if limit is not None and len(page) > limit and segment.first > sort_key(page[limit]):
+                break
+            page.extend(
+                n for n in _read_segment(fh, segment) if after is None or sort_key(n) > after
+            )
+            if limit is not None:
+                page = heapq.nsmallest(limit + 1, page, key=sort_key)
+    if limit is None:
+        return sorted(page, key=sort_key), False
+    return page[:limit], len(page) > limit
+
+
+def compact_user(user_id: str, now: Optional[datetime] = None) -> int:
+    """
+    Apply retention to one user: read notifications older than the TTL and
+    everything beyond the newest NOTIFICATIONS_MAX_PER_USER move to the
+    archive. Returns the number of archived notifications.
+    """
+    now = now or _now()
+    read_cutoff = now - timedelta(days=config.NOTIFICATIONS_READ_TTL_DAYS)
+    with _user_lock(user_id), transaction():
+        items = list(notifications_by_user.scan(user_id))
+        keep = [n for n in items if not (n.read and (n.readAt or n.createdAt) < read_cutoff)]
+        overflow = len(keep) - config.NOTIFICATIONS_MAX_PER_USER
+        if overflow > 0:
+            keep = keep[overflow:]
+        if len(keep) == len(items):
+            return 0
+        kept_ids = {n.id for n in keep}
+        evicted = [n for n in items if n.id not in kept_ids]
+        _archive(user_id, evicted)
+        notifications_by_user.delete_many(user_id, [n.id for n in evicted])
+        unread_by_user[user_id] = sum(1 for n in keep if not n.read)
+    return len(evicted)
+
+
+@contextmanager
+def _compactor_lock() -> Iterator[bool]:
+    """
+    Lock file in the archive dir, shared by all worker processes: only the
+    holder compacts, so two workers never archive the same notification
+    twice. Yields False while another worker holds it.
+    """
+    config.NOTIFICATIONS_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(config.NOTIFICATIONS_ARCHIVE_DIR / ".compactor.lock", "a") as fh:
+        yield filelock.try_lock(fh)
+
+
+def compact_all(now: Optional[datetime] = None) -> int:
+    """Compact every user; skipped while another worker's compactor runs."""
+    with _compactor_lock() as acquired:
+        if not acquired:
+            return 0
+        return sum(compact_user(user_id, now) for user_id in notifications_by_user.owners())
+
+
+compactor = PeriodicTask(
+    "notifications-compactor", compact_all, config.NOTIFICATIONS_COMPACT_INTERVAL_SECONDS
+)
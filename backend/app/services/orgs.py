@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import List, Optional, Tuple
 from uuid import uuid4
 
 from app.schemas.orgs import (
@@ -12,11 +12,15 @@ from app.schemas.orgs import (
     KYBSubmitRequest,
     KybStatus,
     Organization,
+    OrganizationRole,
 )
+from app.pagination import SortKey
 from app.services import auth as auth_service
+from app.storage.base import Repository
+from app.storage.registry import repository
 
 
-kyb_profiles: Dict[str, KYBProfile] = {}
+kyb_profiles: Repository[KYBProfile] = repository("kyb_profiles", KYBProfile)
 
 
 def _now() -> datetime:
@@ -79,6 +83,39 @@ def submit_kyb(org_id: str, payload: KYBSubmitRequest) -> KYBProfile:
     org = auth_service.orgs.get(org_id)
     if org:
         updated = Organization(**{**org.dict(), "kybStatus": profile.status})
-        auth_service.orgs[org_id] = updated
+        auth_service.save_org(updated)
 
-    return profile
\ No newline at end of file
+    return profile
+
+
+SUPPLIER_ROLES = (OrganizationRole.supplier.value, OrganizationRole.both.value)
+
+
+def list_suppliers(
+    country: Optional[str] = None,
+    verified_only: bool = False,
+    after: Optional[SortKey] = None,
+    limit: Optional[int] = None,
+    newest_first: bool = False,
+) -> Tuple[List[Organization], bool]:
+    """
+    One page of supplier orgs (role supplier/both) in (createdAt, id) order,
+    plus whether more follow. Served from auth_service.org_directory, which
+    register / save_org keep current, so the cost follows the page size
+    rather than the number of orgs.
+    """
+    ids = auth_service.org_directory.page(
+        {
+            "role": SUPPLIER_ROLES,
+            "country": [country] if country else None,
+            "kybStatus": [KybStatus.verified.value] if verified_only else None,
+        },
+        after=after,
+        limit=limit + 1 if limit is not None else None,
+        descending=newest_first,
+    )
+    has_more = limit is not None and len(ids) > limit
+    if has_more:
+        ids = ids[:limit]
+    items = (auth_service.orgs.get(org_id) for org_id in ids)
+    return [org for org in items if org is not None], has_more
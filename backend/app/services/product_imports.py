@@ -0,0 +1,307 @@
+# app/services/product_imports.py
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import shutil
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from uuid import uuid4
+
+from pydantic import TypeAdapter, ValidationError
+
+from app import config, filelock
+from app.background import WorkerPool
+from app.schemas.products import (
+    ImportFormat,
+    ImportStatus,
+    ProductCreateRequest,
+    ProductImportError,
+    ProductImportJob,
+)
+from app.services import products as products_service
+from app.storage.base import Repository
+from app.storage.index import Index
+from app.storage.registry import repository, transaction
+
+logger = logging.getLogger(__name__)
+
+jobs: Repository[ProductImportJob] = repository("product_imports", ProductImportJob)  # jobId -> job
+# status -> jobIds, for recover_jobs()
+jobs_by_status = jobs.add_index(Index(lambda job: [job.status.value]))
+
+FIELDS = frozenset(ProductCreateRequest.model_fields)
+REQUIRED_FIELDS = [name for name, f in ProductCreateRequest.model_fields.items() if f.is_required()]
+
+_SUFFIXES = {".csv": ImportFormat.csv, ".ndjson": ImportFormat.ndjson, ".jsonl": ImportFormat.ndjson}
+_CONTENT_TYPES = {
+    "text/csv": ImportFormat.csv,
+    "application/x-ndjson": ImportFormat.ndjson,
+    "application/jsonl": ImportFormat.ndjson,
+}
+COPY_CHUNK_SIZE = 1 << 20
+
+# (line number, field values) or (line number, why the line could not be parsed)
+Row = Tuple[int, Union[Dict[str, Any], str]]
+
+_payloads = TypeAdapter(List[ProductCreateRequest])
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[ImportFormat]:
+    fmt = _SUFFIXES.get(Path(filename or "").suffix.lower())
+    if fmt is None and content_type:
+        fmt = _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+    return fmt
+
+
+def _upload_path(job_id: str) -> Path:
+    return config.PRODUCT_IMPORTS_DIR / job_id
+
+
+def start_import(
+    org_id: str,
+    source: BinaryIO,
+    filename: str,
+    fmt: ImportFormat,
+) -> ProductImportJob:
+    """
+    Copy the upload to PRODUCT_IMPORTS_DIR (chunk by chunk) and queue the
+    import. The request's temp file is gone after the response, the job
+    reads its own copy. The copy is locked until the job is stored, so
+    recover_jobs() in another worker never takes it for an orphan.
+    """
+    job_id = str(uuid4())
+    path = _upload_path(job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as out:
+        filelock.try_lock(out)
+        shutil.copyfileobj(source, out, COPY_CHUNK_SIZE)
+        job = ProductImportJob(
+            id=job_id,
+            orgId=org_id,
+            filename=filename,
+            format=fmt,
+            status=ImportStatus.queued,
+            bytesTotal=out.tell(),
+            createdAt=_now(),
+        )
+        jobs[job_id] = job
+    import_pool.submit(job_id)
+    return job
+
+
+def get_job(job_id: str) -> Optional[ProductImportJob]:
+    return jobs.get(job_id)
+
+
+# --- parsing: generators, one line in memory at a time ---
+
+
+def _csv_rows(stream: io.TextIOBase) -> Iterator[Row]:
+    reader = csv.DictReader(stream)
+    header = [name.strip() for name in reader.fieldnames or ()]
+    missing = [name for name in REQUIRED_FIELDS if name not in header]
+    if missing:
+        raise ValueError("missing required columns: " + ", ".join(missing))
+    reader.fieldnames = header
+    for row in reader:
+        # empty cell = field not given; extra cells (key None) are dropped
+        yield reader.line_num, {
+            k: v.strip() for k, v in row.items() if k in FIELDS and v and v.strip()
+        }
+
+
+def _ndjson_rows(stream: io.TextIOBase) -> Iterator[Row]:
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield line_no, "invalid JSON"
+            continue
+        if not isinstance(data, dict):
+            yield line_no, "expected a JSON object"
+            continue
+        yield line_no, data
+
+
+def _validate(batch: List[Row]) -> Tuple[List[ProductCreateRequest], List[ProductImportError]]:
+    """
+    Validate a batch in one pydantic call. If some rows are invalid, their
+    errors are collected and the remaining rows validated again.
+    """
+    errors: List[ProductImportError] = []
+    rows: List[Tuple[int, Dict[str, Any]]] = []
+    for line, data in batch:
+        if isinstance(data, str):
+            errors.append(ProductImportError(line=line, message=data))
+        else:
+            rows.append((line, data))
+
+    try:
+        payloads = _payloads.validate_python([data for _, data in rows])
+    except ValidationError as e:
+        bad = set()
+        for err in e.errors(include_url=False):
+            idx = err["loc"][0]
+            bad.add(idx)
+            errors.append(ProductImportError(
+                line=rows[idx][0],
+                field=".".join(str(part) for part in err["loc"][1:]) or None,
+                message=err["msg"],
+            ))
+        rows = [row for i, row in enumerate(rows) if i not in bad]
+        payloads = _payloads.validate_python([data for _, data in rows])
+
+    errors.sort(key=lambda err: err.line)
+    return payloads, errors
+
+
+# --- the job ---
+
+
+def _save(job: ProductImportJob, **changes: Any) -> ProductImportJob:
+    job = job.model_copy(update=changes)
+    jobs[job.id] = job
+    return job
+
+
+def _record_batch(
+    job: ProductImportJob,
+    rows: int,
+    imported: int,
+    errors: List[ProductImportError],
+    position: int,
+) -> ProductImportJob:
+    room = max(0, config.PRODUCT_IMPORT_MAX_ERRORS - len(job.errors))
+    failed_lines = len({err.line for err in errors})
+    return _save(
+        job,
+        bytesProcessed=position,
+        rowsProcessed=job.rowsProcessed + rows,
+        rowsImported=job.rowsImported + imported,
+        rowsFailed=job.rowsFailed + failed_lines,
+        errors=job.errors + errors[:room],
+        errorsTruncated=job.errorsTruncated or len(errors) > room,
+    )
+
+
+def _claim(job_id: str) -> Optional[ProductImportJob]:
+    # queued -> running in one transaction: a job queued twice (see
+    # recover_jobs) runs once
+    with transaction():
+        job = jobs.get(job_id)
+        if job is None or job.status != ImportStatus.queued:
+            return None
+        return _save(job, status=ImportStatus.running, startedAt=_now())
+
+
+def run_import(job_id: str) -> None:
+    """
+    Parse the uploaded file and insert its products, PRODUCT_IMPORT_BATCH_SIZE
+    rows at a time. Progress is stored after every batch; memory use does not
+    depend on the file size. Rows imported before a fatal error (bad
+    encoding, broken CSV quoting) stay imported.
+
+    The upload copy stays locked while the job runs: a running job whose
+    copy is not locked was left by a worker that is gone.
+    """
+    path = _upload_path(job_id)
+    try:
+        raw = open(path, "rb")
+    except FileNotFoundError:
+        return  # finished or failed elsewhere
+    with raw:
+        if not filelock.try_lock(raw):
+            return  # another worker is on it
+        job = _claim(job_id)
+        if job is not None:
+            _run(job, raw, path)
+
+
+def _run(job: ProductImportJob, raw: BinaryIO, path: Path) -> None:
+    try:
+        stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        parse = _csv_rows if job.format == ImportFormat.csv else _ndjson_rows
+        rows = parse(stream)
+        while True:
+            batch = list(islice(rows, config.PRODUCT_IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+            payloads, errors = _validate(batch)
+            products_service.create_products(job.orgId, payloads)
+            # raw.tell() runs ahead by the reader's buffer, fine for progress
+            job = _record_batch(job, len(batch), len(payloads), errors, raw.tell())
+        job = _save(
+            job, status=ImportStatus.completed, bytesProcessed=job.bytesTotal, finishedAt=_now()
+        )
+    except (ValueError, csv.Error) as e:  # UnicodeDecodeError is a ValueError
+        _save(job, status=ImportStatus.failed, error=str(e), finishedAt=_now())
+    except Exception:
+        logger.exception("product import %s failed", job.id)
+        _save(job, status=ImportStatus.failed, error="internal error", finishedAt=_now())
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def _in_use(path: Path) -> bool:
+    """The upload copy is locked: being written or imported by a live worker."""
+    try:
+        with open(path, "rb") as fh:
+            return not filelock.try_lock(fh)
+    except FileNotFoundError:
+        return False
+
+
+def _fail_stale(job_id: str, error: str) -> None:
+    with transaction():
+        job = jobs.get(job_id)
+        if job is not None and job.status in (ImportStatus.queued, ImportStatus.running):
+            _save(job, status=ImportStatus.failed, error=error, finishedAt=_now())
+
+
+def recover_jobs() -> None:
+    """
+    Called at startup. Jobs left running by a worker that is gone are
+    failed (their imported rows stay; re-running would insert them
+    twice). Queued jobs are queued again here if their upload copy is
+    still there, failed otherwise. Upload copies without a pending job are
+    deleted. Copies locked by a live worker are left alone.
+    """
+    for job_id in jobs_by_status.ids(ImportStatus.running.value):
+        path = _upload_path(job_id)
+        if not _in_use(path):
+            _fail_stale(job_id, "interrupted by a server restart")
+            path.unlink(missing_ok=True)
+
+    for job_id in jobs_by_status.ids(ImportStatus.queued.value):
+        if _upload_path(job_id).exists():
+            import_pool.submit(job_id)
+        else:
+            _fail_stale(job_id, "upload lost in a server restart")
+
+    if not config.PRODUCT_IMPORTS_DIR.is_dir():
+        return
+    for path in config.PRODUCT_IMPORTS_DIR.iterdir():
+        job = jobs.get(path.name)
+        pending = job is not None and job.status in (ImportStatus.queued, ImportStatus.running)
+        if not pending and not _in_use(path):
+            path.unlink(missing_ok=True)
+
+
+async def _process(job_id: str) -> None:
+    # parsing and inserts block, keep them off the pool's event loop
+    await asyncio.to_thread(run_import, job_id)
+
+
+import_pool = WorkerPool("product-imports", _process, workers=config.PRODUCT_IMPORT_WORKERS)
@@ -2,23 +2,63 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Iterable, List, Optional, Tuple
 from uuid import uuid4
 
+from app.pagination import RankKey, SortKey, sort_key
 from app.schemas.products import Product, ProductCreateRequest, ProductUpdateRequest
+from app.search import TextIndex
+from app.storage.base import Repository
+from app.storage.index import FacetIndex
+from app.storage.registry import repository
 
 
-products: Dict[str, Product] = {}  # productId -> Product
+products: Repository[Product] = repository("products", Product)  # productId -> Product
+
+# full-text search over name (weighted x2) and description, posting lists per org
+search_index = products.add_index(
+    TextIndex(lambda p: [(p.name, 2.0), (p.description, 1.0)], scope=lambda p: p.orgId)
+)
+
+# basePrice buckets (in the product's own currency): [0, 10), [10, 100), ...
+PRICE_RANGE_EDGES = (10, 100, 1000, 10000)
+
+
+def price_range(price: float) -> str:
+    low = 0
+    for edge in PRICE_RANGE_EDGES:
+        if price < edge:
+            return f"{low}-{edge}"
+        low = edge
+    return f"{low}+"
+
+
+def hs_chapter(hs_code: Optional[str]) -> Optional[str]:
+    """First two digits of an HS code ("8471.30" -> "84")."""
+    digits = "".join(c for c in hs_code or "" if c.isdigit())
+    return digits[:2] if len(digits) >= 2 else None
+
+
+def _facets(p: Product) -> dict:
+    return {
+        "orgId": p.orgId,
+        "currency": p.baseCurrency.value,
+        "unit": p.unit.value,
+        "hsChapter": hs_chapter(p.hsCode),
+        "priceRange": price_range(p.basePrice),
+    }
+
+
+product_facets = products.add_index(FacetIndex(_facets, sort_key=sort_key))
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def create_product(org_id: str, payload: ProductCreateRequest) -> Product:
-    product_id = str(uuid4())
-    product = Product(
-        id=product_id,
+def _new_product(org_id: str, payload: ProductCreateRequest) -> Product:
+    return Product(
+        id=str(uuid4()),
         orgId=org_id,
         name=payload.name,
         description=payload.description,
@@ -28,24 +68,60 @@ def create_product(org_id: str, payload: ProductCreateRequest) -> Product:
         unit=payload.unit,
         createdAt=_now(),
     )
-    products[product_id] = product
+
+
+def create_product(org_id: str, payload: ProductCreateRequest) -> Product:
+    product = _new_product(org_id, payload)
+    products[product.id] = product
     return product
 
 
-def list_products(org_id: Optional[str] = None, search: Optional[str] = None) -> List[Product]:
-    items = list(products.values())
-    if org_id:
-        items = [p for p in items if p.orgId == org_id]
-    if search:
-        s = search.lower()
-        items = [
-            p
-            for p in items
-            if s in p.name.lower() or (p.description and s in p.description.lower())
-        ]
+def create_products(org_id: str, payloads: Iterable[ProductCreateRequest]) -> List[Product]:
+    """Bulk variant of create_product: one storage write for the whole batch."""
+    items = [_new_product(org_id, payload) for payload in payloads]
+    products.put_many((p.id, p) for p in items)
     return items
 
 
+def _load(ids: List[str]) -> List[Product]:
+    found = products.get_many(ids)
+    return [found[i] for i in ids if i in found]
+
+
+def page_products(
+    org_id: str, after: Optional[SortKey] = None, limit: Optional[int] = None
+) -> Tuple[List[Product], bool]:
+    """
+    One page of `org_id`'s products in (createdAt, id) order, plus whether
+    more follow; read from product_facets, only the page is loaded.
+    """
+    ids = product_facets.page(
+        {"orgId": [org_id]}, after=after, limit=limit + 1 if limit is not None else None
+    )
+    has_more = limit is not None and len(ids) > limit
+    if has_more:
+        ids = ids[:limit]
+    return _load(ids), has_more
+
+
+def search_products(
+    org_id: str, query: str, after: Optional[RankKey] = None, limit: Optional[int] = None
+) -> Tuple[List[Tuple[Product, float]], bool]:
+    """
+    One page of `org_id`'s products matching `query`, most relevant first,
+    as (product, score), plus whether more follow. The index returns only
+    the limit + 1 hits ranked after `after`; only the page is loaded.
+    """
+    hits = search_index.search(
+        query, scope=org_id, limit=limit + 1 if limit is not None else None, after=after
+    )
+    has_more = limit is not None and len(hits) > limit
+    if has_more:
+        hits = hits[:limit]
+    found = products.get_many([product_id for product_id, _ in hits])
+    return [(found[product_id], score) for product_id, score in hits if product_id in found], has_more
+
+
 def get_product(product_id: str) -> Optional[Product]:
     return products.get(product_id)
 
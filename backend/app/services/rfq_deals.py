@@ -1,8 +1,9 @@
 # app/services/rfq_deals.py
 from __future__ import annotations
 
+import threading
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import List, Optional, Tuple
 from uuid import uuid4
 
 from app.schemas.rfq_deals import (
@@ -22,15 +23,84 @@ from app.schemas.rfq_deals import (
     OrderItem,
     DealLogisticsState,
 )
+from app.pagination import SortKey, sort_key
 from app.schemas.products import CurrencyCode
 from app.services import notifications as notifications_service
 from app.schemas.notifications import NotificationType, NotificationEntityType
+from app.storage.base import Repository
+from app.storage.index import FacetIndex, Index
+from app.storage.registry import repository
 
 
-rfqs: Dict[str, RFQ] = {}
-offers: Dict[str, Offer] = {}
-orders: Dict[str, Order] = {}
-deals: Dict[str, Deal] = {}
+rfqs: Repository[RFQ] = repository("rfqs", RFQ)
+offers: Repository[Offer] = repository("offers", Offer)
+orders: Repository[Order] = repository("orders", Order)
+deals: Repository[Deal] = repository("deals", Deal)
+
+
+def _party_facets(buyer_org_id: str, supplier_org_id: Optional[str], status) -> dict:
+    """Facets for role-scoped listings: buyer/supplier org and status."""
+    return {"buyer": buyer_org_id, "supplier": supplier_org_id, "status": status.value}
+
+
+def _deal_party_facets(deal: Deal) -> dict:
+    # Deal has no org ids of its own: they come from its RFQ (which never
+    # changes parties), resolved once when the deal is written.
+    rfq = rfqs.get(deal.rfqId)
+    if not rfq:
+        return {}
+    return _party_facets(rfq.buyerOrgId, rfq.supplierOrgId, deal.status)
+
+
+# ordered by (createdAt, id), so list endpoints read one page at a time
+rfqs_by_party = rfqs.add_index(
+    FacetIndex(lambda r: _party_facets(r.buyerOrgId, r.supplierOrgId, r.status), sort_key)
+)
+orders_by_party = orders.add_index(
+    FacetIndex(lambda o: _party_facets(o.buyerOrgId, o.supplierOrgId, o.status), sort_key)
+)
+deals_by_party = deals.add_index(FacetIndex(_deal_party_facets, sort_key))
+offers_by_rfq = offers.add_index(Index(lambda o: [o.rfqId]))
+
+
+# deal records are read-modify-written by payments and logistics; writers of
+# one deal are serialized so a status check and the write that follows it
+# (and the ledger posting in between) form one critical section
+_deal_locks = [threading.Lock() for _ in range(64)]
+
+
+def deal_lock(deal_id: str) -> threading.Lock:
+    return _deal_locks[hash(deal_id) % len(_deal_locks)]
+
+
+def _fetch(repo: Repository, ids: List[str]) -> list:
+    result = []
+    for record_id in ids:
+        record = repo.get(record_id)
+        if record is not None:
+            result.append(record)
+    return result
+
+
+def _party_page(
+    repo: Repository,
+    index: FacetIndex,
+    org_id: str,
+    role: str,
+    status,
+    after: Optional[SortKey],
+    limit: Optional[int],
+) -> Tuple[list, bool]:
+    """One page of `role` org_id's records after `after`, plus whether more follow."""
+    ids = index.page(
+        {role: [org_id], "status": [status.value] if status else None},
+        after=after,
+        limit=limit + 1 if limit is not None else None,
+    )
+    has_more = limit is not None and len(ids) > limit
+    if has_more:
+        ids = ids[:limit]
+    return _fetch(repo, ids), has_more
 
 
 def _now() -> datetime:
@@ -62,17 +132,14 @@ def create_rfq(buyer_org_id: str, payload: RFQCreateRequest) -> RFQ:
     return rfq
 
 
-def list_rfqs(org_id: str, role: str, status: Optional[RFQStatus] = None) -> List[RFQ]:
-    result: List[RFQ] = []
-    for rfq in rfqs.values():
-        if role == "buyer" and rfq.buyerOrgId != org_id:
-            continue
-        if role == "supplier" and rfq.supplierOrgId != org_id:
-            continue
-        if status and rfq.status != status:
-            continue
-        result.append(rfq)
-    return result
+def list_rfqs(
+    org_id: str,
+    role: str,
+    status: Optional[RFQStatus] = None,
+    after: Optional[SortKey] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[RFQ], bool]:
+    return _party_page(rfqs, rfqs_by_party, org_id, role, status, after, limit)
 
 
 def get_rfq(rfq_id: str) -> Optional[RFQ]:
@@ -106,7 +173,7 @@ def send_rfq(rfq_id: str) -> Optional[RFQ]:
 # === Offers ===
 
 def list_offers_for_rfq(rfq_id: str) -> List[Offer]:
-    return [o for o in offers.values() if o.rfqId == rfq_id]
+    return _fetch(offers, offers_by_rfq.ids(rfq_id))
 
 
 def create_offer_for_rfq(rfq: RFQ, supplier_org_id: str, payload: OfferCreateRequest) -> Offer:
@@ -219,6 +286,7 @@ def accept_offer(offer_id: str) -> Optional[tuple[Offer, Order, Deal]]:
             delivered=False,
             deliveredAt=None,
         ),
+        createdAt=_now(),
     )
     deals[deal_id] = deal
 
@@ -231,22 +299,32 @@ def accept_offer(offer_id: str) -> Optional[tuple[Offer, Order, Deal]]:
     return offer, order, deal
 
 
+# === Orders ===
+
+def list_orders(
+    org_id: str,
+    role: str,
+    status: Optional[OrderStatus] = None,
+    after: Optional[SortKey] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Order], bool]:
+    return _party_page(orders, orders_by_party, org_id, role, status, after, limit)
+
+
+def get_order(order_id: str) -> Optional[Order]:
+    return orders.get(order_id)
+
+
 # === Deals ===
 
-def list_deals_for_org(org_id: str, role: str, status: Optional[DealStatus] = None) -> List[Deal]:
-    result: List[Deal] = []
-    for d in deals.values():
-        rfq = rfqs.get(d.rfqId)
-        if not rfq:
-            continue
-        if role == "buyer" and rfq.buyerOrgId != org_id:
-            continue
-        if role == "supplier" and rfq.supplierOrgId != org_id:
-            continue
-        if status and d.status != status:
-            continue
-        result.append(d)
-    return result
+def list_deals_for_org(
+    org_id: str,
+    role: str,
+    status: Optional[DealStatus] = None,
+    after: Optional[SortKey] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Deal], bool]:
+    return _party_page(deals, deals_by_party, org_id, role, status, after, limit)
 
 
 def get_deal_aggregated(deal_id: str) -> Optional[DealAggregatedView]:
@@ -0,0 +1,184 @@
+# app/services/tariffs.py
+from __future__ import annotations
+
+import mmap
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app import config
+from app.cache import LRUCache
+from app.schemas.tariffs import TariffRate
+from app.services import products as products_service
+from app.storage.index import RepositoryIndex
+
+# Used when a product has no HS code or no prefix of it is in the table
+DEFAULT_DUTY_RATE = 0.07
+
+
+@dataclass(frozen=True)
+class TariffEntry:
+    prefix: str
+    rate: float
+    description: Optional[str] = None
+
+
+def normalize_hs_code(hs_code: Optional[str]) -> str:
+    """Digits only: "8471.30.00" / "8471 30" -> "847130"."""
+    return "".join(c for c in hs_code or "" if c.isdigit())
+
+
+class HSTrie:
+    """
+    Digit trie over HS code prefixes with longest-prefix lookup.
+
+    The table file is read on first lookup through mmap (pages come from
+    the OS cache, nothing is buffered on our side); `reload()` drops the
+    trie so the next lookup reads the file again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # node: {digit: child node, "": TariffEntry}
+        self._root: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self.entries = 0
+
+    def lookup(self, hs_code: Optional[str]) -> Optional[TariffEntry]:
+        node = self._ensure_loaded()
+        best = node.get("")
+        for digit in normalize_hs_code(hs_code):
+            node = node.get(digit)
+            if node is None:
+                break
+            best = node.get("", best)
+        return best
+
+    def reload(self) -> None:
+        with self._lock:
+            self._root = None
+
+    def _ensure_loaded(self) -> Dict[str, Any]:
+        root = self._root
+        if root is not None:
+            return root
+        with self._lock:
+            if self._root is None:
+                self._root = self._build()
+            return self._root
+
+    def _build(self) -> Dict[str, Any]:
+        root: Dict[str, Any] = {}
+        self.entries = 0
+        for entry in self._read_entries():
+            node = root
+            for digit in entry.prefix:
+                node = node.setdefault(digit, {})
+            node[""] = entry
+            self.entries += 1
+        return root
+
+    def _read_entries(self) -> Iterable[TariffEntry]:
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        with self.path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in iter(mm.readline, b""):
+                line = raw.decode("utf-8").strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.split("\t")
+                prefix = normalize_hs_code(parts[0])
+                try:
+                    rate = float(parts[1])
+                except (IndexError, ValueError):
+                    continue  # malformed row
+                if prefix:
+                    description = parts[2].strip() if len(parts) > 2 else None
+                    yield TariffEntry(prefix, rate, description or None)
+
+
+trie = HSTrie(config.TARIFF_FILE)
+
+
+def lookup(hs_code: Optional[str]) -> Optional[TariffEntry]:
+    return trie.lookup(hs_code)
+
+
+def lookup_many(hs_codes: List[str]) -> List[TariffRate]:
+    """Resolve many codes at once; repeated codes are looked up once."""
+    resolved: Dict[str, Optional[TariffEntry]] = {}
+    result = []
+    for code in hs_codes:
+        key = normalize_hs_code(code)
+        if key not in resolved:
+            resolved[key] = trie.lookup(key) if key else None
+        entry = resolved[key]
+        result.append(
+            TariffRate(
+                hsCode=code,
+                matchedPrefix=entry.prefix if entry else None,
+                rate=entry.rate if entry else None,
+                description=entry.description if entry else None,
+            )
+        )
+    return result
+
+
+class ProductDutyCache(RepositoryIndex):
+    """
+    product id -> (hs code, duty rate). Registered as an index on the
+    products repository, so any write or delete of a product (in any
+    worker, see RepositoryIndex.refresh) drops its entry and the next
+    lookup sees the new HS code. Entries also expire after `ttl` seconds,
+    so a rate changed in the tariff table is picked up without a product
+    write.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cache: LRUCache[Tuple[Optional[str], float]] = LRUCache(maxsize, ttl=ttl, clock=clock)
+
+    def rate(self, product_id: str) -> Optional[float]:
+        self.refresh()
+        cached = self._cache.get(product_id)
+        if cached is not None:
+            return cached[1]
+        product = products_service.get_product(product_id)
+        if product is None:
+            return None
+        entry = lookup(product.hsCode) if product.hsCode else None
+        rate = entry.rate if entry else DEFAULT_DUTY_RATE
+        self._cache.put(product_id, (product.hsCode, rate))
+        return rate
+
+    # repository index protocol
+    def update(self, record_id: str, record: Any) -> None:
+        self._cache.pop(record_id)
+
+    def discard(self, record_id: str) -> None:
+        self._cache.pop(record_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def rebuild(self, items: Iterable[Tuple[str, Any]]) -> None:
+        self._cache.clear()
+
+
+product_duties = products_service.products.add_index(
+    ProductDutyCache(config.TARIFF_PRODUCT_CACHE_SIZE, ttl=config.TARIFF_PRODUCT_CACHE_TTL_SECONDS)
+)
+
+
+def product_duty_rate(product_id: Optional[str]) -> float:
+    """Duty share for a product, DEFAULT_DUTY_RATE if unknown."""
+    if not product_id:
+        return DEFAULT_DUTY_RATE
+    rate = product_duties.rate(product_id)
+    return DEFAULT_DUTY_RATE if rate is None else rate
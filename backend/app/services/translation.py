@@ -0,0 +1,173 @@
+# app/services/translation.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import weakref
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+from app import config
+from app.cache import LRUCache
+from app.schemas.chat import MessageTranslation
+
+TranslationRequest = Tuple[str, str, str]  # (text, source lang, target lang)
+
+
+class TranslationProvider(ABC):
+    """
+    Translation backend. Implementations must be async: a slow remote
+    engine then waits on the event loop instead of holding a threadpool
+    worker per request.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def translate(self, text: str, source: str, target: str) -> MessageTranslation:
+        ...
+
+
+class LocalTranslationProvider(TranslationProvider):
+    """
+    Deterministic stand-in (no network): "[RU auto] <text>" etc.
+    `latency` simulates a remote engine in tests and benchmarks.
+    """
+
+    name = "local"
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    async def translate(self, text: str, source: str, target: str) -> MessageTranslation:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        # MVP auto-translation simulation
+        prefix = "[auto]"
+
+        # Optional: more specific prefixes for RU/CN
+        if target.lower().startswith("zh"):
+            prefix = "[CN auto]"
+        elif target.lower().startswith("ru"):
+            prefix = "[RU auto]"
+
+        return MessageTranslation(
+            lang=target,
+            text=f"{prefix} {text}",
+            autoTranslated=True,
+            qualityScore=0.9,
+        )
+
+
+PROVIDERS = {
+    "local": LocalTranslationProvider,
+}
+
+
+class TranslationTimeout(Exception):
+    pass
+
+
+class _LoopState:
+    # asyncio primitives belong to one event loop
+    def __init__(self, concurrency: int) -> None:
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.inflight: Dict[str, "asyncio.Task[MessageTranslation]"] = {}
+
+
+class Translator:
+    """
+    Front of the provider:
+      - LRU/TTL cache keyed by content hash;
+      - single-flight: concurrent identical requests share one provider call;
+      - at most `concurrency` provider calls in flight per event loop, each
+        bounded by `timeout` seconds (queueing for a slot included).
+    """
+
+    def __init__(
+        self,
+        provider: TranslationProvider,
+        concurrency: int = 8,
+        timeout: float = 10.0,
+        cache_size: int = 10000,
+        cache_ttl: float = 86400.0,
+    ) -> None:
+        self.provider = provider
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.cache: LRUCache[MessageTranslation] = LRUCache(cache_size, ttl=cache_ttl)
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState(self.concurrency)
+        return state
+
+    async def translate(self, text: str, source: str, target: str) -> MessageTranslation:
+        key = cache_key(text, source, target)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit.model_copy()
+
+        state = self._state()
+        task = state.inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._call(key, text, source, target))
+            state.inflight[key] = task
+            task.add_done_callback(lambda _t: state.inflight.pop(key, None))
+        # shield: a caller that goes away must not cancel the shared call
+        result = await asyncio.shield(task)
+        return result.model_copy()
+
+    async def translate_many(
+        self, requests: Sequence[TranslationRequest]
+    ) -> List[MessageTranslation]:
+        """Translate a batch concurrently; duplicates cost one call."""
+        return list(await asyncio.gather(*(self.translate(*req) for req in requests)))
+
+    async def _call(self, key: str, text: str, source: str, target: str) -> MessageTranslation:
+        state = self._state()
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with state.semaphore:
+                    result = await self.provider.translate(text, source, target)
+        except TimeoutError:
+            raise TranslationTimeout(key)
+        self.cache.put(key, result)
+        return result
+
+
+def cache_key(text: str, source: str, target: str) -> str:
+    raw = "\x1f".join((source.lower(), target.lower(), text))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _make_translator() -> Translator:
+    provider_cls = PROVIDERS.get(config.TRANSLATION_PROVIDER)
+    if provider_cls is None:
+        raise RuntimeError(f"unknown translation provider: {config.TRANSLATION_PROVIDER!r}")
+    return Translator(
+        provider_cls(),
+        concurrency=config.TRANSLATION_CONCURRENCY,
+        timeout=config.TRANSLATION_TIMEOUT_SECONDS,
+        cache_size=config.TRANSLATION_CACHE_SIZE,
+        cache_ttl=config.TRANSLATION_CACHE_TTL_SECONDS,
+    )
+
+
+translator = _make_translator()
+
+
+async def translate(text: str, source: str, target: str) -> MessageTranslation:
+    return await translator.translate(text, source, target)
+
+
+async def translate_many(requests: Sequence[TranslationRequest]) -> List[MessageTranslation]:
+    return await translator.translate_many(requests)
@@ -1,8 +1,9 @@
 # app/services/wallets_fx.py
 from __future__ import annotations
 
+import threading
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 
 from app.schemas.wallet_fx_payments import (
@@ -13,39 +14,122 @@ from app.schemas.wallet_fx_payments import (
     Payment,
     PaymentCreateRequest,
     PaymentStatus,
+    LedgerAccount,
 )
+from app.pagination import SortKey, sort_key
 from app.schemas.products import CurrencyCode
 from app.schemas.rfq_deals import DealStatus
 from app.services import auth as auth_service
 from app.services import rfq_deals as deals_service
 from app.services import rfq_deals as deals_service
 from app.services import notifications as notifications_service
+from app.services import ledger
+from app.services.ledger import Posting
 from app.schemas.notifications import NotificationType, NotificationEntityType
+from app.storage.base import Repository
+from app.storage.index import FacetIndex, Index
+from app.storage.registry import repository, transaction
 
-wallets: Dict[str, Wallet] = {}
-payments: Dict[str, Payment] = {}
-fx_quotes: Dict[str, FXQuoteResponse] = {}
+wallets: Repository[Wallet] = repository("wallets", Wallet)
+payments: Repository[Payment] = repository("payments", Payment)
+fx_quotes: Repository[FXQuoteResponse] = repository("fx_quotes", FXQuoteResponse)
+
+# ("org", orgId) -> wallets of org, ("org_currency", orgId, currency) -> its single wallet
+wallets_by_owner = wallets.add_index(
+    Index(lambda w: [("org", w.orgId), ("org_currency", w.orgId, CurrencyCode(w.currency))])
+)
+# payments of a deal / by payer, payee and status, in (createdAt, id) order
+payments_by_party = payments.add_index(
+    FacetIndex(
+        lambda p: {
+            "payer": p.payerOrgId,
+            "payee": p.payeeOrgId,
+            "status": p.status.value,
+            "dealId": p.dealId,
+        },
+        sort_key,
+    )
+)
+# serializes wallet creation so one (org, currency) never gets two wallets
+_wallet_create_lock = threading.Lock()
+
+# "<orgId>:<Idempotency-Key>" -> {"paymentId": ..., "fingerprint": ...}
+idempotency_keys: Repository[Dict[str, str]] = repository(
+    "payment_idempotency_keys", Dict[str, str]
+)
+_idempotency_locks = [threading.Lock() for _ in range(64)]
+
+DEMO_RUB_BALANCE = 100_000_000.0
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _find_wallet(org_id: str, currency: CurrencyCode) -> Optional[Wallet]:
+    wallet_id = wallets_by_owner.first(("org_currency", org_id, CurrencyCode(currency)))
+    if wallet_id is None:
+        return None
+    return wallets.get(wallet_id)
+
+
 def _ensure_wallet(org_id: str, currency: CurrencyCode) -> Wallet:
-    for w in wallets.values():
-        if w.orgId == org_id and w.currency == currency:
-            return w
-    # Create new wallet with demo balance
-    initial_balance = 100_000_000.0 if currency == CurrencyCode.RUB else 0.0
+    wallet = _find_wallet(org_id, currency)
+    if wallet:
+        return wallet
+    # process locks first, then the transaction: it serializes the other
+    # workers, and the re-check inside it sees a wallet one of them has
+    # just created (the RUB opening posting also updates the shared system
+    # funding balance)
+    system_id = ledger.system_wallet_id(CurrencyCode(currency).value)
+    with _wallet_create_lock, ledger.lock_wallets(system_id), transaction():
+        wallet = _find_wallet(org_id, currency)
+        if wallet:
+            return wallet
+        return _create_wallet(org_id, currency)
+
+
+def _create_wallet(org_id: str, currency: CurrencyCode) -> Wallet:
+    # caller holds _wallet_create_lock, the system wallet lock and a transaction()
     wallet = Wallet(
         id=str(uuid4()),
         orgId=org_id,
         currency=currency,
-        balance=initial_balance,
+        balance=0.0,
         blockedAmount=0.0,
         createdAt=_now(),
     )
-    wallets[wallet.id] = wallet
+    if currency != CurrencyCode.RUB:
+        wallets[wallet.id] = wallet
+        return wallet
+
+    # Demo balance is posted through the ledger from the system funding
+    # account before the wallet is stored, so it is never listed (or paid
+    # from) without its opening balance.
+    amount = ledger.to_minor(DEMO_RUB_BALANCE)
+    system_id = ledger.system_wallet_id(currency.value)
+    with ledger.lock_wallets(wallet.id):
+        ledger.post_locked(
+            f"{wallet.id}:opening",
+            [
+                Posting(system_id, LedgerAccount.funding, -amount),
+                Posting(wallet.id, LedgerAccount.available, amount),
+            ],
+        )
+        wallet.balance = ledger.from_minor(ledger.balance(wallet.id, LedgerAccount.available))
+        wallets[wallet.id] = wallet
+    return wallet
+
+
+def _sync_wallet(wallet_id: str) -> Wallet:
+    """
+    Refresh the float balance/blockedAmount exposed by the API from the
+    ledger. Call with the wallet lock held.
+    """
+    wallet = wallets[wallet_id]
+    wallet.balance = ledger.from_minor(ledger.balance(wallet_id, LedgerAccount.available))
+    wallet.blockedAmount = ledger.from_minor(ledger.balance(wallet_id, LedgerAccount.blocked))
+    wallets[wallet_id] = wallet
     return wallet
 
 
@@ -54,7 +138,12 @@ def list_wallets_for_org(org_id: Optional[str] = None) -> List[Wallet]:
         return list(wallets.values())
     #  : ,       RUB-
     _ensure_wallet(org_id, CurrencyCode.RUB)
-    return [w for w in wallets.values() if w.orgId == org_id]
+    result: List[Wallet] = []
+    for wallet_id in wallets_by_owner.ids(("org", org_id)):
+        w = wallets.get(wallet_id)
+        if w:
+            result.append(w)
+    return result
 
 
 # === FX ===
@@ -89,7 +178,40 @@ def create_fx_quote(payload: FXQuoteRequest) -> FXQuoteResponse:
 # === Payments / Escrow demo ===
 
 
-def create_payment(current_org_id: str, payload: PaymentCreateRequest) -> Payment:
+def create_payment(
+    current_org_id: str,
+    payload: PaymentCreateRequest,
+    idempotency_key: Optional[str] = None,
+) -> Payment:
+    """
+    Deposit funds to escrow. With an idempotency key, a retried request with
+    the same payload returns the payment created by the first one.
+    """
+    if idempotency_key is None:
+        return _create_payment(current_org_id, payload)
+
+    key = f"{current_org_id}:{idempotency_key}"
+    fingerprint = payload.model_dump_json()
+    with _idempotency_locks[hash(key) % len(_idempotency_locks)]:
+        record = idempotency_keys.get(key)
+        if record:
+            if record["fingerprint"] != fingerprint:
+                raise ValueError("idempotency_key_conflict")
+            existing = payments.get(record["paymentId"])
+            if existing:
+                return existing
+        payment = _create_payment(current_org_id, payload)
+        idempotency_keys[key] = {"paymentId": payment.id, "fingerprint": fingerprint}
+        return payment
+
+
+def _create_payment(current_org_id: str, payload: PaymentCreateRequest) -> Payment:
+    if payload.amount <= 0:
+        raise ValueError("invalid_amount")
+    amount_minor = ledger.to_minor(payload.amount)
+    if amount_minor <= 0:
+        raise ValueError("invalid_amount")
+
     deal = deals_service.deals.get(payload.dealId)
     if not deal:
         raise ValueError("deal_not_found")
@@ -112,34 +234,43 @@ def create_payment(current_org_id: str, payload: PaymentCreateRequest) -> Paymen
     payer_wallet = _ensure_wallet(payer_org_id, payload.currency)
     _ = _ensure_wallet(payee_org_id, payload.currency)  # ensure exists
 
-    # Check balance
-    if payer_wallet.balance < payload.amount:
-        raise ValueError("insufficient_funds")
-
-    # Move from available balance to blockedAmount (escrow)
-    payer_wallet.balance -= payload.amount
-    payer_wallet.blockedAmount += payload.amount
-    wallets[payer_wallet.id] = payer_wallet
-
     payment_id = str(uuid4())
-    payment = Payment(
-        id=payment_id,
-        dealId=payload.dealId,
-        payerOrgId=payer_org_id,
-        payeeOrgId=payee_org_id,
-        amount=payload.amount,
-        currency=payload.currency,
-        status=PaymentStatus.pending,
-        fxQuoteId=payload.fxQuoteId,
-        createdAt=_now(),
-        completedAt=None,
-        failureReason=None,
-    )
-    payments[payment_id] = payment
 
-    # Update deal status to reflect partial payment (deposit to escrow)
-    deal.status = DealStatus.paid_partially
-    deals_service.deals[deal.id] = deal
+    # Move from available balance to blockedAmount (escrow); the ledger
+    # rejects the posting if available balance would go negative. The deal
+    # status is re-checked and updated in the same critical section.
+    with deals_service.deal_lock(deal.id), ledger.lock_wallets(payer_wallet.id), transaction():
+        deal = deals_service.deals.get(deal.id)
+        if not deal or deal.status not in (DealStatus.ordered, DealStatus.paid_partially):
+            raise ValueError("invalid_deal_status_for_payment")
+
+        ledger.post_locked(
+            payment_id,
+            [
+                Posting(payer_wallet.id, LedgerAccount.available, -amount_minor),
+                Posting(payer_wallet.id, LedgerAccount.blocked, amount_minor),
+            ],
+        )
+        _sync_wallet(payer_wallet.id)
+
+        payment = Payment(
+            id=payment_id,
+            dealId=payload.dealId,
+            payerOrgId=payer_org_id,
+            payeeOrgId=payee_org_id,
+            amount=payload.amount,
+            currency=payload.currency,
+            status=PaymentStatus.pending,
+            fxQuoteId=payload.fxQuoteId,
+            createdAt=_now(),
+            completedAt=None,
+            failureReason=None,
+        )
+        payments[payment_id] = payment
+
+        # Update deal status to reflect partial payment (deposit to escrow)
+        deal.status = DealStatus.paid_partially
+        deals_service.deals[deal.id] = deal
 
     # Notify payee org about escrow deposit
     notifications_service.push_for_org(
@@ -177,23 +308,40 @@ def release_payment(payment_id: str) -> Payment:
     payer_wallet = _ensure_wallet(payment.payerOrgId, payment.currency)
     payee_wallet = _ensure_wallet(payment.payeeOrgId, payment.currency)
 
-    if payer_wallet.blockedAmount < payment.amount:
-        raise ValueError("insufficient_blocked")
-
-    # Move from blocked to payee balance
-    payer_wallet.blockedAmount -= payment.amount
-    wallets[payer_wallet.id] = payer_wallet
-
-    payee_wallet.balance += payment.amount
-    wallets[payee_wallet.id] = payee_wallet
-
-    payment.status = PaymentStatus.completed
-    payment.completedAt = _now()
-    payments[payment.id] = payment
-
-    # Mark deal as fully paid (MVP)
-    deal.status = DealStatus.paid
-    deals_service.deals[deal.id] = deal
+    # Move from blocked to payee balance. Payment and deal status are
+    # re-checked under the deal and wallet locks so two concurrent releases
+    # cannot both pay out, and the deal is marked paid in the same section.
+    with (
+        deals_service.deal_lock(deal.id),
+        ledger.lock_wallets(payer_wallet.id, payee_wallet.id),
+        transaction(),
+    ):
+        payment = payments.get(payment_id)
+        if not payment or payment.status != PaymentStatus.pending:
+            raise ValueError("invalid_payment_status")
+        deal = deals_service.deals.get(deal.id)
+        if not deal or deal.status != DealStatus.paid_partially:
+            raise ValueError("invalid_deal_status_for_release")
+
+        amount_minor = ledger.to_minor(payment.amount)
+        ledger.post_locked(
+            f"{payment.id}:release",
+            [
+                Posting(payer_wallet.id, LedgerAccount.blocked, -amount_minor),
+                Posting(payee_wallet.id, LedgerAccount.available, amount_minor),
+            ],
+            insufficient_error="insufficient_blocked",
+        )
+        _sync_wallet(payer_wallet.id)
+        _sync_wallet(payee_wallet.id)
+
+        payment.status = PaymentStatus.completed
+        payment.completedAt = _now()
+        payments[payment.id] = payment
+
+        # Mark deal as fully paid (MVP)
+        deal.status = DealStatus.paid
+        deals_service.deals[deal.id] = deal
 
     return payment
 
@@ -203,19 +351,28 @@ def list_payments(
     role: Optional[str] = None,
     status: Optional[PaymentStatus] = None,
     deal_id: Optional[str] = None,
-) -> List[Payment]:
-    result: List[Payment] = []
-    for p in payments.values():
-        if deal_id and p.dealId != deal_id:
-            continue
-        if role == "payer" and p.payerOrgId != org_id:
-            continue
-        if role == "payee" and p.payeeOrgId != org_id:
-            continue
-        if status and p.status != status:
-            continue
-        result.append(p)
-    return result
+    after: Optional[SortKey] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Payment], bool]:
+    """
+    One page of payments in (createdAt, id) order, plus whether more follow.
+    Served from payments_by_party; only the page is loaded.
+    """
+    ids = payments_by_party.page(
+        {
+            "payer": [org_id] if role == "payer" else None,
+            "payee": [org_id] if role == "payee" else None,
+            "status": [status.value] if status else None,
+            "dealId": [deal_id] if deal_id else None,
+        },
+        after=after,
+        limit=limit + 1 if limit is not None else None,
+    )
+    has_more = limit is not None and len(ids) > limit
+    if has_more:
+        ids = ids[:limit]
+    items = (payments.get(payment_id) for payment_id in ids)
+    return [p for p in items if p is not None], has_more
 
 
 def get_payment(payment_id: str) -> Optional[Payment]:
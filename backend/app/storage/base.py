@@ -0,0 +1,184 @@
+# app/storage/base.py
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import (
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from app.storage.index import RepositoryIndex
+
+V = TypeVar("V")
+I = TypeVar("I", bound=RepositoryIndex)
+
+# position of a record in a timeline: (createdAt, id), as app.pagination.sort_key
+TimelineKey = Tuple[datetime, str]
+
+
+class Repository(MutableMapping[str, V]):
+    """
+    Keyed collection of records of one type (RFQs, wallets, chats...).
+
+    Services use it like a dict: `repo[id] = obj`, `repo.get(id)`,
+    `repo.values()`, `repo.clear()`. Objects returned by a persistent backend
+    are copies, so every mutation has to be written back with `repo[id] = obj`.
+
+    Secondary indexes registered with `add_index()` are kept in sync on
+    every write, delete and clear. A backend shared between workers also
+    applies other workers' writes, through `refresh()`, which every index
+    read calls.
+    """
+
+    name: str
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._indexes: List[RepositoryIndex] = []
+
+    def add_index(self, index: I) -> I:
+        index.rebuild(self.items())
+        index.bind(self.refresh)
+        self._indexes.append(index)
+        return index
+
+    def refresh(self) -> None:
+        """Bring the indexes up to date with writes made elsewhere (no-op here)."""
+
+    def get(self, key: str, default: Optional[V] = None) -> Optional[V]:  # type: ignore[override]
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, V]:
+        """Records for the given keys that exist (one query with sqlite)."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def __setitem__(self, key: str, value: V) -> None:
+        self._put(key, value)
+        self._indexed([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, V]]) -> None:
+        """Write several records at once (one transaction with sqlite)."""
+        items = list(items)
+        self._put_many(items)
+        self._indexed(items)
+
+    def __delitem__(self, key: str) -> None:
+        self._delete(key)
+        self._unindexed(key)
+
+    def clear(self) -> None:
+        self._clear()
+        for index in self._indexes:
+            index.clear()
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name!r} ({len(self)} items)>"
+
+    def _indexed(self, items: List[Tuple[str, V]]) -> None:
+        for index in self._indexes:
+            for key, value in items:
+                index.update(key, value)
+
+    def _unindexed(self, key: str) -> None:
+        for index in self._indexes:
+            index.discard(key)
+
+    # subclasses implement __getitem__, __iter__, __len__, _put, _delete,
+    # _clear and usually override values()/items()
+
+    @abstractmethod
+    def _put(self, key: str, value: V) -> None:
+        ...
+
+    def _put_many(self, items: List[Tuple[str, V]]) -> None:
+        for key, value in items:
+            self._put(key, value)
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def _clear(self) -> None:
+        ...
+
+
+class Timeline(ABC, Generic[V]):
+    """
+    Records grouped by owner (a chat's messages, a user's notifications),
+    stored one per row and kept in (createdAt, id) order within the owner.
+
+    Unlike a Repository value holding the whole list, an append or an
+    update writes one record, and a page reads only the records it returns:
+    `scan()` walks an owner's range between two keys. Records need `id` and
+    `createdAt` attributes. As with repositories, objects returned by a
+    persistent backend are copies; write changes back with `put()`.
+    """
+
+    name: str
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def put(self, owner: str, item: V) -> None:
+        self.put_many([(owner, item)])
+
+    @abstractmethod
+    def put_many(self, items: Iterable[Tuple[str, V]]) -> None:
+        """Insert or replace (owner, record) pairs (one transaction with sqlite)."""
+
+    def get(self, owner: str, item_id: str) -> Optional[V]:
+        return self.get_many([(owner, item_id)]).get((owner, item_id))
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], V]:
+        """Records for the given (owner, id) pairs that exist, in one query."""
+
+    def last(self, owner: str) -> Optional[V]:
+        return next(self.scan(owner, reverse=True, limit=1), None)
+
+    @abstractmethod
+    def scan(
+        self,
+        owner: str,
+        after: Optional[TimelineKey] = None,
+        before: Optional[TimelineKey] = None,
+        reverse: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[V]:
+        """
+        Records of `owner` strictly between `after` and `before`, oldest
+        first (newest first with `reverse`), at most `limit`. Read lazily
+        in chunks, so a caller that stops early reads little.
+        """
+
+    @abstractmethod
+    def delete_many(self, owner: str, item_ids: Iterable[str]) -> None:
+        ...
+
+    @abstractmethod
+    def owners(self) -> List[str]:
+        """Owners with at least one record."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name!r}>"
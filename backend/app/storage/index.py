@@ -0,0 +1,331 @@
+# app/storage/index.py
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+
+class RepositoryIndex:
+    """
+    Base of the indexes `Repository.add_index()` keeps current through
+    update() / discard() / clear() / rebuild().
+
+    Read methods call `self.refresh()` first. The repository binds it to
+    its change feed: with a backend shared between workers, an index then
+    also reflects what other workers wrote. It is a no-op for the in-memory
+    backend. Never call it while holding the index's own lock - it applies
+    updates.
+    """
+
+    def refresh(self) -> None:
+        pass
+
+    def bind(self, refresh: Callable[[], None]) -> None:
+        self.refresh = refresh  # type: ignore[method-assign]
+
+
+class Index(RepositoryIndex):
+    """
+    Secondary index over a repository: key -> ids of records filed under it.
+
+    `key_func(record)` returns every key a record belongs to, e.g.
+    ("buyer", org_id, None) and ("buyer", org_id, status). The repository
+    calls `update()` on every write, so a status change moves the record to
+    its new buckets. Ids inside a bucket keep insertion order.
+    """
+
+    def __init__(self, key_func: Callable[[Any], Iterable[Hashable]]) -> None:
+        self._key_func = key_func
+        self._ids_by_key: Dict[Hashable, Dict[str, None]] = {}
+        self._keys_by_id: Dict[str, Tuple[Hashable, ...]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, record_id: str, record: Any) -> None:
+        keys = tuple(dict.fromkeys(self._key_func(record)))
+        with self._lock:
+            old = self._keys_by_id.get(record_id, ())
+            if set(old) == set(keys):
+                return
+            for key in old:
+                if key not in keys:
+                    self._remove(key, record_id)
+            for key in keys:
+                if key not in old:
+                    self._ids_by_key.setdefault(key, {})[record_id] = None
+            if keys:
+                self._keys_by_id[record_id] = keys
+            else:
+                self._keys_by_id.pop(record_id, None)
+
+    def discard(self, record_id: str) -> None:
+        with self._lock:
+            for key in self._keys_by_id.pop(record_id, ()):
+                self._remove(key, record_id)
+
+    def ids(self, key: Hashable) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return list(self._ids_by_key.get(key, ()))
+
+    def first(self, key: Hashable) -> Optional[str]:
+        self.refresh()
+        with self._lock:
+            bucket = self._ids_by_key.get(key)
+            if not bucket:
+                return None
+            return next(iter(bucket))
+
+    def contains(self, key: Hashable, record_id: str) -> bool:
+        self.refresh()
+        with self._lock:
+            return record_id in self._ids_by_key.get(key, ())
+
+    def count(self, key: Hashable) -> int:
+        self.refresh()
+        with self._lock:
+            return len(self._ids_by_key.get(key, ()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids_by_key.clear()
+            self._keys_by_id.clear()
+
+    def rebuild(self, items: Iterable[Tuple[str, Any]]) -> None:
+        self.clear()
+        for record_id, record in items:
+            self.update(record_id, record)
+
+    def _remove(self, key: Hashable, record_id: str) -> None:
+        bucket = self._ids_by_key.get(key)
+        if bucket is None:
+            return
+        bucket.pop(record_id, None)
+        if not bucket:
+            del self._ids_by_key[key]
+
+
+class FacetIndex(RepositoryIndex):
+    """
+    Posting sets for faceted filtering and counting.
+
+    `facets(record)` returns {facet: value} (None values are skipped);
+    every (facet, value) keeps the set of ids having it. Filters are
+    intersections of those sets and facet counts are set intersections
+    with the result, so neither touches records outside the postings.
+    `sort_key(record)` is kept for ordering results without loading them.
+    `version` changes on every write, for caching query results.
+    """
+
+    def __init__(
+        self,
+        facets: Callable[[Any], Mapping[str, Hashable]],
+        sort_key: Callable[[Any], Any],
+    ) -> None:
+        self._facets_func = facets
+        self._sort_key_func = sort_key
+        self._postings: Dict[str, Dict[Hashable, Set[str]]] = {}
+        self._values: Dict[str, Dict[str, Hashable]] = {}
+        self._sort_keys: Dict[str, Any] = {}
+        # (sort key, id), sorted; records mostly arrive in order so this appends
+        self._order: List[Tuple[Any, str]] = []
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def update(self, record_id: str, record: Any) -> None:
+        values = {f: v for f, v in self._facets_func(record).items() if v is not None}
+        key = self._sort_key_func(record)
+        with self._lock:
+            self._remove(record_id)
+            self._version += 1
+            self._values[record_id] = values
+            self._sort_keys[record_id] = key
+            if not self._order or self._order[-1] < (key, record_id):
+                self._order.append((key, record_id))
+            else:
+                insort(self._order, (key, record_id))
+            for facet, value in values.items():
+                self._postings.setdefault(facet, {}).setdefault(value, set()).add(record_id)
+
+    def discard(self, record_id: str) -> None:
+        with self._lock:
+            self._remove(record_id)
+            self._version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._values.clear()
+            self._sort_keys.clear()
+            self._order.clear()
+            self._version += 1
+
+    def rebuild(self, items: Iterable[Tuple[str, Any]]) -> None:
+        self.clear()
+        for record_id, record in items:
+            self.update(record_id, record)
+
+    @property
+    def version(self) -> int:
+        self.refresh()
+        return self._version
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._values)
+
+    def values(self, record_id: str) -> Dict[str, Hashable]:
+        self.refresh()
+        with self._lock:
+            return dict(self._values.get(record_id, {}))
+
+    def select(self, filters: Mapping[str, Optional[Collection[Hashable]]]) -> Set[str]:
+        """
+        Ids matching every filter; a filter matches any of its values.
+        Filters that are None are ignored; with none left, all ids.
+        """
+        self.refresh()
+        with self._lock:
+            groups = []
+            for facet, wanted in filters.items():
+                if wanted is None:
+                    continue
+                postings = self._postings.get(facet, {})
+                groups.append([postings[v] for v in wanted if v in postings])
+            if not groups:
+                return set(self._values)
+            # smallest group first: the running result only shrinks
+            groups.sort(key=lambda sets: sum(len(ids) for ids in sets))
+            result = set().union(*groups[0])
+            for sets in groups[1:]:
+                if not result:
+                    break
+                result &= set().union(*sets) if len(sets) != 1 else sets[0]
+            return result
+
+    def count(self, facet: str, ids: Optional[Set[str]] = None) -> Dict[Hashable, int]:
+        """value -> number of `ids` (all records if None) having it."""
+        self.refresh()
+        with self._lock:
+            postings = self._postings.get(facet, {})
+            if ids is None:
+                counts = {value: len(members) for value, members in postings.items()}
+            else:
+                counts = {value: len(members & ids) for value, members in postings.items()}
+        return {value: n for value, n in counts.items() if n}
+
+    def sort_key(self, record_id: str) -> Any:
+        self.refresh()
+        return self._sort_keys.get(record_id)
+
+    def sorted_ids(
+        self,
+        ids: Optional[Collection[str]] = None,
+        after: Any = None,
+        limit: Optional[int] = None,
+        descending: bool = False,
+    ) -> List[str]:
+        """
+        `ids` (all if None) ordered by sort key, only those past `after`
+        (keys > after, or < after when descending).
+        """
+        self.refresh()
+        with self._lock:
+            if ids is None or len(ids) * 8 >= len(self._order):
+                # dense: walk the global order, stop once the page is full
+                match = None if ids is None else ids.__contains__
+                return self._walk(match, after, limit, descending)
+            keys = self._sort_keys
+            pairs = [(keys[i], i) for i in ids if i in keys]
+        if after is not None:
+            pairs = [pair for pair in pairs if (pair[0] < after if descending else pair[0] > after)]
+        if limit is not None and limit < len(pairs):
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            pairs = pick(limit, pairs)
+        else:
+            pairs.sort(reverse=descending)
+        return [i for _, i in pairs]
+
+    def page(
+        self,
+        filters: Mapping[str, Optional[Collection[Hashable]]],
+        after: Any = None,
+        limit: Optional[int] = None,
+        descending: bool = False,
+    ) -> List[str]:
+        """
+        sorted_ids(select(filters), ...) without building the match set
+        when the filters are broad: the order is walked and each record's
+        values checked, so a page costs about limit / selectivity steps.
+        """
+        self.refresh()
+        with self._lock:
+            active = {f: frozenset(v) for f, v in filters.items() if v is not None}
+            smallest = min(
+                (
+                    sum(len(self._postings.get(f, {}).get(v, ())) for v in wanted)
+                    for f, wanted in active.items()
+                ),
+                default=len(self._order),
+            )
+            if smallest * 8 >= len(self._order):
+                values = self._values
+
+                def match(record_id: str) -> bool:
+                    own = values[record_id]
+                    return all(own.get(f) in wanted for f, wanted in active.items())
+
+                return self._walk(match, after, limit, descending)
+        return self.sorted_ids(self.select(filters), after, limit, descending)
+
+    def _walk(
+        self,
+        match: Optional[Callable[[str], bool]],
+        after: Any,
+        limit: Optional[int],
+        descending: bool,
+    ) -> List[str]:
+        order = self._order
+        if descending:
+            end = len(order)
+            if after is not None:
+                end = bisect_left(order, after, key=lambda pair: pair[0])
+            positions = range(end - 1, -1, -1)
+        else:
+            start = 0
+            if after is not None:
+                start = bisect_right(order, after, key=lambda pair: pair[0])
+            positions = range(start, len(order))
+        result = []
+        for i in positions:
+            record_id = order[i][1]
+            if match is None or match(record_id):
+                result.append(record_id)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def _remove(self, record_id: str) -> None:
+        for facet, value in self._values.pop(record_id, {}).items():
+            members = self._postings[facet][value]
+            members.discard(record_id)
+            if not members:
+                del self._postings[facet][value]
+        key = self._sort_keys.pop(record_id, None)
+        if key is not None:
+            i = bisect_left(self._order, (key, record_id))
+            if i < len(self._order) and self._order[i] == (key, record_id):
+                del self._order[i]
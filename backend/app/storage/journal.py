@@ -0,0 +1,132 @@
+# app/storage/journal.py
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+class Journal:
+    """
+    Append-only JSON-lines journal.
+
+    Every mutation is one line. Lines are flushed to the OS immediately and
+    fsync'ed in batches (every `fsync_batch` records or `fsync_interval`
+    seconds, whichever comes first). `compact()` lets the owner dump a full
+    snapshot and truncate the journal.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fsync_batch: int = 32,
+        fsync_interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.fsync_batch = max(1, fsync_batch)
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._fh = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        # records appended since last compaction (including replayed ones)
+        self.records = 0
+
+    def replay(self) -> Iterator[dict]:
+        """
+        Yield journal records in write order. A torn last line (crash in the
+        middle of a write) is ignored.
+        """
+        if not self.path.exists():
+            return
+        with self.path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self.records += 1
+                yield record
+
+    def append(self, *records: dict) -> None:
+        if not records:
+            return
+        payload = "".join(
+            json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records
+        )
+        with self._lock:
+            fh = self._open()
+            fh.write(payload)
+            fh.flush()
+            self.records += len(records)
+            self._unsynced += len(records)
+            now = time.monotonic()
+            if (
+                self._unsynced >= self.fsync_batch
+                or now - self._last_sync >= self.fsync_interval
+            ):
+                self._fsync(now)
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._fh is not None and self._unsynced:
+                self._fsync(time.monotonic())
+
+    def compact(self, write_snapshot: Callable[[], None]) -> None:
+        """
+        Write a snapshot via `write_snapshot` and start an empty journal.
+
+        Records are idempotent upserts, so a crash between the snapshot and
+        the truncate only means some records are replayed twice.
+        """
+        with self._lock:
+            if self._fh is not None:
+                self._fsync(time.monotonic())
+            write_snapshot()
+            self._close()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("w", encoding="utf-8") as fh:
+                fh.flush()
+                os.fsync(fh.fileno())
+            self.records = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None and self._unsynced:
+                self._fsync(time.monotonic())
+            self._close()
+
+    # --- internal ---
+
+    def _open(self):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self.path.open("a", encoding="utf-8")
+        return self._fh
+
+    def _close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def _fsync(self, now: float) -> None:
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = now
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Replace `path` with `text` so readers never see a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as fh:
+        fh.write(text)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
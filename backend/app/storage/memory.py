@@ -0,0 +1,121 @@
+# app/storage/memory.py
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.storage.base import Repository, Timeline, TimelineKey, V
+
+
+class InMemoryRepository(Repository[V]):
+    """Process-local repository backed by a plain dict (default backend)."""
+
+    def __init__(self, name: str, value_type: Any = None) -> None:
+        super().__init__(name)
+        self._data: Dict[str, V] = {}
+
+    def get(self, key: str, default: Optional[V] = None) -> Optional[V]:  # type: ignore[override]
+        return self._data.get(key, default)
+
+    def __getitem__(self, key: str) -> V:
+        return self._data[key]
+
+    def _put(self, key: str, value: V) -> None:
+        self._data[key] = value
+
+    def _delete(self, key: str) -> None:
+        del self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def values(self):  # type: ignore[override]
+        return self._data.values()
+
+    def items(self):  # type: ignore[override]
+        return self._data.items()
+
+    def _clear(self) -> None:
+        self._data.clear()
+
+
+def _key(item: Any) -> TimelineKey:
+    return item.createdAt, item.id
+
+
+class InMemoryTimeline(Timeline[V]):
+    """Process-local timeline: per owner, the sorted keys and id -> record."""
+
+    def __init__(self, name: str, value_type: Any = None) -> None:
+        super().__init__(name)
+        self._keys: Dict[str, List[TimelineKey]] = {}
+        self._items: Dict[str, Dict[str, V]] = {}
+        self._lock = threading.Lock()
+
+    def put_many(self, items: Iterable[Tuple[str, V]]) -> None:
+        with self._lock:
+            for owner, item in items:
+                keys = self._keys.setdefault(owner, [])
+                by_id = self._items.setdefault(owner, {})
+                old = by_id.get(item.id)
+                if old is not None and _key(old) != _key(item):
+                    del keys[bisect_left(keys, _key(old))]
+                    old = None
+                if old is None:
+                    insort(keys, _key(item))
+                by_id[item.id] = item
+
+    def get_many(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], V]:
+        found = {}
+        for owner, item_id in keys:
+            item = self._items.get(owner, {}).get(item_id)
+            if item is not None:
+                found[(owner, item_id)] = item
+        return found
+
+    def scan(
+        self,
+        owner: str,
+        after: Optional[TimelineKey] = None,
+        before: Optional[TimelineKey] = None,
+        reverse: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[V]:
+        with self._lock:
+            keys = self._keys.get(owner, [])
+            by_id = self._items.get(owner, {})
+            start = bisect_right(keys, after) if after is not None else 0
+            end = bisect_left(keys, before) if before is not None else len(keys)
+            if reverse:
+                selected = keys[max(start, end - limit) if limit is not None else start : end]
+                selected.reverse()
+            else:
+                selected = keys[start : min(end, start + limit) if limit is not None else end]
+            items = [by_id[item_id] for _, item_id in selected]
+        return iter(items)
+
+    def delete_many(self, owner: str, item_ids: Iterable[str]) -> None:
+        with self._lock:
+            by_id = self._items.get(owner, {})
+            for item_id in item_ids:
+                by_id.pop(item_id, None)
+            self._keys[owner] = [key for key in self._keys.get(owner, []) if key[1] in by_id]
+            if not by_id:
+                self._keys.pop(owner, None)
+                self._items.pop(owner, None)
+
+    def owners(self) -> List[str]:
+        with self._lock:
+            return list(self._keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self._items.clear()
@@ -0,0 +1,91 @@
+# app/storage/registry.py
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict, Optional
+
+from app import config
+from app.storage.base import Repository, Timeline
+from app.storage.memory import InMemoryRepository, InMemoryTimeline
+from app.storage.sqlite import ConnectionPool, SQLiteRepository, SQLiteTimeline
+
+_repositories: Dict[str, Repository] = {}
+_timelines: Dict[str, Timeline] = {}
+_pool: Optional[ConnectionPool] = None
+
+
+def backend() -> str:
+    return config.STORAGE_BACKEND
+
+
+def is_persistent() -> bool:
+    """True if repositories survive a restart and are shared between workers."""
+    return backend() == "sqlite"
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(config.SQLITE_PATH, size=config.SQLITE_POOL_SIZE)
+    return _pool
+
+
+def transaction() -> ContextManager[None]:
+    """
+    Make a read-modify-write of stored values atomic across workers (sqlite:
+    BEGIN IMMEDIATE ... COMMIT). Process-local locks still serialize the
+    threads of one worker; take them first, then the transaction.
+    The in-memory backend has a single process, so this is a no-op there.
+    """
+    if is_persistent():
+        return _get_pool().transaction()
+    return nullcontext()
+
+
+def repository(name: str, value_type: Any) -> Repository:
+    """
+    Return the repository `name` for the configured backend.
+
+    `value_type` is what the repository stores (a pydantic model or e.g.
+    `List[Message]`); the sqlite backend uses it for (de)serialization.
+    """
+    repo = _repositories.get(name)
+    if repo is not None:
+        return repo
+
+    kind = backend()
+    if kind == "memory":
+        repo = InMemoryRepository(name, value_type)
+    elif kind == "sqlite":
+        repo = SQLiteRepository(name, value_type, _get_pool())
+    else:
+        raise ValueError(f"unknown storage backend: {kind!r}")
+
+    _repositories[name] = repo
+    return repo
+
+
+def timeline(name: str, value_type: Any) -> Timeline:
+    """
+    Return the timeline `name` (per-owner records in (createdAt, id)
+    order, one row each) for the configured backend. `value_type` is the
+    record model.
+    """
+    tl = _timelines.get(name)
+    if tl is not None:
+        return tl
+
+    kind = backend()
+    if kind == "memory":
+        tl = InMemoryTimeline(name, value_type)
+    elif kind == "sqlite":
+        tl = SQLiteTimeline(name, value_type, _get_pool())
+    else:
+        raise ValueError(f"unknown storage backend: {kind!r}")
+
+    _timelines[name] = tl
+    return tl
+
+
+def all_repositories() -> Dict[str, Repository]:
+    return dict(_repositories)
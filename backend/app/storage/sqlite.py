@@ -0,0 +1,432 @@
+# app/storage/sqlite.py
+from __future__ import annotations
+
+import json
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from app.storage.base import I, Repository, Timeline, TimelineKey, V
+
+_TABLE_NAME_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by all repositories.
+
+    Connections are opened lazily (up to `size`), in WAL mode so readers in
+    other threads/processes are not blocked by a writer.
+
+    `transaction()` binds one connection to the calling thread; repository
+    calls made inside it run on that connection.
+    """
+
+    def __init__(self, path: Path, size: int = 8, busy_timeout: float = 30.0) -> None:
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        # committed-data reads (index refresh) have their own connections:
+        # they may run inside a transaction and must not wait for a slot
+        # held by a writer that is itself waiting for that transaction
+        self._read_idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._read_slots = threading.BoundedSemaphore(max(1, size))
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(self.path),
+            timeout=self.busy_timeout,
+            isolation_level=None,      # autocommit, explicit BEGIN when needed
+            check_same_thread=False,   # connections move between threadpool workers
+            cached_statements=256,     # prepared statement cache per connection
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+
+    @contextmanager
+    def _checkout(
+        self,
+        slots: threading.BoundedSemaphore,
+        idle: "queue.LifoQueue[sqlite3.Connection]",
+    ) -> Iterator[sqlite3.Connection]:
+        slots.acquire()
+        try:
+            try:
+                conn = idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                idle.put(conn)
+        finally:
+            slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        tx = getattr(self._local, "tx", None)
+        if tx is not None:
+            yield tx
+            return
+        with self._checkout(self._slots, self._idle) as conn:
+            yield conn
+
+    def committed(self) -> ContextManager[sqlite3.Connection]:
+        """
+        Connection for reads of committed data only, also from inside this
+        thread's transaction (WAL readers never wait for writers).
+        """
+        return self._checkout(self._read_slots, self._read_idle)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Read-modify-write that holds across processes: BEGIN IMMEDIATE takes
+        the database write lock up front, so a second writer (in this or
+        another process) waits for COMMIT instead of overwriting what was
+        read. Nested blocks join the outer transaction.
+        """
+        if getattr(self._local, "tx", None) is not None:
+            yield
+            return
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.tx = conn
+            try:
+                yield
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._local.tx = None
+
+    def close(self) -> None:
+        for idle in (self._idle, self._read_idle):
+            while True:
+                try:
+                    conn = idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+
+
+class SQLiteRepository(Repository[V]):
+    """
+    Repository stored as (id, json) rows in its own SQLite table.
+
+    Values are (de)serialized with pydantic, so `value_type` may be a model
+    or any type pydantic understands (e.g. `List[Message]`). Iteration follows
+    insertion order (rowid); updates keep the original position.
+
+    Triggers record every insert/update/delete in a change feed table
+    (id -> latest change seq). Indexes are maintained from that feed by
+    `refresh()` only, including this worker's own writes. So an index
+    reflects every worker's writes, in commit order, as of its last read.
+    """
+
+    def __init__(self, name: str, value_type: Any, pool: ConnectionPool) -> None:
+        if not _TABLE_NAME_RE.match(name):
+            raise ValueError(f"invalid repository name: {name!r}")
+        super().__init__(name)
+        self._adapter = TypeAdapter(value_type)
+        self._pool = pool
+        self._feed_lock = threading.Lock()
+        self._seen = 0  # last change seq applied to the indexes
+
+        table = f'"repo_{name}"'
+        changes = f'"changes_{name}"'
+        # SQL text is constant per repository, so sqlite3 reuses the
+        # prepared statements from the connection cache
+        self._sql_get = f"SELECT value FROM {table} WHERE id = ?"
+        self._sql_get_many = (
+            f"SELECT id, value FROM {table} WHERE id IN (SELECT value FROM json_each(?))"
+        )
+        self._sql_has = f"SELECT 1 FROM {table} WHERE id = ?"
+        self._sql_put = (
+            f"INSERT INTO {table} (id, value) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET value = excluded.value"
+        )
+        self._sql_del = f"DELETE FROM {table} WHERE id = ?"
+        self._sql_ids = f"SELECT id FROM {table} ORDER BY rowid"
+        self._sql_items = f"SELECT id, value FROM {table} ORDER BY rowid"
+        self._sql_len = f"SELECT COUNT(*) FROM {table}"
+        self._sql_clear = f"DELETE FROM {table}"
+        self._sql_feed_position = f"SELECT COALESCE(MAX(seq), 0) FROM {changes}"
+        # records of one batch are applied in rowid (= insertion) order, so
+        # index buckets keep insertion order even for records updated since
+        self._sql_changes = (
+            f"SELECT c.seq, c.id, r.value FROM {changes} c "
+            f"LEFT JOIN {table} r ON r.id = c.id WHERE c.seq > ? ORDER BY r.rowid"
+        )
+
+        with self._pool.connection() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            # one row per id: a new change of a record replaces its old one
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {changes} ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE)"
+            )
+            for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                conn.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "feed_{name}_{event.lower()}" '
+                    f"AFTER {event} ON {table} BEGIN "
+                    f"DELETE FROM {changes} WHERE id = {row}.id; "
+                    f"INSERT INTO {changes} (id) VALUES ({row}.id); END"
+                )
+
+    # --- indexes ---
+
+    def add_index(self, index: I) -> I:
+        with self._feed_lock:
+            if not self._indexes:
+                # feed position first: changes racing with the rebuild are
+                # applied (again) by the next refresh()
+                with self._pool.committed() as conn:
+                    self._seen = conn.execute(self._sql_feed_position).fetchone()[0]
+            return super().add_index(index)
+
+    def refresh(self) -> None:
+        if not self._indexes:
+            return
+        with self._feed_lock:
+            with self._pool.committed() as conn:
+                rows = conn.execute(self._sql_changes, (self._seen,)).fetchall()
+            for seq, key, raw in rows:  # tombstones (no row) sort first
+                if raw is None:
+                    for index in self._indexes:
+                        index.discard(key)
+                else:
+                    value = self._load(raw)
+                    for index in self._indexes:
+                        index.update(key, value)
+            if rows:
+                self._seen = max(row[0] for row in rows)
+
+    def _indexed(self, items: List[Tuple[str, V]]) -> None:
+        pass  # the write is in the feed; refresh() picks it up after commit
+
+    def _unindexed(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        self._clear()  # leaves a tombstone per record in the feed
+
+    def _load(self, raw: str) -> V:
+        return self._adapter.validate_json(raw)
+
+    def _dump(self, value: V) -> str:
+        return self._adapter.dump_json(value).decode("utf-8")
+
+    def _fetchall(self, sql: str) -> List[Tuple]:
+        with self._pool.connection() as conn:
+            return conn.execute(sql).fetchall()
+
+    def get(self, key: str, default: Optional[V] = None) -> Optional[V]:  # type: ignore[override]
+        with self._pool.connection() as conn:
+            row = conn.execute(self._sql_get, (key,)).fetchone()
+        if row is None:
+            return default
+        return self._load(row[0])
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, V]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(self._sql_get_many, (json.dumps(list(keys)),)).fetchall()
+        return {key: self._load(raw) for key, raw in rows}
+
+    def __getitem__(self, key: str) -> V:
+        with self._pool.connection() as conn:
+            row = conn.execute(self._sql_get, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._load(row[0])
+
+    def _put(self, key: str, value: V) -> None:
+        raw = self._dump(value)
+        with self._pool.connection() as conn:
+            conn.execute(self._sql_put, (key, raw))
+
+    def _put_many(self, items: List[Tuple[str, V]]) -> None:
+        rows = [(key, self._dump(value)) for key, value in items]
+        with self._pool.transaction(), self._pool.connection() as conn:
+            conn.executemany(self._sql_put, rows)
+
+    def _delete(self, key: str) -> None:
+        with self._pool.connection() as conn:
+            cur = conn.execute(self._sql_del, (key,))
+        if cur.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self._pool.connection() as conn:
+            return conn.execute(self._sql_has, (key,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([row[0] for row in self._fetchall(self._sql_ids)])
+
+    def __len__(self) -> int:
+        return self._fetchall(self._sql_len)[0][0]
+
+    def values(self) -> List[V]:  # type: ignore[override]
+        return [self._load(raw) for _, raw in self._fetchall(self._sql_items)]
+
+    def items(self) -> List[Tuple[str, V]]:  # type: ignore[override]
+        return [(key, self._load(raw)) for key, raw in self._fetchall(self._sql_items)]
+
+    def _clear(self) -> None:
+        with self._pool.connection() as conn:
+            conn.execute(self._sql_clear)
+
+
+def _micros(dt: datetime) -> int:
+    # createdAt as an integer, so rows sort by time whatever the isoformat
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+class SQLiteTimeline(Timeline[V]):
+    """
+    Timeline stored as one row per record in its own SQLite table, keyed by
+    (owner, createdAt, id): a page is a range scan of the primary key, an
+    append or update writes one row. A unique (owner, id) index serves
+    lookups by id.
+
+    A repository of the same name holding whole lists (the former layout)
+    is moved into the table once, on first open, and dropped.
+    """
+
+    SCAN_CHUNK = 200
+
+    def __init__(self, name: str, value_type: Any, pool: ConnectionPool) -> None:
+        if not _TABLE_NAME_RE.match(name):
+            raise ValueError(f"invalid timeline name: {name!r}")
+        super().__init__(name)
+        self._adapter = TypeAdapter(value_type)
+        self._pool = pool
+
+        table = f'"timeline_{name}"'
+        self._sql_put = (
+            f"INSERT INTO {table} (owner, created_at, id, value) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(owner, id) DO UPDATE SET "
+            "created_at = excluded.created_at, value = excluded.value"
+        )
+        self._sql_get_many = (
+            f"SELECT owner, id, value FROM {table} WHERE (owner, id) IN "
+            "(SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?))"
+        )
+        # the bounds are always bound (open ends as sentinels), so there is
+        # one statement per direction
+        self._sql_scan = {
+            reverse: (
+                f"SELECT created_at, id, value FROM {table} WHERE owner = ? "
+                "AND (created_at, id) > (?, ?) AND (created_at, id) < (?, ?) "
+                f"ORDER BY created_at {order}, id {order} LIMIT ?"
+            )
+            for reverse, order in ((False, "ASC"), (True, "DESC"))
+        }
+        self._sql_del = f"DELETE FROM {table} WHERE owner = ? AND id = ?"
+        self._sql_owners = f"SELECT DISTINCT owner FROM {table}"
+        self._sql_clear = f"DELETE FROM {table}"
+
+        with self._pool.transaction(), self._pool.connection() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "owner TEXT NOT NULL, created_at INTEGER NOT NULL, id TEXT NOT NULL, "
+                "value TEXT NOT NULL, PRIMARY KEY (owner, created_at, id)) WITHOUT ROWID"
+            )
+            conn.execute(
+                f'CREATE UNIQUE INDEX IF NOT EXISTS "timeline_{name}_id" ON {table} (owner, id)'
+            )
+            self._migrate(conn, value_type)
+
+    def _migrate(self, conn: sqlite3.Connection, value_type: Any) -> None:
+        legacy = f"repo_{self.name}"
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (legacy,)
+        ).fetchone()
+        if exists is None:
+            return
+        lists = TypeAdapter(List[value_type])
+        rows = conn.execute(f'SELECT id, value FROM "{legacy}"').fetchall()
+        conn.executemany(
+            self._sql_put,
+            [self._row(owner, item) for owner, raw in rows for item in lists.validate_json(raw)],
+        )
+        conn.execute(f'DROP TABLE "{legacy}"')  # its change feed triggers go with it
+        conn.execute(f'DROP TABLE IF EXISTS "changes_{self.name}"')
+
+    def _load(self, raw: str) -> V:
+        return self._adapter.validate_json(raw)
+
+    def _row(self, owner: str, item: V) -> Tuple[str, int, str, str]:
+        raw = self._adapter.dump_json(item).decode("utf-8")
+        return owner, _micros(item.createdAt), item.id, raw  # type: ignore[attr-defined]
+
+    def put_many(self, items: Iterable[Tuple[str, V]]) -> None:
+        rows = [self._row(owner, item) for owner, item in items]
+        with self._pool.transaction(), self._pool.connection() as conn:
+            conn.executemany(self._sql_put, rows)
+
+    def get_many(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], V]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(self._sql_get_many, (json.dumps(list(keys)),)).fetchall()
+        return {(owner, item_id): self._load(raw) for owner, item_id, raw in rows}
+
+    def scan(
+        self,
+        owner: str,
+        after: Optional[TimelineKey] = None,
+        before: Optional[TimelineKey] = None,
+        reverse: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[V]:
+        low = (_micros(after[0]), after[1]) if after is not None else (-(2**63), "")
+        high = (_micros(before[0]), before[1]) if before is not None else (2**63 - 1, "")
+        sql = self._sql_scan[reverse]
+        left = limit
+        while left is None or left > 0:
+            chunk = self.SCAN_CHUNK if left is None else min(left, self.SCAN_CHUNK)
+            with self._pool.connection() as conn:
+                rows = conn.execute(sql, (owner, *low, *high, chunk)).fetchall()
+            for _, _, raw in rows:
+                yield self._load(raw)
+            if len(rows) < chunk:
+                return
+            if left is not None:
+                left -= len(rows)
+            # continue after the last row read, in the scan direction
+            if reverse:
+                high = rows[-1][:2]
+            else:
+                low = rows[-1][:2]
+
+    def delete_many(self, owner: str, item_ids: Iterable[str]) -> None:
+        rows = [(owner, item_id) for item_id in item_ids]
+        with self._pool.transaction(), self._pool.connection() as conn:
+            conn.executemany(self._sql_del, rows)
+
+    def owners(self) -> List[str]:
+        with self._pool.connection() as conn:
+            return [row[0] for row in conn.execute(self._sql_owners).fetchall()]
+
+    def clear(self) -> None:
+        with self._pool.connection() as conn:
+            conn.execute(self._sql_clear)
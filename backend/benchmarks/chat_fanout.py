@@ -0,0 +1,190 @@
+"""
+Chat fan-out benchmark over real WebSocket connections.
+
+    cd backend && python -m benchmarks.chat_fanout [--connections 1000] [--messages 300]
+
+Serves the app with uvicorn on a local port, opens N /chats/{id}/ws
+connections with the `websockets` client, posts messages over HTTP from a
+worker thread and reports post-to-delivery latency percentiles and the
+delivered frame rate. Client and server share one process (and the GIL),
+so the numbers are a lower bound for a dedicated server.
+
+Needs the `websockets` package (pip install websockets); uvicorn also uses
+it for its WebSocket support.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import tempfile
+import threading
+import time
+from typing import List, Tuple
+
+os.environ.setdefault("SILKFLOW_DATA_DIR", tempfile.mkdtemp(prefix="silkflow-bench-"))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+try:
+    from websockets.asyncio.client import connect
+except ImportError:  # pragma: no cover
+    raise SystemExit("this benchmark needs the websockets package: pip install websockets")
+
+from app.main import app  # noqa: E402
+
+CONNECT_CONCURRENCY = 100
+
+
+class _Server:
+    """uvicorn in a background thread on a free local port."""
+
+    def __init__(self) -> None:
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self.port = self._sock.getsockname()[1]
+        config = uvicorn.Config(app, log_level="warning", backlog=4096)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True
+        )
+
+    def __enter__(self) -> "_Server":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def _setup_chat(http: httpx.Client) -> Tuple[str, str]:
+    """Register a user, walk an RFQ to a deal and return (chat id, token)."""
+    r = http.post("/auth/register", json={
+        "email": f"bench-{time.time_ns()}@example.com",
+        "password": "123456",
+        "name": "Bench",
+        "orgName": "BenchOrg",
+        "orgCountry": "RU",
+        "orgRole": "both",
+    })
+    r.raise_for_status()
+    data = r.json()
+    token = data["tokens"]["accessToken"]
+    org_id = data["org"]["id"]
+    http.headers["Authorization"] = f"Bearer {token}"
+
+    rfq_id = http.post("/rfqs", json={
+        "supplierOrgId": org_id,
+        "items": [{"name": "Bench item", "qty": 1, "unit": "piece"}],
+    }).json()["id"]
+    http.post(f"/rfqs/{rfq_id}/send").raise_for_status()
+    offer_id = http.post(f"/rfqs/{rfq_id}/offers", json={
+        "currency": "CNY",
+        "items": [{"name": "Bench item", "qty": 1, "unit": "piece", "price": 1, "subtotal": 1}],
+    }).json()["id"]
+    deal_id = http.post(f"/offers/{offer_id}/accept").json()["deal"]["id"]
+    chat_id = http.get("/chats", params={"dealId": deal_id}).json()[0]["id"]
+    return chat_id, token
+
+
+async def _client(
+    url: str, n: int, latencies: List[float], gate: asyncio.Semaphore, ready: asyncio.Queue
+) -> int:
+    async with gate:
+        ws = await connect(url, max_queue=None)
+    await ready.put(None)
+    received = 0
+    try:
+        while received < n:
+            frame = json.loads(await ws.recv())
+            if frame.get("type") != "message":
+                continue  # ping / typing / translation
+            latencies.append(time.perf_counter() - float(frame["data"]["text"]))
+            received += 1
+    finally:
+        await ws.close()
+    return received
+
+
+def _post_messages(http: httpx.Client, chat_id: str, n: int, interval: float) -> None:
+    for _ in range(n):
+        # the text carries the send time; client and server share the clock
+        r = http.post(f"/chats/{chat_id}/messages", json={"text": repr(time.perf_counter())})
+        r.raise_for_status()
+        time.sleep(interval)
+
+
+def _pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+async def run(
+    http: httpx.Client, ws_url: str, chat_id: str, connections: int, messages: int, interval: float
+) -> None:
+    latencies: List[float] = []
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    ready: asyncio.Queue = asyncio.Queue()
+    clients = [
+        asyncio.create_task(_client(ws_url, messages, latencies, gate, ready))
+        for _ in range(connections)
+    ]
+    for _ in range(connections):
+        await ready.get()
+
+    started = time.perf_counter()
+    poster = asyncio.create_task(
+        asyncio.to_thread(_post_messages, http, chat_id, messages, interval)
+    )
+    delivered = await asyncio.wait_for(asyncio.gather(*clients), timeout=messages * interval + 120)
+    elapsed = time.perf_counter() - started
+    await poster
+
+    total = sum(delivered)
+    print(
+        f"connections={connections:5d} messages={messages} "
+        f"delivered={total}/{connections * messages} in {elapsed:.2f}s "
+        f"({total / elapsed:,.0f} frames/s) "
+        f"p50={_pct(latencies, 0.50):.2f}ms p99={_pct(latencies, 0.99):.2f}ms "
+        f"max={max(latencies, default=0) * 1000:.2f}ms"
+    )
+
+
+def _raise_fd_limit(connections: int) -> None:
+    # every connection is two sockets here: the client's and the server's
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = 2 * connections + 256
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=0.01,
+                        help="pause between posted messages, seconds")
+    args = parser.parse_args()
+    _raise_fd_limit(args.connections)
+
+    with _Server() as server:
+        base = f"127.0.0.1:{server.port}"
+        with httpx.Client(base_url=f"http://{base}", timeout=30) as http:
+            chat_id, token = _setup_chat(http)
+            ws_url = f"ws://{base}/chats/{chat_id}/ws?access_token={token}"
+            for n in sorted({10, 100, args.connections}):
+                asyncio.run(run(http, ws_url, chat_id, n, args.messages, args.interval))
+
+
+if __name__ == "__main__":
+    main()
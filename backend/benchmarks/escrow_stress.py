@@ -0,0 +1,95 @@
+"""
+Escrow ledger stress benchmark.
+
+    cd backend && python -m benchmarks.escrow_stress [--orgs 50] [--deals 2000]
+
+Creates deals between random org pairs, then pays and releases every deal
+from a thread pool of 1/4/16 workers. After each run it checks that the
+ledger is balanced and wallet balances are conserved.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("SILKFLOW_DATA_DIR", tempfile.mkdtemp(prefix="silkflow-bench-"))
+
+from app.schemas.products import CurrencyCode  # noqa: E402
+from app.schemas.rfq_deals import (  # noqa: E402
+    OfferCreateRequest,
+    OfferItem,
+    RFQCreateRequest,
+    RFQItem,
+)
+from app.schemas.wallet_fx_payments import LedgerAccount, PaymentCreateRequest  # noqa: E402
+from app.services import ledger, rfq_deals, wallets_fx  # noqa: E402
+
+
+def _reset() -> None:
+    for repo in (
+        rfq_deals.rfqs, rfq_deals.offers, rfq_deals.orders, rfq_deals.deals,
+        wallets_fx.wallets, wallets_fx.payments, ledger.entries, ledger.balances,
+    ):
+        repo.clear()
+
+
+def _make_deal(buyer: str, supplier: str) -> str:
+    rfq = rfq_deals.create_rfq(buyer, RFQCreateRequest(
+        supplierOrgId=supplier, items=[RFQItem(name="x", qty=1, unit="piece")],
+    ))
+    rfq = rfq_deals.send_rfq(rfq.id)
+    offer = rfq_deals.create_offer_for_rfq(rfq, supplier, OfferCreateRequest(
+        currency=CurrencyCode.RUB,
+        items=[OfferItem(name="x", qty=1, unit="piece", price=1, subtotal=1)],
+    ))
+    return rfq_deals.accept_offer(offer.id)[2].id
+
+
+def run(workers: int, n_orgs: int, n_deals: int) -> None:
+    _reset()
+    rnd = random.Random(42)
+    orgs = [f"bench-org-{i}" for i in range(n_orgs)]
+    jobs = []
+    for _ in range(n_deals):
+        buyer, supplier = rnd.sample(orgs, 2)
+        jobs.append((buyer, _make_deal(buyer, supplier), round(rnd.uniform(1, 1000), 2)))
+
+    def pay_and_release(job):
+        buyer, deal_id, amount = job
+        p = wallets_fx.create_payment(buyer, PaymentCreateRequest(
+            dealId=deal_id, amount=amount, currency=CurrencyCode.RUB,
+        ))
+        wallets_fx.release_payment(p.id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(pay_and_release, jobs))
+    elapsed = time.perf_counter() - started
+
+    assert sum(e.amountMinor for e in ledger.entries.values()) == 0, "ledger unbalanced"
+    total = sum(
+        ledger.balance(w.id, LedgerAccount.available) + ledger.balance(w.id, LedgerAccount.blocked)
+        for w in wallets_fx.wallets.values()
+    )
+    expected = n_orgs * ledger.to_minor(wallets_fx.DEMO_RUB_BALANCE)
+    assert total == expected, f"balances not conserved: {total} != {expected}"
+
+    print(f"workers={workers:>3}  {n_deals} pay+release in {elapsed:.2f}s "
+          f"({n_deals / elapsed:,.0f} ops/s)  conserved=ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orgs", type=int, default=50)
+    parser.add_argument("--deals", type=int, default=2000)
+    args = parser.parse_args()
+    for workers in (1, 4, 16):
+        run(workers, args.orgs, args.deals)
+
+
+if __name__ == "__main__":
+    main()
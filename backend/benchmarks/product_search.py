@@ -0,0 +1,100 @@
+"""
+Product search benchmark: inverted index vs. the old linear scan.
+
+    cd backend && python -m benchmarks.product_search [--sizes 10000,100000,1000000] [--orgs 200]
+
+Generates a synthetic RU/EN/CN catalog spread over --orgs suppliers, builds
+app.search.TextIndex over it and times the same queries against the
+substring scan GET /products?search= used to do, per org and catalog-wide.
+1M products need a few GB of RAM; pass smaller --sizes on a laptop.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from app.search import TextIndex
+
+WORDS = [
+    "болты", "гайки", "шайбы", "винты", "оцинкованные", "нержавеющие", "труба",
+    "профиль", "лист", "кабель", "медный", "алюминиевый", "пластиковый", "насос",
+    "bolt", "nut", "washer", "steel", "stainless", "pipe", "cable", "copper",
+    "aluminium", "pump", "valve", "flange", "bearing", "motor", "sensor", "led",
+    "不锈钢管", "螺栓", "螺母", "铜线", "铝型材", "水泵", "阀门", "轴承", "电机",
+]
+SIZES = ["M6", "M8", "M10", "M12", "DN50", "DN100", "10мм", "20мм", "1/2", "3/4"]
+QUERIES = ["болт", "оцинкованные болты", "stainless pipe", "m8", "钢管", "轴承", "valve flange"]
+
+
+@dataclass
+class Item:
+    id: str
+    orgId: str
+    name: str
+    description: Optional[str]
+
+
+def _catalog(n: int, n_orgs: int, rnd: random.Random) -> List[Item]:
+    items = []
+    for i in range(n):
+        name = " ".join(rnd.sample(WORDS, 2) + [rnd.choice(SIZES)])
+        description = " ".join(rnd.choices(WORDS, k=rnd.randint(3, 12)))
+        items.append(Item(f"p{i}", f"org{rnd.randrange(n_orgs)}", name, description))
+    return items
+
+
+def _scan(items: List[Item], org_id: Optional[str], search: str) -> List[Item]:
+    # the pre-index product list: a scan with substring matching
+    found = list(items)
+    if org_id:
+        found = [p for p in found if p.orgId == org_id]
+    s = search.lower()
+    return [p for p in found if s in p.name.lower() or (p.description and s in p.description.lower())]
+
+
+def _time(func: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def run(n: int, n_orgs: int, repeat: int) -> None:
+    rnd = random.Random(42)
+    items = _catalog(n, n_orgs, rnd)
+
+    index = TextIndex(lambda p: [(p.name, 2.0), (p.description, 1.0)], scope=lambda p: p.orgId)
+    gc.collect()
+    t0 = time.perf_counter()
+    index.rebuild((p.id, p) for p in items)
+    build = time.perf_counter() - t0
+
+    print(f"\n{n} products, {n_orgs} orgs: index build {build:.1f}s ({n / build:,.0f} docs/s)")
+    print(f"{'query':<22}{'scope':>8}{'scan ms':>10}{'index ms':>10}{'hits':>8}")
+    for query in QUERIES:
+        for scope in ("org17", None):
+            scan_ms = _time(lambda: _scan(items, scope, query), max(1, repeat // 5))
+            index_ms = _time(lambda: index.search(query, scope=scope, limit=50), repeat)
+            hits = len(index.search(query, scope=scope))
+            print(f"{query:<22}{scope or 'all':>8}{scan_ms:>10.2f}{index_ms:>10.2f}{hits:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--orgs", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    for size in args.sizes.split(","):
+        run(int(size), args.orgs, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
 # backend/tests/conftest.py
 from __future__ import annotations
 
+import os
+import tempfile
+
+# Tests must not touch backend/data: point storage at a throwaway dir
+# before app modules read the config.
+os.environ.setdefault("SILKFLOW_DATA_DIR", tempfile.mkdtemp(prefix="silkflow-test-"))
+# cheap scrypt: the suite registers many users
+os.environ.setdefault("SILKFLOW_PASSWORD_SCRYPT_N", "16")
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -9,13 +18,17 @@ from app.services import (
     auth,
     orgs,
     products,
+    product_imports,
     rfq_deals,
     wallets_fx,
     files as files_service,
     documents as docs_service,
     logistics as logistics_service,
     chat as chat_service,
+    translation as translation_service,
     notifications as notifications_service,
+    ledger,
+    events,
 )
 
 @pytest.fixture(autouse=True)
@@ -26,9 +39,15 @@ def reset_state():
     auth.users.clear()
     auth.orgs.clear()
     auth.passwords.clear()
+    auth.revoked_tokens.clear()
+    auth.token_cache.clear()
+    auth.login_ip_limiter.clear()
+    auth.login_email_limiter.clear()
 
     orgs.kyb_profiles.clear()
 
+    product_imports.import_pool.wait_idle()
+    product_imports.jobs.clear()
     products.products.clear()
 
     rfq_deals.rfqs.clear()
@@ -39,14 +58,23 @@ def reset_state():
     wallets_fx.wallets.clear()
     wallets_fx.payments.clear()
     wallets_fx.fx_quotes.clear()
+    wallets_fx.idempotency_keys.clear()
+    ledger.entries.clear()
+    ledger.balances.clear()
 
     files_service.files.clear()
     docs_service.documents.clear()
 
+    chat_service.auto_translate_pool.wait_idle()
     chat_service.chats.clear()
     chat_service.messages_by_chat.clear()
+    translation_service.translator.cache.clear()
 
     notifications_service.notifications_by_user.clear()
+    notifications_service.unread_by_user.clear()
+    notifications_service.preferences.clear()
+    notifications_service._open_digests.clear()
+    events.bus.clear()
 
     yield
 
@@ -1,8 +1,20 @@
 # backend/tests/test_auth.py
 from __future__ import annotations
 
+import asyncio
+
+import pytest
 from fastapi.testclient import TestClient
 
+from app import hashing
+from app.ratelimit import TokenBucketLimiter
+from app.services import auth as auth_service
+
+journal_only = pytest.mark.skipif(
+    not auth_service.USE_JOURNAL,
+    reason="auth journal is only used with the in-memory storage backend",
+)
+
 
 def test_register_and_login_and_me(client: TestClient):
     # 1. Register
@@ -42,4 +54,179 @@ def test_register_and_login_and_me(client: TestClient):
         "email": "auth@example.com",
         "password": "wrongpass",
     })
-    assert r.status_code == 401
\ No newline at end of file
+    assert r.status_code == 401
+
+
+def _register_payload(email: str) -> dict:
+    return {
+        "email": email,
+        "password": "123456",
+        "name": "Journal User",
+        "orgName": "JournalOrg",
+        "orgCountry": "RU",
+        "orgRole": "buyer",
+    }
+
+
+@journal_only
+def test_registration_is_replayed_from_journal(client: TestClient):
+    from app.services import auth
+
+    r = client.post("/auth/register", json=_register_payload("journal@example.com"))
+    assert r.status_code == 201
+    user_id = r.json()["user"]["id"]
+    org_id = r.json()["org"]["id"]
+
+    # simulate restart: drop in-memory state and load from disk
+    auth.users.clear()
+    auth.orgs.clear()
+    auth.passwords.clear()
+    auth.load_state()
+
+    assert auth.users[user_id].email == "journal@example.com"
+    assert auth.orgs[org_id].name == "JournalOrg"
+    assert hashing.verify_password("123456", auth.passwords[user_id])
+
+
+@journal_only
+def test_journal_is_compacted_into_snapshot(client: TestClient, monkeypatch):
+    from app import config
+    from app.services import auth
+
+    monkeypatch.setattr(config, "JOURNAL_COMPACT_EVERY", 3)
+    r = client.post("/auth/register", json=_register_payload("compact@example.com"))
+    assert r.status_code == 201
+    user_id = r.json()["user"]["id"]
+
+    # register writes 3 records -> compaction ran, journal is empty again
+    assert auth.journal.records == 0
+    assert auth.JOURNAL_FILE.read_text(encoding="utf-8") == ""
+
+    auth.users.clear()
+    auth.load_state()
+    assert user_id in auth.users
+
+
+def test_tokens_are_signed_cached_and_refreshable(client: TestClient, monkeypatch):
+    r = client.post("/auth/register", json=_register_payload("tokens@example.com"))
+    assert r.status_code == 201
+    data = r.json()
+    tokens = data["tokens"]
+    headers = {"Authorization": f"Bearer {tokens['accessToken']}"}
+
+    # guessable / tampered tokens are rejected
+    for bad in (data["user"]["id"], f"demo-access-{data['user']['id']}", tokens["accessToken"][:-2] + "xx"):
+        r = client.get("/auth/me", headers={"Authorization": f"Bearer {bad}"})
+        assert r.status_code == 401
+    # a refresh token is not an access token
+    r = client.get("/auth/me", headers={"Authorization": f"Bearer {tokens['refreshToken']}"})
+    assert r.status_code == 401
+    # non-ASCII tokens are rejected, not a server error
+    assert auth_service._decode_token("a.\u00e9.c", "access") is None
+    r = client.get("/auth/me", headers={"Authorization": "Bearer a.\u00e9.c".encode("utf-8")})
+    assert r.status_code == 401
+    r = client.get("/notifications/stream", params={"access_token": "a.\u4e2d.c"})
+    assert r.status_code == 401
+
+    # second request is served from the verified-token cache
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    hits = auth_service.token_cache.hits
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert auth_service.token_cache.hits == hits + 1
+
+    # refresh rotates: the old refresh token cannot be replayed
+    r = client.post("/auth/refresh", json={"refreshToken": tokens["refreshToken"]})
+    assert r.status_code == 200
+    new_tokens = r.json()["tokens"]
+    assert r.json()["user"]["id"] == data["user"]["id"]
+    r = client.post("/auth/refresh", json={"refreshToken": tokens["refreshToken"]})
+    assert r.status_code == 401
+
+    # logout revokes both tokens, even though the access token was cached
+    new_headers = {"Authorization": f"Bearer {new_tokens['accessToken']}"}
+    assert client.get("/auth/me", headers=new_headers).status_code == 200
+    r = client.post("/auth/logout", headers=new_headers, json={"refreshToken": new_tokens["refreshToken"]})
+    assert r.status_code == 204
+    assert client.get("/auth/me", headers=new_headers).status_code == 401
+    r = client.post("/auth/refresh", json={"refreshToken": new_tokens["refreshToken"]})
+    assert r.status_code == 401
+
+    # expired access token
+    r = client.post("/auth/login", json={"email": "tokens@example.com", "password": "123456"})
+    fresh = r.json()["tokens"]
+    now = auth_service._epoch()
+    monkeypatch.setattr(auth_service, "_epoch", lambda: now + fresh["expiresIn"] + 1)
+    r = client.get("/auth/me", headers={"Authorization": f"Bearer {fresh['accessToken']}"})
+    assert r.status_code == 401
+
+
+def test_email_lookup_is_case_insensitive(client: TestClient):
+    r = client.post("/auth/register", json=_register_payload("Mixed.Case@Example.com"))
+    assert r.status_code == 201
+    user_id = r.json()["user"]["id"]
+    assert auth_service.users_by_email.ids("mixed.case@example.com") == [user_id]
+
+    r = client.post("/auth/register", json=_register_payload("mixed.case@example.COM"))
+    assert r.status_code == 400
+
+    r = client.post("/auth/login", json={"email": "MIXED.case@example.com", "password": "123456"})
+    assert r.status_code == 200
+    assert r.json()["user"]["id"] == user_id
+
+
+def test_passwords_are_hashed_and_legacy_records_upgraded(client: TestClient):
+    r = client.post("/auth/register", json=_register_payload("hash@example.com"))
+    user_id = r.json()["user"]["id"]
+    stored = auth_service.passwords[user_id]
+    assert stored.startswith("scrypt$") and "123456" not in stored
+
+    # record written before hashing: plaintext still logs in, then gets hashed
+    auth_service.passwords[user_id] = "123456"
+    r = client.post("/auth/login", json={"email": "hash@example.com", "password": "123456"})
+    assert r.status_code == 200
+    assert hashing.is_hashed(auth_service.passwords[user_id])
+    assert hashing.verify_password("123456", auth_service.passwords[user_id])
+
+    r = client.post("/auth/login", json={"email": "hash@example.com", "password": "nope"})
+    assert r.status_code == 401
+
+
+def test_login_is_rate_limited_per_email(client: TestClient, monkeypatch):
+    client.post("/auth/register", json=_register_payload("limited@example.com"))
+    monkeypatch.setattr(auth_service, "login_email_limiter", TokenBucketLimiter(0.0, 3))
+
+    codes = [
+        client.post("/auth/login", json={"email": "limited@example.com", "password": "bad"}).status_code
+        for _ in range(4)
+    ]
+    assert codes == [401, 401, 401, 429]
+    # correct password does not bypass the limiter either
+    r = client.post("/auth/login", json={"email": "Limited@example.com", "password": "123456"})
+    assert r.status_code == 429
+
+
+def test_login_keeps_kdf_storage_and_signing_off_the_event_loop(client: TestClient, monkeypatch):
+    client.post("/auth/register", json=_register_payload("offloop@example.com"))
+
+    kdf_runs = []
+    scrypt = hashing._scrypt
+    monkeypatch.setattr(hashing, "_scrypt", lambda *args: kdf_runs.append(1) or scrypt(*args))
+    dummy = hashing.dummy_hash()
+    assert kdf_runs == []  # the unknown-email record is not computed per login
+    assert not hashing.verify_password("123456", dummy) and kdf_runs == [1]
+
+    on_loop = []
+    issue_tokens = auth_service.issue_tokens
+
+    def spy_issue_tokens(user):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return issue_tokens(user)
+
+    monkeypatch.setattr(auth_service, "issue_tokens", spy_issue_tokens)
+    r = client.post("/auth/login", json={"email": "offloop@example.com", "password": "123456"})
+    assert r.status_code == 200
+    assert on_loop == [False]
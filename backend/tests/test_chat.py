@@ -1,7 +1,18 @@
 # backend/tests/test_chat.py
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app import config
+from app.cache import LRUCache
+from app.services import chat as chat_service
+from app.services import translation as translation_service
 
 
 def _create_deal_and_headers(client: TestClient) -> tuple[str, dict]:
@@ -105,4 +116,299 @@ def test_chat_flow_with_translation(client: TestClient):
     assert r.status_code == 200
     tr = r.json()
     assert tr["targetLang"] == "zh-CN"
-    assert tr["text"].startswith("[CN auto]")
\ No newline at end of file
+    assert tr["text"].startswith("[CN auto]")
+
+
+def test_chat_websocket_fan_out(client: TestClient):
+    deal_id, headers = _create_deal_and_headers(client)
+    token = headers["Authorization"].split(" ", 1)[1]
+    r = client.get(f"/chats?dealId={deal_id}", headers=headers)
+    chat_id = r.json()[0]["id"]
+
+    # non-participant / bad token is rejected
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/chats/{chat_id}/ws?access_token=nope") as ws:
+            ws.receive_json()
+
+    url = f"/chats/{chat_id}/ws?access_token={token}"
+    with client.websocket_connect(url) as ws_a, client.websocket_connect(url) as ws_b:
+        # message created over HTTP reaches both connections
+        r = client.post(f"/chats/{chat_id}/messages", json={"text": "hello", "lang": "ru"}, headers=headers)
+        msg_id = r.json()["id"]
+        for ws in (ws_a, ws_b):
+            event = ws.receive_json()
+            assert event["type"] == "message"
+            assert event["data"]["id"] == msg_id
+
+        # typing and read events are broadcast
+        ws_a.send_json({"type": "typing"})
+        assert ws_b.receive_json()["type"] == "typing"
+        ws_b.send_json({"type": "read", "messageId": msg_id})
+        event = ws_a.receive_json()
+        if event["type"] == "typing":  # ws_a also sees its own typing event first
+            event = ws_a.receive_json()
+        assert event["type"] == "read"
+        assert event["data"]["messageId"] == msg_id
+
+        # messages can be sent over the socket as well
+        ws_a.send_json({"type": "message", "text": "via ws"})
+        event = ws_b.receive_json()
+        while event["type"] != "message":
+            event = ws_b.receive_json()
+        assert event["data"]["text"] == "via ws"
+
+    r = client.get(f"/chats/{chat_id}/messages", headers=headers)
+    assert [m["text"] for m in r.json()] == ["hello", "via ws"]
+
+
+def test_incremental_message_sync(client: TestClient):
+    deal_id, headers = _create_deal_and_headers(client)
+    r = client.get(f"/chats?dealId={deal_id}", headers=headers)
+    chat_id = r.json()[0]["id"]
+
+    sent = []
+    for i in range(6):
+        r = client.post(f"/chats/{chat_id}/messages", json={"text": f"m{i}", "lang": "ru"}, headers=headers)
+        assert r.status_code == 201
+        sent.append(r.json())
+    url = f"/chats/{chat_id}/messages"
+
+    r = client.get(url, params={"after": sent[3]["id"]}, headers=headers)
+    assert [m["text"] for m in r.json()] == ["m4", "m5"]
+
+    r = client.get(url, params={"after": sent[5]["id"]}, headers=headers)
+    assert r.json() == []
+
+    r = client.get(url, params={"since": sent[1]["createdAt"]}, headers=headers)
+    assert [m["id"] for m in r.json()] == [
+        m["id"] for m in sent if m["createdAt"] > sent[1]["createdAt"]
+    ]
+
+    # backward paging: newest 2 before m4, then the 2 before those
+    r = client.get(url, params={"before": sent[4]["id"], "limit": 2}, headers=headers)
+    assert [m["text"] for m in r.json()] == ["m2", "m3"]
+    r = client.get(url, params={"before": r.json()[0]["id"], "limit": 2}, headers=headers)
+    assert [m["text"] for m in r.json()] == ["m0", "m1"]
+
+    r = client.get(url, params={"after": sent[0]["id"], "before": sent[3]["id"]}, headers=headers)
+    assert [m["text"] for m in r.json()] == ["m1", "m2"]
+
+    r = client.get(url, params={"after": "missing"}, headers=headers)
+    assert r.status_code == 404
+
+
+def test_message_pages_keep_send_order_when_the_clock_stands_still(client: TestClient, monkeypatch):
+    deal_id, headers = _create_deal_and_headers(client)
+    r = client.get(f"/chats?dealId={deal_id}", headers=headers)
+    chat_id = r.json()[0]["id"]
+
+    # a clock that stands still: each message is still a microsecond newer
+    frozen = chat_service._now()
+    monkeypatch.setattr(chat_service, "_now", lambda: frozen)
+    created = []
+    for i in range(5):
+        r = client.post(f"/chats/{chat_id}/messages", json={"text": f"m{i}"}, headers=headers)
+        assert r.status_code == 201
+        created.append(datetime.fromisoformat(r.json()["createdAt"]))
+    assert created == sorted(set(created))
+
+    texts = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get(f"/chats/{chat_id}/messages", params=params, headers=headers)
+        assert r.status_code == 200
+        texts.extend(m["text"] for m in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert texts == [f"m{i}" for i in range(5)]
+
+
+def test_one_chat_per_deal_and_user_index(client: TestClient):
+    deal_id, headers = _create_deal_and_headers(client)
+
+    users = [f"user-{i}" for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        created = list(pool.map(
+            lambda u: chat_service._get_or_create_chat_for_deal(deal_id, u), users
+        ))
+    assert len({c.id for c in created}) == 1
+    chat_id = created[0].id
+
+    chat = chat_service.get_chat(chat_id)
+    assert set(users) <= set(chat.participants)
+    assert len(chat.participants) == len(set(chat.participants))
+    for u in users:
+        assert [c.id for c in chat_service.list_chats_for_user(u)] == [chat_id]
+        assert [c.id for c in chat_service.list_chats_for_user(u, deal_id)] == [chat_id]
+    assert chat_service.list_chats_for_user("stranger") == []
+    assert not chat_service.is_participant(chat_id, "stranger")
+
+    # the HTTP caller joins the same chat
+    r = client.get(f"/chats?dealId={deal_id}", headers=headers)
+    assert [c["id"] for c in r.json()] == [chat_id]
+    r = client.get("/chats", headers=headers)
+    assert [c["id"] for c in r.json()] == [chat_id]
+
+
+def test_translation_cache_dedupe_and_batch(client: TestClient, monkeypatch):
+    engine_calls = []
+
+    class CountingProvider(translation_service.LocalTranslationProvider):
+        async def translate(self, text, source, target):
+            engine_calls.append(text)
+            return await super().translate(text, source, target)
+
+    monkeypatch.setattr(translation_service.translator, "provider", CountingProvider())
+
+    deal_id, headers = _create_deal_and_headers(client)
+    r = client.get(f"/chats?dealId={deal_id}", headers=headers)
+    chat_id = r.json()[0]["id"]
+    ids = []
+    for text in ("hello", "price?", "hello", "delivery"):
+        r = client.post(f"/chats/{chat_id}/messages", json={"text": text, "lang": "en"}, headers=headers)
+        ids.append(r.json()["id"])
+
+    # repeat translation into the same language replaces, not appends
+    for _ in range(3):
+        r = client.post(f"/chats/{chat_id}/messages/{ids[0]}/translate", json={"targetLang": "ru"}, headers=headers)
+        assert r.status_code == 200
+    assert engine_calls == ["hello"]
+
+    # batch: all untranslated messages in one request, cache hit for "hello"
+    r = client.post(f"/chats/{chat_id}/messages/translate", json={"targetLang": "ru"}, headers=headers)
+    assert r.status_code == 200
+    assert [i["messageId"] for i in r.json()] == ids[1:]
+    assert all(i["text"].startswith("[RU auto]") for i in r.json())
+    assert sorted(engine_calls) == ["delivery", "hello", "price?"]
+
+    r = client.post(f"/chats/{chat_id}/messages/translate",
+                    json={"targetLang": "ru", "messageIds": [ids[3], ids[0]]}, headers=headers)
+    assert [i["messageId"] for i in r.json()] == [ids[3], ids[0]]
+    assert len(engine_calls) == 3
+
+    r = client.get(f"/chats/{chat_id}/messages", headers=headers)
+    for m in r.json():
+        assert [t["lang"] for t in m["translations"]] == ["ru"]
+
+    r = client.post(f"/chats/{chat_id}/messages/translate",
+                    json={"targetLang": "ru", "messageIds": ["missing"]}, headers=headers)
+    assert r.status_code == 404
+
+
+def test_implicit_translation_batch_is_capped(client: TestClient, monkeypatch):
+    monkeypatch.setattr(config, "TRANSLATION_BATCH_LIMIT", 2)
+    deal_id, headers = _create_deal_and_headers(client)
+    r = client.get(f"/chats?dealId={deal_id}", headers=headers)
+    chat_id = r.json()[0]["id"]
+    ids = []
+    for i in range(5):
+        r = client.post(f"/chats/{chat_id}/messages", json={"text": f"m{i}", "lang": "en"}, headers=headers)
+        ids.append(r.json()["id"])
+
+    # without messageIds: the newest untranslated ones, oldest first
+    r = client.post(f"/chats/{chat_id}/messages/translate", json={"targetLang": "ru"}, headers=headers)
+    assert [i["messageId"] for i in r.json()] == ids[3:]
+    r = client.post(f"/chats/{chat_id}/messages/translate", json={"targetLang": "ru"}, headers=headers)
+    assert [i["messageId"] for i in r.json()] == ids[1:3]
+
+    with pytest.raises(TypeError):
+        translation_service.TranslationProvider()
+
+
+def test_lru_cache_bounds_and_ttl():
+    now = [0.0]
+    cache = LRUCache(2, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)           # evicts least recently used "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    now[0] = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_translator_single_flight_concurrency_and_timeout():
+    class SlowProvider(translation_service.LocalTranslationProvider):
+        in_flight = 0
+        peak = 0
+
+        async def translate(self, text, source, target):
+            SlowProvider.in_flight += 1
+            SlowProvider.peak = max(SlowProvider.peak, SlowProvider.in_flight)
+            try:
+                return await super().translate(text, source, target)
+            finally:
+                SlowProvider.in_flight -= 1
+
+    async def scenario():
+        provider = SlowProvider(latency=0.02)
+        tr = translation_service.Translator(provider, concurrency=2, timeout=1.0)
+
+        # 10 concurrent identical requests -> one provider call
+        same = await asyncio.gather(*(tr.translate("hi", "en", "ru") for _ in range(10)))
+        assert provider.calls == 1
+        assert {t.text for t in same} == {"[RU auto] hi"}
+
+        # distinct texts: never more than `concurrency` calls at once
+        await tr.translate_many([(f"t{i}", "en", "zh-CN") for i in range(8)])
+        assert provider.calls == 9
+        assert SlowProvider.peak == 2
+
+        slow = translation_service.Translator(
+            translation_service.LocalTranslationProvider(latency=0.5), timeout=0.05
+        )
+        with pytest.raises(translation_service.TranslationTimeout):
+            await slow.translate("late", "en", "ru")
+
+    asyncio.run(scenario())
+
+
+def test_auto_translate_pipeline(client: TestClient):
+    deal_id, headers = _create_deal_and_headers(client)   # org country RU
+    r = client.get(f"/chats?dealId={deal_id}", headers=headers)
+    chat_id = r.json()[0]["id"]
+    assert r.json()[0]["autoTranslate"] is False
+
+    r = client.post("/auth/register", json={
+        "email": "cn@example.com",
+        "password": "123456",
+        "name": "CN User",
+        "orgName": "CNOrg",
+        "orgCountry": "CN",
+        "orgRole": "supplier",
+    })
+    cn_headers = {"Authorization": f"Bearer {r.json()['tokens']['accessToken']}"}
+    client.get(f"/chats?dealId={deal_id}", headers=cn_headers)   # joins the chat
+
+    r = client.patch(f"/chats/{chat_id}", json={"autoTranslate": True}, headers=headers)
+    assert r.status_code == 200
+    assert r.json()["autoTranslate"] is True
+
+    token = headers["Authorization"].split(" ", 1)[1]
+    with client.websocket_connect(f"/chats/{chat_id}/ws?access_token={token}") as ws:
+        r = client.post(f"/chats/{chat_id}/messages", json={"text": "hello", "lang": "en"}, headers=headers)
+        assert r.status_code == 201
+        msg_id = r.json()["id"]
+
+        assert chat_service.auto_translate_pool.wait_idle()
+        received = []
+        while len(received) < 3:
+            event = ws.receive_json()
+            received.append(event)
+        assert received[0]["type"] == "message"
+        assert {e["data"]["lang"] for e in received[1:]} == {"ru", "zh-CN"}
+        assert all(e["type"] == "translation" and e["data"]["messageId"] == msg_id for e in received[1:])
+
+    r = client.get(f"/chats/{chat_id}/messages", headers=headers)
+    langs = sorted(t["lang"] for t in r.json()[0]["translations"])
+    assert langs == ["ru", "zh-CN"]
+
+    # messages already in the reader's language are not translated for them
+    r = client.post(f"/chats/{chat_id}/messages", json={"text": "привет", "lang": "ru"}, headers=headers)
+    assert chat_service.auto_translate_pool.wait_idle()
+    r = client.get(f"/chats/{chat_id}/messages", params={"after": msg_id}, headers=headers)
+    assert [t["lang"] for t in r.json()[0]["translations"]] == ["zh-CN"]
@@ -0,0 +1,122 @@
+# backend/tests/test_discovery.py
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.schemas.products import ProductCreateRequest
+from app.services import products as products_service
+
+
+def _register(client: TestClient, email: str, country: str, role: str) -> dict:
+    r = client.post("/auth/register", json={
+        "email": email,
+        "password": "123456",
+        "name": email.split("@")[0],
+        "orgName": f"Org-{email}",
+        "orgCountry": country,
+        "orgRole": role,
+    })
+    assert r.status_code == 201
+    data = r.json()
+    return {"headers": {"Authorization": f"Bearer {data['tokens']['accessToken']}"}, "org_id": data["org"]["id"]}
+
+
+def _product(client: TestClient, org: dict, name: str, price: float, currency: str, hs: str = None) -> str:
+    r = client.post("/products", json={
+        "name": name,
+        "hsCode": hs,
+        "baseCurrency": currency,
+        "basePrice": price,
+        "unit": "piece",
+    }, headers=org["headers"])
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+def _facet(body: dict, name: str) -> dict:
+    return {f["value"]: f["count"] for f in body["facets"][name]}
+
+
+def test_discovery_searches_all_suppliers_with_facets(client: TestClient):
+    cn = _register(client, "cn-sup@example.com", "CN", "supplier")
+    ru = _register(client, "ru-sup@example.com", "RU", "both")
+    buyer = _register(client, "disc-buyer@example.com", "RU", "buyer")
+
+    cn_bolt = _product(client, cn, "Steel bolt M8", 5, "CNY", "7318.15")
+    cn_pump = _product(client, cn, "Water pump", 1500, "CNY", "8413.70")
+    ru_bolt = _product(client, ru, "Bolt M10 zinc", 50, "RUB", "7318.16")
+    _product(client, buyer, "Bolt from a buyer-only org", 1, "RUB")
+
+    r = client.get("/discovery/products", headers=buyer["headers"])
+    assert r.status_code == 200
+    body = r.json()
+    assert body["total"] == 3
+    assert [h["product"]["id"] for h in body["items"]] == [cn_bolt, cn_pump, ru_bolt]
+    assert _facet(body, "country") == {"CN": 2, "RU": 1}
+    assert _facet(body, "hsChapter") == {"73": 2, "84": 1}
+    assert _facet(body, "priceRange") == {"0-10": 1, "10-100": 1, "1000-10000": 1}
+    assert _facet(body, "kybStatus") == {"pending": 3}
+
+    # text search across orgs, facets follow the match set
+    r = client.get("/discovery/products", params={"q": "bolt"}, headers=buyer["headers"])
+    body = r.json()
+    assert {h["product"]["id"] for h in body["items"]} == {cn_bolt, ru_bolt}
+    assert all(h["score"] > 0 for h in body["items"])
+    assert _facet(body, "currency") == {"CNY": 1, "RUB": 1}
+    assert body["items"][0]["supplier"]["name"].startswith("Org-")
+
+    # filters: OR inside a facet, AND across facets
+    r = client.get(
+        "/discovery/products",
+        params={"country": ["CN", "RU"], "hsChapter": "73", "currency": "RUB"},
+        headers=buyer["headers"],
+    )
+    assert [h["product"]["id"] for h in r.json()["items"]] == [ru_bolt]
+
+    # KYB changes are reflected without rescans
+    r = client.post("/orgs/me/compliance", json={"documents": [
+        {"type": "registration_certificate", "fileId": "f1"},
+        {"type": "tax_certificate", "fileId": "f2"},
+        {"type": "director_id", "fileId": "f3"},
+    ]}, headers=cn["headers"])
+    assert r.status_code == 200
+    r = client.get("/discovery/products", params={"verifiedOnly": True}, headers=buyer["headers"])
+    body = r.json()
+    assert body["total"] == 2
+    assert _facet(body, "kybStatus") == {"verified": 2}
+
+    # paging
+    r = client.get("/discovery/products", params={"limit": 2}, headers=buyer["headers"])
+    first = r.json()
+    assert len(first["items"]) == 2 and first["nextCursor"]
+    r = client.get(
+        "/discovery/products", params={"limit": 2, "cursor": first["nextCursor"]}, headers=buyer["headers"]
+    )
+    assert [h["product"]["id"] for h in r.json()["items"]] == [ru_bolt]
+    assert r.json()["nextCursor"] is None
+
+
+
+def test_discovery_ranked_pages_survive_a_deleted_cursor_item(client: TestClient):
+    sup = _register(client, "ranked-sup@example.com", "CN", "supplier")
+    buyer = _register(client, "ranked-buyer@example.com", "RU", "buyer")
+    # shorter names rank higher; the filler keeps scores steady across a delete
+    words = ["Hex", "bolt", "zinc", "plated", "steel"]
+    ids = [_product(client, sup, " ".join(words[: i + 1]), 5, "CNY") for i in range(5)]
+    products_service.create_products(sup["org_id"], [
+        ProductCreateRequest(name=f"Filler {i}", baseCurrency="CNY", basePrice=1, unit="piece")
+        for i in range(100)
+    ])
+
+    def page(cursor=None):
+        params = {"q": "hex", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/discovery/products", params=params, headers=buyer["headers"]).json()
+        return [h["product"]["id"] for h in body["items"]], body["nextCursor"]
+
+    first, cursor = page()
+    assert first == ids[:2]
+    products_service.delete_product(ids[1])
+    second, cursor = page(cursor)
+    assert second == ids[2:4]
+    third, cursor = page(cursor)
+    assert third == ids[4:] and cursor is None
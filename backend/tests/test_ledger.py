@@ -0,0 +1,157 @@
+# backend/tests/test_ledger.py
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.schemas.products import CurrencyCode
+from app.schemas.rfq_deals import OfferCreateRequest, OfferItem, RFQCreateRequest, RFQItem
+from app.schemas.wallet_fx_payments import LedgerAccount, PaymentCreateRequest
+from app.services import ledger, rfq_deals, wallets_fx
+from app.services.ledger import Posting
+
+
+def _make_deal(buyer_org: str, supplier_org: str) -> str:
+    rfq = rfq_deals.create_rfq(buyer_org, RFQCreateRequest(
+        supplierOrgId=supplier_org,
+        items=[RFQItem(name="Item", qty=1, unit="piece")],
+    ))
+    rfq = rfq_deals.send_rfq(rfq.id)
+    offer = rfq_deals.create_offer_for_rfq(rfq, supplier_org, OfferCreateRequest(
+        currency=CurrencyCode.CNY,
+        items=[OfferItem(name="Item", qty=1, unit="piece", price=1, subtotal=1)],
+    ))
+    _, _, deal = rfq_deals.accept_offer(offer.id)
+    return deal.id
+
+
+def _fund(org_id: str, currency: CurrencyCode, amount: float) -> None:
+    wallet = wallets_fx._ensure_wallet(org_id, currency)
+    system_id = ledger.system_wallet_id(currency.value)
+    minor = ledger.to_minor(amount)
+    ledger.transfer(f"fund:{wallet.id}", [
+        Posting(system_id, LedgerAccount.funding, -minor),
+        Posting(wallet.id, LedgerAccount.available, minor),
+    ])
+    with ledger.lock_wallets(wallet.id):
+        wallets_fx._sync_wallet(wallet.id)
+
+
+def _pay(payer: str, deal_id: str, amount: float, currency=CurrencyCode.CNY):
+    try:
+        return wallets_fx.create_payment(payer, PaymentCreateRequest(
+            dealId=deal_id, amount=amount, currency=currency,
+        ))
+    except ValueError as e:
+        return str(e)
+
+
+def test_concurrent_payments_cannot_overdraw():
+    deal_id = _make_deal("buyer-org", "supplier-org")
+    _fund("buyer-org", CurrencyCode.CNY, 1000)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda _: _pay("buyer-org", deal_id, 100), range(50)))
+
+    ok = [r for r in results if not isinstance(r, str)]
+    assert len(ok) == 10
+    assert set(r for r in results if isinstance(r, str)) == {"insufficient_funds"}
+
+    wallet = wallets_fx._ensure_wallet("buyer-org", CurrencyCode.CNY)
+    assert wallet.balance == 0
+    assert wallet.blockedAmount == 1000
+
+
+def test_concurrent_release_pays_out_once():
+    deal_id = _make_deal("buyer-org", "supplier-org")
+    payment = _pay("buyer-org", deal_id, 500, CurrencyCode.RUB)
+
+    def release(_):
+        try:
+            return wallets_fx.release_payment(payment.id).status
+        except ValueError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(release, range(16)))
+
+    assert results.count("completed") == 1
+    supplier = wallets_fx._ensure_wallet("supplier-org", CurrencyCode.RUB)
+    assert supplier.balance == wallets_fx.DEMO_RUB_BALANCE + 500
+
+
+def test_deal_status_is_checked_and_written_with_the_posting():
+    deal_id = _make_deal("buyer-org", "supplier-org")
+    first = _pay("buyer-org", deal_id, 100, CurrencyCode.RUB)
+    second = _pay("buyer-org", deal_id, 200, CurrencyCode.RUB)
+
+    def release(payment):
+        try:
+            return wallets_fx.release_payment(payment.id).status
+        except ValueError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(release, [first, second]))
+
+    # the first release marks the deal paid, the other one must see that
+    assert sorted(results) == ["completed", "invalid_deal_status_for_release"]
+    assert rfq_deals.deals[deal_id].status == "paid"
+    assert _pay("buyer-org", deal_id, 50, CurrencyCode.RUB) == "invalid_deal_status_for_payment"
+
+
+def test_balances_are_conserved_under_parallel_load():
+    orgs = [f"org-{i}" for i in range(6)]
+    deals = [(orgs[i % 6], orgs[(i + 1) % 6], _make_deal(orgs[i % 6], orgs[(i + 1) % 6]))
+             for i in range(60)]
+
+    def pay_and_release(item):
+        buyer, _, deal_id = item
+        payment = _pay(buyer, deal_id, 123.45, CurrencyCode.RUB)
+        wallets_fx.release_payment(payment.id)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(pay_and_release, deals))
+
+    # double entry: every transaction sums to zero
+    assert sum(e.amountMinor for e in ledger.entries.values()) == 0
+
+    total = 0
+    for org in orgs:
+        w = wallets_fx._ensure_wallet(org, CurrencyCode.RUB)
+        assert w.blockedAmount == 0
+        assert ledger.to_minor(w.balance) == ledger.balance(w.id, LedgerAccount.available)
+        total += ledger.balance(w.id, LedgerAccount.available)
+    # each org paid 10 times and received 10 times
+    assert total == len(orgs) * ledger.to_minor(wallets_fx.DEMO_RUB_BALANCE)
+
+
+def test_payment_idempotency_key(client: TestClient):
+    r = client.post("/auth/register", json={
+        "email": "idem@example.com",
+        "password": "123456",
+        "name": "Idem",
+        "orgName": "IdemOrg",
+        "orgCountry": "RU",
+        "orgRole": "both",
+    })
+    headers = {"Authorization": f"Bearer {r.json()['tokens']['accessToken']}"}
+    org_id = r.json()["org"]["id"]
+    deal_id = _make_deal(org_id, org_id)
+
+    body = {"dealId": deal_id, "amount": 1000, "currency": "RUB"}
+    h = {**headers, "Idempotency-Key": "pay-1"}
+    first = client.post("/payments", json=body, headers=h)
+    second = client.post("/payments", json=body, headers=h)
+    assert first.status_code == second.status_code == 201
+    assert first.json()["id"] == second.json()["id"]
+
+    r = client.get("/wallets", headers=headers)
+    assert r.json()[0]["blockedAmount"] == 1000
+
+    r = client.post("/payments", json={**body, "amount": 5}, headers=h)
+    assert r.status_code == 409
+
+    r = client.post("/payments", json={**body, "amount": -5}, headers=headers)
+    assert r.status_code == 400
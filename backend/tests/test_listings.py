@@ -0,0 +1,88 @@
+# backend/tests/test_listings.py
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+
+def _register(client: TestClient, email: str, role: str):
+    r = client.post("/auth/register", json={
+        "email": email,
+        "password": "123456",
+        "name": email.split("@")[0],
+        "orgName": f"Org-{email}",
+        "orgCountry": "RU",
+        "orgRole": role,
+    })
+    assert r.status_code == 201
+    data = r.json()
+    headers = {"Authorization": f"Bearer {data['tokens']['accessToken']}"}
+    return headers, data["org"]["id"]
+
+
+def _create_rfq(client: TestClient, headers: dict, supplier_org_id: str) -> str:
+    r = client.post("/rfqs", json={
+        "supplierOrgId": supplier_org_id,
+        "items": [{"name": "Item", "qty": 1, "unit": "piece"}],
+    }, headers=headers)
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+def _ids(r) -> list:
+    assert r.status_code == 200
+    return [x["id"] for x in r.json()]
+
+
+def test_role_scoped_listings_follow_status_transitions(client: TestClient):
+    buyer_h, buyer_org = _register(client, "list_buyer@example.com", "buyer")
+    sup_h, sup_org = _register(client, "list_supplier@example.com", "supplier")
+    other_h, other_org = _register(client, "list_other@example.com", "supplier")
+
+    rfq_a = _create_rfq(client, buyer_h, sup_org)
+    rfq_b = _create_rfq(client, buyer_h, other_org)
+
+    assert _ids(client.get("/rfqs?role=buyer", headers=buyer_h)) == [rfq_a, rfq_b]
+    assert _ids(client.get("/rfqs?role=supplier", headers=sup_h)) == [rfq_a]
+    assert _ids(client.get("/rfqs?role=supplier", headers=other_h)) == [rfq_b]
+    assert _ids(client.get("/rfqs?role=buyer&status=sent", headers=buyer_h)) == []
+
+    # draft -> sent
+    assert client.post(f"/rfqs/{rfq_a}/send", headers=buyer_h).status_code == 200
+    assert _ids(client.get("/rfqs?role=buyer&status=sent", headers=buyer_h)) == [rfq_a]
+    assert _ids(client.get("/rfqs?role=buyer&status=draft", headers=buyer_h)) == [rfq_b]
+
+    # sent -> responded
+    r = client.post(f"/rfqs/{rfq_a}/offers", json={
+        "currency": "CNY",
+        "items": [{"name": "Item", "qty": 1, "unit": "piece", "price": 10, "subtotal": 10}],
+    }, headers=sup_h)
+    assert r.status_code == 201
+    offer_id = r.json()["id"]
+    assert _ids(client.get("/rfqs?role=supplier&status=responded", headers=sup_h)) == [rfq_a]
+    assert _ids(client.get(f"/rfqs/{rfq_a}/offers", headers=sup_h)) == [offer_id]
+
+    # responded -> closed, order & deal created
+    r = client.post(f"/offers/{offer_id}/accept", headers=buyer_h)
+    assert r.status_code == 200
+    order_id = r.json()["order"]["id"]
+    deal_id = r.json()["deal"]["id"]
+
+    assert _ids(client.get("/rfqs?role=supplier&status=responded", headers=sup_h)) == []
+    assert _ids(client.get("/rfqs?role=supplier&status=closed", headers=sup_h)) == [rfq_a]
+
+    assert _ids(client.get("/orders?role=buyer", headers=buyer_h)) == [order_id]
+    assert _ids(client.get("/orders?role=supplier", headers=sup_h)) == [order_id]
+    assert _ids(client.get("/orders?role=supplier", headers=other_h)) == []
+    assert _ids(client.get("/orders?role=buyer&status=confirmed", headers=buyer_h)) == [order_id]
+
+    assert _ids(client.get("/deals?role=buyer", headers=buyer_h)) == [deal_id]
+    assert _ids(client.get("/deals?role=supplier&status=ordered", headers=sup_h)) == [deal_id]
+    assert _ids(client.get("/deals?role=supplier", headers=other_h)) == []
+
+    # deal status change (escrow deposit) moves it between status buckets
+    r = client.post("/payments", json={
+        "dealId": deal_id, "amount": 10, "currency": "RUB",
+    }, headers=buyer_h)
+    assert r.status_code == 201
+    assert _ids(client.get("/deals?role=buyer&status=ordered", headers=buyer_h)) == []
+    assert _ids(client.get("/deals?role=buyer&status=paid_partially", headers=buyer_h)) == [deal_id]
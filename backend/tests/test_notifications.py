@@ -1,8 +1,12 @@
 # backend/tests/test_notifications.py
 from __future__ import annotations
 
+import asyncio
+
 from fastapi.testclient import TestClient
 
+from app.services import events
+
 
 def _register_user(client: TestClient, email: str, role: str):
     """Helper: register user+org and return auth info."""
@@ -142,4 +146,390 @@ def test_notifications_flow(client: TestClient):
     ids = [n["id"] for n in unread]
     assert notif_id not in ids, (
         f"Notification {notif_id} should not be in unread list, got: {unread}"
-    )
\ No newline at end of file
+    )
+
+def test_notifications_websocket_push(client: TestClient):
+    buyer = _register_user(client, "buyer_ws@example.com", "buyer")
+    supplier = _register_user(client, "supplier_ws@example.com", "supplier")
+    buyer_headers = {"Authorization": f"Bearer {buyer['token']}"}
+
+    with client.websocket_connect(f"/notifications/ws?access_token={supplier['token']}") as ws:
+        r = client.post("/rfqs", json={
+            "supplierOrgId": supplier["orgId"],
+            "items": [{"name": "Pushed", "qty": 1, "unit": "piece"}],
+        }, headers=buyer_headers)
+        assert r.status_code == 201
+
+        event = ws.receive_json()
+        assert event["type"] == "notification"
+        assert event["data"]["entityType"] == "rfq"
+        assert event["data"]["entityId"] == r.json()["id"]
+        first_id = event["id"]
+
+    # reconnect with lastEventId: only newer events are replayed
+    client.post("/rfqs", json={
+        "supplierOrgId": supplier["orgId"],
+        "items": [{"name": "Missed", "qty": 1, "unit": "piece"}],
+    }, headers=buyer_headers)
+    url = f"/notifications/ws?access_token={supplier['token']}&lastEventId={first_id}"
+    with client.websocket_connect(url) as ws:
+        event = ws.receive_json()
+        assert event["id"] == first_id + 1
+        assert event["data"]["entityType"] == "rfq"
+
+
+def _read_sse(app, path: str, query: str, count: int) -> str:
+    """
+    Drive a Server-Sent Events endpoint directly over ASGI (TestClient
+    buffers the whole body, which never ends for a stream) and disconnect
+    once `count` events arrived.
+    """
+
+    async def run() -> str:
+        chunks = []
+        received = asyncio.Event()
+
+        async def receive():
+            await received.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                assert message["status"] == 200
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b"").decode("utf-8"))
+                if "".join(chunks).count("\nevent: ") >= count:
+                    received.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode("ascii"),
+            "root_path": "",
+            "query_string": query.encode("ascii"),
+            "headers": [],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(app(scope, receive, send), timeout=5)
+        return "".join(chunks)
+
+    return asyncio.run(run())
+
+
+def test_notifications_sse_resume_longer_than_queue(client: TestClient, monkeypatch):
+    supplier = _register_user(client, "supplier_sse@example.com", "supplier")
+    topic = events.user_topic(supplier["userId"])
+
+    # the replay after a reconnect may be longer than the live-event queue
+    monkeypatch.setattr(events.bus, "queue_size", 2)
+    for i in range(6):
+        events.bus.publish(topic, "notification", {"i": i})
+
+    body = _read_sse(
+        client.app,
+        "/notifications/stream",
+        f"access_token={supplier['token']}&lastEventId=1",
+        count=5,
+    )
+    assert body.startswith("retry: 3000\n\n")
+    ids = [int(line[4:]) for line in body.splitlines() if line.startswith("id: ")]
+    assert ids == [2, 3, 4, 5, 6]
+    assert 'data: {"i":5}' in body
+    assert events.bus.subscriber_count(topic) == 0
+
+
+def test_event_bus_resume_and_slow_consumer():
+    import asyncio
+
+    from app.services.events import EventBus
+
+    async def scenario():
+        bus = EventBus(history_size=3, queue_size=2)
+        for i in range(4):
+            bus.publish("t", "n", {"i": i})
+
+        # resume inside history window
+        sub = bus.subscribe("t", last_event_id=2)
+        assert [(await sub.get(0.1)).data["i"] for _ in range(2)] == [2, 3]
+
+        # too old -> single resync event
+        old = bus.subscribe("t", last_event_id=0)
+        assert (await old.get(0.1)).type == "resync"
+
+        # queue of 2: third undelivered event drops the subscriber
+        for i in range(3):
+            bus.publish("t", "n", {"i": i})
+        await asyncio.sleep(0)
+        assert sub.overflowed and sub.closed
+        bus.unsubscribe(sub)
+        bus.unsubscribe(old)
+        assert bus.subscriber_count("t") == 0
+
+    asyncio.run(scenario())
+
+
+def test_unread_counter_and_bulk_mark_read(client: TestClient):
+    from app.schemas.notifications import NotificationEntityType, NotificationType
+    from app.services import notifications as notifications_service
+
+    user = _register_user(client, "counter@example.com", "supplier")
+    headers = {"Authorization": f"Bearer {user['token']}"}
+
+    ids = [
+        notifications_service._push_to_user(
+            user["userId"], NotificationType.system, NotificationEntityType.system, f"e{i}", f"n{i}"
+        ).id
+        for i in range(5)
+    ]
+    assert client.get("/notifications/unread-count", headers=headers).json() == {"unread": 5}
+
+    r = client.post(f"/notifications/{ids[1]}/read", headers=headers)
+    assert r.json()["read"] is True
+    client.post(f"/notifications/{ids[1]}/read", headers=headers)   # idempotent
+    assert client.get("/notifications/unread-count", headers=headers).json() == {"unread": 4}
+
+    # mark read up to the end of the first page (2 items)
+    r = client.get("/notifications", params={"limit": 2}, headers=headers)
+    cursor = r.headers["X-Next-Cursor"]
+    r = client.post("/notifications/read-all", params={"cursor": cursor}, headers=headers)
+    assert r.json() == {"updated": 1, "unread": 3}
+    r = client.get("/notifications", params={"unreadOnly": "true"}, headers=headers)
+    assert [n["id"] for n in r.json()] == ids[2:]
+
+    r = client.post("/notifications/read-all", headers=headers)
+    assert r.json() == {"updated": 3, "unread": 0}
+    assert client.get("/notifications/unread-count", headers=headers).json() == {"unread": 0}
+    assert client.get("/notifications", params={"unreadOnly": "true"}, headers=headers).json() == []
+
+    r = client.post("/notifications/missing/read", headers=headers)
+    assert r.status_code == 404
+
+
+def test_retention_compaction_and_archive(client: TestClient, monkeypatch, tmp_path):
+    from datetime import timedelta
+
+    from app import config
+    from app.schemas.notifications import NotificationEntityType, NotificationType
+    from app.services import notifications as notifications_service
+
+    monkeypatch.setattr(config, "NOTIFICATIONS_MAX_PER_USER", 3)
+    monkeypatch.setattr(config, "NOTIFICATIONS_READ_TTL_DAYS", 7)
+    monkeypatch.setattr(config, "NOTIFICATIONS_ARCHIVE_DIR", tmp_path)
+
+    user = _register_user(client, "retention@example.com", "supplier")
+    headers = {"Authorization": f"Bearer {user['token']}"}
+    ids = [
+        notifications_service._push_to_user(
+            user["userId"], NotificationType.system, NotificationEntityType.system, f"e{i}", f"n{i}"
+        ).id
+        for i in range(6)
+    ]
+    client.post(f"/notifications/{ids[4]}/read", headers=headers)
+
+    # nothing is old yet: only the cap applies (6 -> 3 newest)
+    assert notifications_service.compact_all() == 3
+    r = client.get("/notifications", headers=headers)
+    assert [n["id"] for n in r.json()] == ids[3:]
+    assert client.get("/notifications/unread-count", headers=headers).json() == {"unread": 2}
+
+    # a week later the read one expires as well
+    later = notifications_service._now() + timedelta(days=8)
+    assert notifications_service.compact_user(user["userId"], now=later) == 1
+    r = client.get("/notifications", headers=headers)
+    assert [n["id"] for n in r.json()] == [ids[3], ids[5]]
+    r = client.post(f"/notifications/{ids[5]}/read", headers=headers)
+    assert r.status_code == 200
+
+    # archive is paged like the live list
+    r = client.get("/notifications/archive", params={"limit": 3}, headers=headers)
+    assert [n["id"] for n in r.json()] == ids[:3]
+    r = client.get("/notifications/archive",
+                   params={"limit": 3, "cursor": r.headers["X-Next-Cursor"]}, headers=headers)
+    assert [n["id"] for n in r.json()] == [ids[4]]
+    assert "X-Next-Cursor" not in r.headers
+    assert list(tmp_path.glob("*.jsonl.gz"))
+
+
+def test_archive_pages_open_only_the_segments_they_need(client: TestClient, monkeypatch, tmp_path):
+    import fcntl
+
+    from app import config
+    from app.pagination import sort_key
+    from app.schemas.notifications import NotificationEntityType, NotificationType
+    from app.services import notifications as notifications_service
+
+    monkeypatch.setattr(config, "NOTIFICATIONS_MAX_PER_USER", 0)
+    monkeypatch.setattr(config, "NOTIFICATIONS_ARCHIVE_DIR", tmp_path)
+    monkeypatch.setattr(config, "NOTIFICATIONS_ARCHIVE_SEGMENT_SIZE", 2)
+
+    user_id = "segmented-user"
+    ids = [
+        notifications_service._push_to_user(
+            user_id, NotificationType.system, NotificationEntityType.system, f"e{i}", f"n{i}"
+        ).id
+        for i in range(10)
+    ]
+
+    # another worker holds the compactor lock: this one skips the run
+    with open(tmp_path / ".compactor.lock", "a") as fh:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        assert notifications_service.compact_all() == 0
+    assert notifications_service.compact_all() == 10
+
+    reads = []
+    read_segment = notifications_service._read_segment
+    monkeypatch.setattr(notifications_service, "_read_segment",
+                        lambda fh, segment: reads.append(segment) or read_segment(fh, segment))
+
+    page, has_more = notifications_service.list_archived(user_id, limit=3)
+    assert [n.id for n in page] == ids[:3] and has_more
+    assert len(reads) == 2  # of 5 segments
+
+    reads.clear()
+    page, has_more = notifications_service.list_archived(user_id, after=sort_key(page[-1]), limit=2)
+    assert [n.id for n in page] == ids[3:5] and has_more
+    assert len(reads) == 2
+
+    page, has_more = notifications_service.list_archived(user_id, after=sort_key(page[-1]))
+    assert [n.id for n in page] == ids[5:] and not has_more
+
+
+def test_push_for_org_fans_out_to_members_with_preferences(client: TestClient):
+    from datetime import datetime, timezone
+
+    from app.schemas.auth import User
+    from app.services import auth as auth_service
+
+    buyer = _register_user(client, "fanout-buyer@example.com", "buyer")
+    supplier = _register_user(client, "fanout-supplier@example.com", "supplier")
+
+    # two more members of the supplier org
+    for i in range(2):
+        uid = f"member-{i}"
+        auth_service.users[uid] = User(
+            id=uid, email=f"member{i}@example.com", name=f"m{i}",
+            orgId=supplier["orgId"], createdAt=datetime.now(timezone.utc),
+        )
+    assert auth_service.list_org_user_ids(supplier["orgId"]) == [supplier["userId"], "member-0", "member-1"]
+
+    # the original supplier user mutes deal_status notifications
+    supplier_headers = {"Authorization": f"Bearer {supplier['token']}"}
+    r = client.put("/notifications/preferences", json={"mutedTypes": ["deal_status"]}, headers=supplier_headers)
+    assert r.json() == {"mutedTypes": ["deal_status"]}
+
+    buyer_headers = {"Authorization": f"Bearer {buyer['token']}"}
+    r = client.post("/rfqs", json={
+        "supplierOrgId": supplier["orgId"],
+        "items": [{"productId": None, "name": "x", "qty": 1, "unit": "piece", "targetPrice": 1, "notes": ""}],
+    }, headers=buyer_headers)
+    assert r.status_code == 201
+
+    from app.services import notifications as notifications_service
+    assert notifications_service.list_for_user(supplier["userId"]) == []
+    for uid in ("member-0", "member-1"):
+        [n] = notifications_service.list_for_user(uid)
+        assert n.entityId == r.json()["id"]
+    assert notifications_service.list_for_user(buyer["userId"]) == []
+
+
+def test_push_for_org_writes_members_in_one_batch(client: TestClient, monkeypatch):
+    from datetime import datetime, timezone
+
+    from app.schemas.auth import User
+    from app.schemas.notifications import NotificationEntityType, NotificationType
+    from app.services import auth as auth_service
+    from app.services import notifications as notifications_service
+
+    supplier = _register_user(client, "batch-supplier@example.com", "supplier")
+    for i in range(3):
+        auth_service.users[f"batch-{i}"] = User(
+            id=f"batch-{i}", email=f"batch{i}@example.com", name=f"b{i}",
+            orgId=supplier["orgId"], createdAt=datetime.now(timezone.utc),
+        )
+    members = auth_service.list_org_user_ids(supplier["orgId"])
+
+    writes = []
+    for repo in (notifications_service.notifications_by_user, notifications_service.unread_by_user):
+        put_many = repo.put_many
+        monkeypatch.setattr(repo, "put_many",
+                            lambda items, repo=repo, put_many=put_many: (
+                                writes.append((repo.name, [k for k, _ in items])), put_many(items)))
+    published = []
+    publish = events.bus.publish
+
+    def spy_publish(topic, kind, data):
+        # stored before it goes out
+        user_id = topic.split(":", 1)[1]
+        stored = [n.id for n in notifications_service.list_for_user(user_id)]
+        published.append(data["id"] in stored)
+        publish(topic, kind, data)
+
+    monkeypatch.setattr(events.bus, "publish", spy_publish)
+
+    sent = notifications_service.push_for_org(
+        supplier["orgId"], NotificationType.system, NotificationEntityType.system, "x", "hello"
+    )
+    assert len(sent) == 4
+    assert sorted(writes) == [("notifications_by_user", members), ("notifications_unread", members)]
+    assert published == [True] * 4
+    for user_id in members:
+        assert notifications_service.unread_count(user_id) == 1
+
+
+def test_org_notifications_coalesce_into_digests(client: TestClient, monkeypatch):
+    from datetime import timedelta
+
+    from app import config
+    from app.services import notifications as notifications_service
+
+    monkeypatch.setattr(config, "NOTIFICATIONS_COALESCE_WINDOW_SECONDS", 60)
+
+    buyer = _register_user(client, "digest-buyer@example.com", "buyer")
+    supplier = _register_user(client, "digest-supplier@example.com", "supplier")
+    buyer_headers = {"Authorization": f"Bearer {buyer['token']}"}
+    supplier_headers = {"Authorization": f"Bearer {supplier['token']}"}
+
+    def create_rfq():
+        r = client.post("/rfqs", json={
+            "supplierOrgId": supplier["orgId"],
+            "items": [{"name": "Burst", "qty": 1, "unit": "piece"}],
+        }, headers=buyer_headers)
+        return r.json()["id"]
+
+    with client.websocket_connect(f"/notifications/ws?access_token={supplier['token']}") as ws:
+        rfq_ids = [create_rfq() for _ in range(5)]
+        first = ws.receive_json()          # first event of the window goes out at once
+        assert first["data"]["count"] == 1
+
+        later = notifications_service._now() + timedelta(minutes=5)
+        assert notifications_service.flush_digests(now=later) == 1
+        digest = ws.receive_json()         # then one update with everything merged
+        assert digest["data"]["id"] == first["data"]["id"]
+        assert digest["data"]["count"] == 5
+        assert digest["data"]["entityIds"] == rfq_ids
+        assert digest["data"]["entityId"] == rfq_ids[-1]
+
+    r = client.get("/notifications", headers=supplier_headers)
+    assert len(r.json()) == 1
+    assert client.get("/notifications/unread-count", headers=supplier_headers).json() == {"unread": 1}
+
+    # the window is closed: the next RFQ starts a new notification
+    create_rfq()
+    assert len(client.get("/notifications", headers=supplier_headers).json()) == 2
+
+    # periodic digest mode: nothing is pushed until the interval is flushed
+    client.put("/notifications/preferences", json={"digestIntervalMinutes": 30}, headers=supplier_headers)
+    notifications_service._open_digests.clear()
+    with client.websocket_connect(f"/notifications/ws?access_token={supplier['token']}") as ws:
+        create_rfq()
+        create_rfq()
+        assert notifications_service.flush_digests() == 0     # interval still open
+        later = notifications_service._now() + timedelta(minutes=31)
+        assert notifications_service.flush_digests(now=later) == 1
+        event = ws.receive_json()
+        assert event["data"]["count"] == 2
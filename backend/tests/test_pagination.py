@@ -0,0 +1,101 @@
+# backend/tests/test_pagination.py
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+
+def _register(client: TestClient, email: str):
+    r = client.post("/auth/register", json={
+        "email": email,
+        "password": "123456",
+        "name": "Page User",
+        "orgName": "PageOrg",
+        "orgCountry": "CN",
+        "orgRole": "supplier",
+    })
+    assert r.status_code == 201
+    return {"Authorization": f"Bearer {r.json()['tokens']['accessToken']}"}
+
+
+def test_products_cursor_pagination_and_projection(client: TestClient):
+    headers = _register(client, "page@example.com")
+    created = []
+    for i in range(5):
+        r = client.post("/products", json={
+            "name": f"Product {i}",
+            "baseCurrency": "CNY",
+            "basePrice": 10 + i,
+            "unit": "piece",
+        }, headers=headers)
+        assert r.status_code == 201
+        created.append(r.json()["id"])
+
+    # walk through all pages of size 2
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        url = "/products?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200
+        batch = r.json()
+        assert len(batch) <= 2
+        seen.extend(p["id"] for p in batch)
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == 3
+    assert seen == created
+
+    # without limit everything is returned, no cursor
+    r = client.get("/products", headers=headers)
+    assert [p["id"] for p in r.json()] == created
+    assert "X-Next-Cursor" not in r.headers
+
+    # projection: only requested fields (+ id)
+    r = client.get("/products?limit=1&fields=name,basePrice", headers=headers)
+    assert r.status_code == 200
+    assert r.json() == [{"id": created[0], "name": "Product 0", "basePrice": 10.0}]
+    assert r.headers.get("X-Next-Cursor")
+
+    r = client.get("/products?fields=nope", headers=headers)
+    assert r.status_code == 400
+
+    r = client.get("/products?cursor=not-a-cursor", headers=headers)
+    assert r.status_code == 400
+
+
+def test_rfq_pages_keep_creation_order_across_status_changes(client: TestClient):
+    headers = _register(client, "page-rfq@example.com")
+    org_id = client.get("/orgs/me", headers=headers).json()["id"]
+
+    # unknown fields are rejected even while the list is empty
+    r = client.get("/rfqs?role=buyer&fields=nope", headers=headers)
+    assert r.status_code == 400
+
+    created = []
+    for i in range(4):
+        r = client.post("/rfqs", json={
+            "supplierOrgId": org_id,
+            "items": [{"name": f"Item {i}", "qty": 1, "unit": "piece"}],
+        }, headers=headers)
+        assert r.status_code == 201
+        created.append(r.json()["id"])
+    # a status change must not move the RFQ to the end of the list
+    assert client.post(f"/rfqs/{created[0]}/send", headers=headers).status_code == 200
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/rfqs?role=buyer&limit=3" + (f"&cursor={cursor}" if cursor else "")
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200
+        seen.extend(item["id"] for item in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == created
+
+    r = client.get("/rfqs?role=supplier&status=sent&fields=status", headers=headers)
+    assert r.json() == [{"id": created[0], "status": "sent"}]
@@ -0,0 +1,191 @@
+# backend/tests/test_products.py
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app import config
+from app.schemas.products import ProductCreateRequest, ProductUpdateRequest
+from app.services import product_imports
+from app.services import products as products_service
+
+
+def _register(client: TestClient, email: str) -> dict:
+    r = client.post("/auth/register", json={
+        "email": email,
+        "password": "123456",
+        "name": email.split("@")[0],
+        "orgName": f"Org-{email}",
+        "orgCountry": "CN",
+        "orgRole": "supplier",
+    })
+    assert r.status_code == 201
+    return {"Authorization": f"Bearer {r.json()['tokens']['accessToken']}"}
+
+
+def _create(client: TestClient, headers: dict, name: str, description: str = None) -> str:
+    r = client.post("/products", json={
+        "name": name,
+        "description": description,
+        "baseCurrency": "CNY",
+        "basePrice": 10,
+        "unit": "piece",
+    }, headers=headers)
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+def _search(client: TestClient, headers: dict, query: str, **params) -> list:
+    r = client.get("/products", params={"search": query, **params}, headers=headers)
+    assert r.status_code == 200
+    return [p["id"] for p in r.json()]
+
+
+def test_product_search_is_ranked_and_follows_updates(client: TestClient):
+    headers = _register(client, "catalog@example.com")
+    other = _register(client, "other-catalog@example.com")
+
+    bolts = _create(client, headers, "Болты М8 оцинкованные", "крепёж")
+    washers = _create(client, headers, "Шайбы", "для болтов М8")
+    pipe = _create(client, headers, "不锈钢管", "Stainless steel pipe")
+    _create(client, other, "Болты М10")
+
+    # name matches rank above description matches; other orgs are not searched
+    assert _search(client, headers, "болт") == [bolts, washers]
+    assert _search(client, headers, "БОЛТЫ м8") == [bolts]
+    assert _search(client, headers, "крепеж") == [bolts]  # ё == е
+    # CJK without spaces: single characters and bigrams
+    assert _search(client, headers, "钢") == [pipe]
+    assert _search(client, headers, "钢管") == [pipe]
+    assert _search(client, headers, "stain pipe") == [pipe]
+    assert _search(client, headers, "болт", limit=1) == [bolts]
+
+    products_service.update_product(washers, ProductUpdateRequest(description="плоские"))
+    assert _search(client, headers, "болт") == [bolts]
+
+    products_service.delete_product(bolts)
+    assert _search(client, headers, "болт") == []
+    assert len(products_service.search_index) == 3
+
+
+def test_product_search_pages_survive_a_deleted_cursor_item(client: TestClient):
+    headers = _register(client, "ranked-pages@example.com")
+    org_id = client.get("/auth/me", headers=headers).json()["org"]["id"]
+    # shorter names rank higher; the filler keeps scores steady across a delete
+    words = ["Anchor", "bolt", "zinc", "plated", "steel"]
+    ids = [_create(client, headers, " ".join(words[: i + 1])) for i in range(5)]
+    products_service.create_products(org_id, [
+        ProductCreateRequest(name=f"Filler {i}", baseCurrency="CNY", basePrice=1, unit="piece")
+        for i in range(100)
+    ])
+    assert _search(client, headers, "anchor") == ids
+
+    r = client.get("/products", params={"search": "anchor", "limit": 2}, headers=headers)
+    assert [p["id"] for p in r.json()] == ids[:2]
+    cursor = r.headers["X-Next-Cursor"]
+
+    # the cursor item is gone: the next page continues below its score
+    products_service.delete_product(ids[1])
+    r = client.get("/products", params={"search": "anchor", "limit": 2, "cursor": cursor}, headers=headers)
+    assert [p["id"] for p in r.json()] == ids[2:4]
+    r = client.get("/products", params={
+        "search": "anchor", "limit": 2, "cursor": r.headers["X-Next-Cursor"],
+    }, headers=headers)
+    assert [p["id"] for p in r.json()] == ids[4:]
+    assert "X-Next-Cursor" not in r.headers
+
+
+def _import(client: TestClient, headers: dict, filename: str, content: str) -> dict:
+    r = client.post(
+        "/products/imports", files={"file": (filename, content.encode("utf-8"))}, headers=headers
+    )
+    assert r.status_code == 202
+    assert r.json()["status"] == "queued"
+    assert product_imports.import_pool.wait_idle()
+    r = client.get(f"/products/imports/{r.json()['id']}", headers=headers)
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_bulk_import_reports_row_errors(client: TestClient, monkeypatch):
+    monkeypatch.setattr(config, "PRODUCT_IMPORT_BATCH_SIZE", 2)
+    headers = _register(client, "bulk@example.com")
+
+    job = _import(client, headers, "catalog.csv", (
+        "name,description,hsCode,baseCurrency,basePrice,unit,comment\n"
+        "Bolt M8,zinc,7318.15,CNY,0.5,piece,x\n"
+        "Nut M8,,,CNY,cheap,piece,\n"
+        "\"Washer, M8\",,,USD,0.1,piece,\n"
+        "Pump,,8413.70,EUR,120,piece,\n"
+        "Valve,,,RUB,300,piece,\n"
+    ))
+    assert job["status"] == "completed"
+    assert (job["rowsProcessed"], job["rowsImported"], job["rowsFailed"]) == (5, 3, 2)
+    assert job["bytesProcessed"] == job["bytesTotal"]
+    assert [(e["line"], e["field"]) for e in job["errors"]] == [(3, "basePrice"), (5, "baseCurrency")]
+
+    r = client.get("/products", params={"search": "washer"}, headers=headers)
+    assert [p["name"] for p in r.json()] == ["Washer, M8"]
+    assert r.json()[0]["baseCurrency"] == "USD"
+
+    job = _import(client, headers, "more.ndjson", (
+        '{"name": "Gear", "baseCurrency": "CNY", "basePrice": 3, "unit": "kg"}\n'
+        "\n"
+        "not json\n"
+        '["Gear"]\n'
+        '{"name": "Shaft", "baseCurrency": "CNY", "basePrice": 9, "unit": "piece"}\n'
+    ))
+    assert (job["rowsImported"], job["rowsFailed"]) == (2, 2)
+    assert [(e["line"], e["message"]) for e in job["errors"]] == [
+        (3, "invalid JSON"), (4, "expected a JSON object"),
+    ]
+    page, has_more = products_service.page_products(job["orgId"])
+    assert len(page) == 5 and not has_more
+
+    # another org does not see the job
+    other = _register(client, "bulk-other@example.com")
+    assert client.get(f"/products/imports/{job['id']}", headers=other).status_code == 404
+
+    job = _import(client, headers, "broken.csv", "title,price\nBolt,1\n")
+    assert job["status"] == "failed"
+    assert job["error"].startswith("missing required columns: name")
+
+    r = client.post("/products/imports", files={"file": ("catalog.xlsx", b"PK")}, headers=headers)
+    assert r.status_code == 400
+
+
+def test_recover_jobs_after_a_restart(client: TestClient, monkeypatch, tmp_path):
+    from datetime import datetime, timezone
+
+    from app.filelock import try_lock
+    from app.schemas.products import ImportFormat, ImportStatus, ProductImportJob
+
+    monkeypatch.setattr(config, "PRODUCT_IMPORTS_DIR", tmp_path)
+
+    def job(job_id: str, status: ImportStatus, content: str = None) -> None:
+        if content is not None:
+            (tmp_path / job_id).write_text(content, encoding="utf-8")
+        product_imports.jobs[job_id] = ProductImportJob(
+            id=job_id, orgId="recover-org", filename=f"{job_id}.ndjson", format=ImportFormat.ndjson,
+            status=status, bytesTotal=len(content or ""), createdAt=datetime.now(timezone.utc),
+        )
+
+    row = '{"name": "Recovered", "baseCurrency": "CNY", "basePrice": 1, "unit": "piece"}\n'
+    job("crashed", ImportStatus.running, row)   # its worker is gone
+    job("busy", ImportStatus.running, row)      # still running in a live worker
+    job("waiting", ImportStatus.queued, row)
+    job("lost", ImportStatus.queued)
+    job("done", ImportStatus.completed)
+    (tmp_path / "done").write_text(row, encoding="utf-8")
+    (tmp_path / "orphan").write_text(row, encoding="utf-8")
+
+    with open(tmp_path / "busy", "rb") as held:
+        assert try_lock(held)
+        product_imports.recover_jobs()
+        assert product_imports.import_pool.wait_idle()
+
+    assert product_imports.get_job("crashed").status == ImportStatus.failed
+    assert product_imports.get_job("busy").status == ImportStatus.running
+    assert product_imports.get_job("waiting").status == ImportStatus.completed
+    assert product_imports.get_job("waiting").rowsImported == 1
+    assert product_imports.get_job("lost").status == ImportStatus.failed
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["busy"]
@@ -0,0 +1,202 @@
+# backend/tests/test_storage.py
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from app.pagination import sort_key
+from app.schemas.chat import Message
+from app.schemas.products import CurrencyCode
+from app.schemas.wallet_fx_payments import Wallet
+from app.storage.index import FacetIndex, Index
+from app.storage.memory import InMemoryRepository, InMemoryTimeline
+from app.storage.sqlite import ConnectionPool, SQLiteRepository, SQLiteTimeline
+
+
+def _wallet(wallet_id: str, balance: float) -> Wallet:
+    return Wallet(
+        id=wallet_id,
+        orgId="org-1",
+        currency=CurrencyCode.RUB,
+        balance=balance,
+        blockedAmount=0.0,
+        createdAt=datetime.now(timezone.utc),
+    )
+
+
+def _exercise(repo) -> None:
+    repo["w1"] = _wallet("w1", 10)
+    repo["w2"] = _wallet("w2", 20)
+    repo["w1"] = _wallet("w1", 15)  # update keeps insertion position
+
+    assert len(repo) == 2
+    assert "w1" in repo and "missing" not in repo
+    assert repo.get("missing") is None
+    assert repo["w1"].balance == 15
+    assert [w.id for w in repo.values()] == ["w1", "w2"]
+    assert list(repo) == ["w1", "w2"]
+
+    repo.put_many([("w3", _wallet("w3", 30)), ("w2", _wallet("w2", 25))])
+    assert list(repo) == ["w1", "w2", "w3"]
+    assert repo["w2"].balance == 25
+
+    del repo["w2"]
+    del repo["w3"]
+    assert list(repo) == ["w1"]
+    repo.clear()
+    assert len(repo) == 0
+
+
+def test_in_memory_repository():
+    _exercise(InMemoryRepository("wallets", Wallet))
+
+
+def test_sqlite_repository(tmp_path):
+    pool = ConnectionPool(tmp_path / "store.db", size=2)
+    _exercise(SQLiteRepository("wallets", Wallet, pool))
+
+    with pool.connection() as conn:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+    pool.close()
+
+
+def test_sqlite_repository_is_shared_between_workers(tmp_path):
+    db = tmp_path / "store.db"
+    worker_a = SQLiteRepository("messages", List[Message], ConnectionPool(db))
+    worker_b = SQLiteRepository("messages", List[Message], ConnectionPool(db))
+
+    msg = Message(
+        id="m1",
+        chatId="c1",
+        senderId="u1",
+        text="hi",
+        originalLang="ru",
+        createdAt=datetime.now(timezone.utc),
+    )
+    worker_a["c1"] = [msg]
+
+    stored = worker_b["c1"]
+    assert [m.id for m in stored] == ["m1"]
+    assert stored[0].createdAt == msg.createdAt
+
+
+def test_sqlite_transaction_serializes_read_modify_write_across_pools(tmp_path):
+    # two pools = two workers; without the transaction increments get lost
+    db = tmp_path / "store.db"
+    pools = [ConnectionPool(db, size=4), ConnectionPool(db, size=4)]
+    repos = [SQLiteRepository("counters", int, pool) for pool in pools]
+    repos[0]["n"] = 0
+
+    def bump(i: int) -> None:
+        pool, repo = pools[i % 2], repos[i % 2]
+        for _ in range(25):
+            with pool.transaction():
+                value = repo["n"]
+                time.sleep(0.0005)  # let the other worker interleave
+                repo["n"] = value + 1
+
+    threads = [threading.Thread(target=bump, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert repos[1]["n"] == 100
+
+    try:
+        with pools[0].transaction():
+            repos[0]["n"] = -1
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert repos[1]["n"] == 100
+    for pool in pools:
+        pool.close()
+
+
+def test_sqlite_indexes_follow_writes_of_other_workers(tmp_path):
+    db = tmp_path / "store.db"
+    writer = SQLiteRepository("wallets", Wallet, ConnectionPool(db))
+    reader = SQLiteRepository("wallets", Wallet, ConnectionPool(db))
+    writer["w0"] = _wallet("w0", 5)
+    by_org = reader.add_index(Index(lambda w: [w.orgId]))
+    by_balance = reader.add_index(
+        FacetIndex(lambda w: {"big": w.balance >= 100}, sort_key=lambda w: w.id)
+    )
+    assert by_org.ids("org-1") == ["w0"]
+
+    writer["w1"] = _wallet("w1", 10)
+    writer.put_many([("w2", _wallet("w2", 200)), ("w1", _wallet("w1", 150))])
+    assert by_org.ids("org-1") == ["w0", "w1", "w2"]
+    assert by_balance.select({"big": [True]}) == {"w1", "w2"}
+
+    del writer["w2"]
+    assert by_org.ids("org-1") == ["w0", "w1"]
+    version = by_balance.version
+    writer.clear()
+    assert by_balance.version > version
+    assert by_org.ids("org-1") == [] and len(by_balance) == 0
+
+    # the reader's own writes go through the same feed
+    reader["w3"] = _wallet("w3", 1)
+    assert by_org.first("org-1") == "w3"
+
+
+def _message(msg_id: str, created_at: datetime, text: str = "hi") -> Message:
+    return Message(
+        id=msg_id, chatId="c1", senderId="u1", text=text, originalLang="ru", createdAt=created_at
+    )
+
+
+def _exercise_timeline(timeline) -> None:
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    msgs = [_message(f"m{i}", t0 + timedelta(seconds=i)) for i in range(5)]
+    timeline.put_many(("c1", m) for m in reversed(msgs))
+    timeline.put("c2", _message("x", t0))
+
+    def ids(found):
+        return [m.id for m in found]
+
+    assert ids(timeline.scan("c1")) == ["m0", "m1", "m2", "m3", "m4"]
+    assert ids(timeline.scan("c1", after=sort_key(msgs[1]), before=sort_key(msgs[4]))) == ["m2", "m3"]
+    assert ids(timeline.scan("c1", reverse=True, limit=3)) == ["m4", "m3", "m2"]
+    assert ids(timeline.scan("c1", after=sort_key(msgs[0]), limit=3)) == ["m1", "m2", "m3"]
+    assert timeline.last("c1").id == "m4" and timeline.last("missing") is None
+
+    # an update replaces the record in place
+    timeline.put("c1", _message("m2", msgs[2].createdAt, "edited"))
+    assert timeline.get("c1", "m2").text == "edited"
+    assert ids(timeline.scan("c1")) == ["m0", "m1", "m2", "m3", "m4"]
+    assert set(timeline.get_many([("c1", "m0"), ("c2", "x"), ("c2", "m0")])) == {("c1", "m0"), ("c2", "x")}
+
+    timeline.delete_many("c1", ["m1", "m3"])
+    assert ids(timeline.scan("c1")) == ["m0", "m2", "m4"]
+    assert sorted(timeline.owners()) == ["c1", "c2"]
+
+    timeline.clear()
+    assert timeline.owners() == [] and timeline.get("c1", "m0") is None
+
+
+def test_in_memory_timeline():
+    _exercise_timeline(InMemoryTimeline("messages"))
+
+
+def test_sqlite_timeline(tmp_path):
+    timeline = SQLiteTimeline("messages", Message, ConnectionPool(tmp_path / "store.db"))
+    timeline.SCAN_CHUNK = 2  # scans span several chunks
+    _exercise_timeline(timeline)
+
+
+def test_sqlite_timeline_takes_over_a_repository_of_lists(tmp_path):
+    pool = ConnectionPool(tmp_path / "store.db")
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    legacy = SQLiteRepository("messages", List[Message], pool)
+    legacy["c1"] = [_message("m0", t0), _message("m1", t0 + timedelta(seconds=1))]
+
+    timeline = SQLiteTimeline("messages", Message, pool)
+    assert [m.id for m in timeline.scan("c1")] == ["m0", "m1"]
+    with pool.connection() as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "repo_messages" not in tables and "changes_messages" not in tables
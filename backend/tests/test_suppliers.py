@@ -63,4 +63,34 @@ def test_list_suppliers_with_kyb_filter(client: TestClient):
     verified_items = r.json()
     assert len(verified_items) == 1
     assert verified_items[0]["id"] == supplier1["orgId"]
-    assert verified_items[0]["kybStatus"] == "verified"
\ No newline at end of file
+    assert verified_items[0]["kybStatus"] == "verified"
+
+
+def test_supplier_directory_pages_sorts_and_follows_org_updates(client: TestClient):
+    buyer = _register(client, "dir_buyer@example.com", "buyer")
+    cn = [_register(client, f"dir_cn{i}@example.com", "supplier", "CN")["orgId"] for i in range(3)]
+    ru = _register(client, "dir_ru@example.com", "both", "RU")
+    headers = {"Authorization": f"Bearer {buyer['token']}"}
+
+    def ids(params: dict):
+        r = client.get("/orgs/suppliers", params=params, headers=headers)
+        assert r.status_code == 200
+        return [o["id"] for o in r.json()], r.headers.get("X-Next-Cursor")
+
+    page1, cursor = ids({"limit": 2})
+    page2, last = ids({"limit": 2, "cursor": cursor})
+    assert page1 + page2 == cn + [ru["orgId"]]
+    assert last is None
+
+    newest, cursor = ids({"limit": 3, "sort": "-createdAt"})
+    assert newest == [ru["orgId"], cn[2], cn[1]]
+    assert ids({"limit": 3, "sort": "-createdAt", "cursor": cursor})[0] == [cn[0]]
+
+    assert ids({"country": "CN"})[0] == cn
+
+    # PATCH /orgs/me replaces the org: the directory follows country and role
+    ru_headers = {"Authorization": f"Bearer {ru['token']}"}
+    assert client.patch("/orgs/me", json={"country": "CN"}, headers=ru_headers).status_code == 200
+    assert ids({"country": "CN"})[0] == cn + [ru["orgId"]]
+    assert client.patch("/orgs/me", json={"role": "buyer"}, headers=ru_headers).status_code == 200
+    assert ids({})[0] == cn
@@ -0,0 +1,96 @@
+# backend/tests/test_tariffs.py
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.schemas.products import ProductCreateRequest, ProductUpdateRequest
+from app.services import products as products_service
+from app.services import tariffs as tariffs_service
+
+
+def test_trie_longest_prefix(tmp_path):
+    table = tmp_path / "tariffs.tsv"
+    table.write_text(
+        "# comment\n73\t0.08\tIron or steel\n7318\t0.1\tFasteners\n731815\t0.12\nbroken-row\n",
+        encoding="utf-8",
+    )
+    trie = tariffs_service.HSTrie(table)
+    assert trie.entries == 0  # nothing read before the first lookup
+
+    assert trie.lookup("7318.15.90").rate == pytest.approx(0.12)
+    assert trie.lookup("7318 16").prefix == "7318"
+    assert trie.lookup("7326").description == "Iron or steel"
+    assert trie.lookup("8471") is None
+    assert trie.entries == 3
+
+
+def test_product_duty_rates_expire(monkeypatch):
+    [product] = products_service.create_products("duty-org", [ProductCreateRequest(
+        name="Bolt M8", hsCode="7318.15", baseCurrency="CNY", basePrice=10, unit="piece",
+    )])
+    now = [0.0]
+    cache = tariffs_service.ProductDutyCache(10, ttl=60, clock=lambda: now[0])
+
+    rates = {"7318.15": 0.1}
+    monkeypatch.setattr(
+        tariffs_service, "lookup",
+        lambda hs_code: tariffs_service.TariffEntry(prefix="7318", rate=rates[hs_code], description=""),
+    )
+    assert cache.rate(product.id) == pytest.approx(0.1)
+
+    # the table changes, the product does not: served from the cache until the TTL
+    rates["7318.15"] = 0.2
+    now[0] = 59
+    assert cache.rate(product.id) == pytest.approx(0.1)
+    now[0] = 61
+    assert cache.rate(product.id) == pytest.approx(0.2)
+
+
+def test_unit_economics_use_tariff_of_ordered_product(client: TestClient):
+    r = client.post("/auth/register", json={
+        "email": "tariff@example.com",
+        "password": "123456",
+        "name": "Tariff User",
+        "orgName": "TariffOrg",
+        "orgCountry": "RU",
+        "orgRole": "both",
+    })
+    data = r.json()
+    headers = {"Authorization": f"Bearer {data['tokens']['accessToken']}"}
+    org_id = data["org"]["id"]
+
+    r = client.post("/products", json={
+        "name": "Bolt M8", "hsCode": "7318.15", "baseCurrency": "CNY", "basePrice": 10, "unit": "piece",
+    }, headers=headers)
+    product_id = r.json()["id"]
+
+    r = client.post("/rfqs", json={
+        "supplierOrgId": org_id,
+        "items": [{"productId": product_id, "name": "Bolt M8", "qty": 100, "unit": "piece"}],
+    }, headers=headers)
+    rfq_id = r.json()["id"]
+    assert client.post(f"/rfqs/{rfq_id}/send", headers=headers).status_code == 200
+    r = client.post(f"/rfqs/{rfq_id}/offers", json={
+        "currency": "CNY",
+        "items": [{"productId": product_id, "name": "Bolt M8", "qty": 100, "unit": "piece",
+                   "price": 10, "subtotal": 1000}],
+    }, headers=headers)
+    r = client.post(f"/offers/{r.json()['id']}/accept", headers=headers)
+    deal_id = r.json()["deal"]["id"]
+
+    r = client.get(f"/analytics/deals/{deal_id}/unit-economics", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["costBreakdown"]["dutiesTaxes"] == pytest.approx(100.0)  # 7318 -> 10%
+
+    # memoized per product, but a new HS code is picked up
+    products_service.update_product(product_id, ProductUpdateRequest(hsCode="8471.30"))
+    r = client.get(f"/analytics/deals/{deal_id}/unit-economics", headers=headers)
+    assert r.json()["costBreakdown"]["dutiesTaxes"] == pytest.approx(0.0)
+
+    r = client.post("/tariffs/lookup", json={"hsCodes": ["7318.15", "999999", "8413.70", "7318.15"]},
+                    headers=headers)
+    assert r.status_code == 200
+    assert [(t["matchedPrefix"], t["rate"]) for t in r.json()] == [
+        ("7318", 0.1), (None, None), ("8413", 0.0), ("7318", 0.1),
+    ]
@@ -0,0 +1,68 @@
+# backend/tests/test_wallets.py
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.schemas.products import CurrencyCode
+from app.services import wallets_fx
+
+
+def _register(client: TestClient, email: str):
+    r = client.post("/auth/register", json={
+        "email": email,
+        "password": "123456",
+        "name": "Wallet User",
+        "orgName": "WalletOrg",
+        "orgCountry": "RU",
+        "orgRole": "both",
+    })
+    assert r.status_code == 201
+    data = r.json()
+    return {"Authorization": f"Bearer {data['tokens']['accessToken']}"}, data["org"]["id"]
+
+
+def test_wallet_lookup_is_scoped_by_org_and_currency(client: TestClient):
+    headers, org_id = _register(client, "wallet@example.com")
+
+    r = client.get("/wallets", headers=headers)
+    assert r.status_code == 200
+    items = r.json()
+    assert [(w["orgId"], w["currency"]) for w in items] == [(org_id, "RUB")]
+
+    # repeated lookups return the same wallet, new currency adds one
+    rub = wallets_fx._ensure_wallet(org_id, CurrencyCode.RUB)
+    assert rub.id == items[0]["id"]
+    cny = wallets_fx._ensure_wallet(org_id, CurrencyCode.CNY)
+    assert cny.id != rub.id
+    wallets_fx._ensure_wallet("other-org", CurrencyCode.CNY)
+
+    ids = {w.id for w in wallets_fx.list_wallets_for_org(org_id)}
+    assert ids == {rub.id, cny.id}
+
+
+def test_concurrent_ensure_creates_single_wallet():
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        result = list(pool.map(
+            lambda _: wallets_fx._ensure_wallet("race-org", CurrencyCode.USD).id,
+            range(64),
+        ))
+    assert len(set(result)) == 1
+    assert len(wallets_fx.list_wallets_for_org("race-org")) == 2  # USD + default RUB
+
+
+def test_new_rub_wallet_is_stored_with_its_opening_balance(monkeypatch):
+    seen = []
+    post_locked = wallets_fx.ledger.post_locked
+
+    def spy(entry_id, postings):
+        # the wallet must not be visible before its opening posting lands
+        seen.append(wallets_fx._find_wallet("opening-org", CurrencyCode.RUB))
+        return post_locked(entry_id, postings)
+
+    monkeypatch.setattr(wallets_fx.ledger, "post_locked", spy)
+    wallet = wallets_fx._ensure_wallet("opening-org", CurrencyCode.RUB)
+    assert seen == [None]
+    assert wallet.balance == wallets_fx.DEMO_RUB_BALANCE
+    assert wallets_fx.wallets[wallet.id].balance == wallets_fx.DEMO_RUB_BALANCE
@@ -1,5 +1,5 @@
 // src/api/chat.ts
-import { api } from './client';
+import { api, API_BASE } from './client';
 import type { AuthState } from '../state/authTypes';
 
 export interface ChatDto {
@@ -7,6 +7,7 @@ export interface ChatDto {
   dealId: string;
   participants: string[];
   createdAt: string;
+  autoTranslate?: boolean;
 }
 
 export interface MessageTranslationDto {
@@ -111,4 +112,97 @@ export async function listChatsForUser(
 ): Promise<ChatDto[]> {
   const params = dealId ? `?dealId=${dealId}` : '';
   return api<ChatDto[]>(`/chats${params}`, {}, auth.tokens.accessToken);
-}
\ No newline at end of file
+}
+
+export type ChatSocketEvent =
+  | { type: 'message'; data: MessageDto }
+  | { type: 'translation'; data: MessageTranslationDto & { messageId: string } }
+  | { type: 'typing'; data: { userId: string } }
+  | { type: 'read'; data: { userId: string; messageId: string } }
+  | { type: 'resync'; data: Record<string, never> };
+
+/** Chat settings: autoTranslate pre-translates new messages on the server */
+export async function updateChat(
+  auth: AuthState,
+  chatId: string,
+  patch: { autoTranslate?: boolean },
+): Promise<ChatDto> {
+  return api<ChatDto>(
+    `/chats/${chatId}`,
+    {
+      method: 'PATCH',
+      body: JSON.stringify(patch),
+    },
+    auth.tokens.accessToken,
+  );
+}
+
+/** Translate several messages in one request (all untranslated if messageIds omitted) */
+export async function translateMessagesInChat(
+  auth: AuthState,
+  chatId: string,
+  targetLang: string,
+  messageIds?: string[],
+): Promise<{ messageId: string; text: string; targetLang: string }[]> {
+  return api<{ messageId: string; text: string; targetLang: string }[]>(
+    `/chats/${chatId}/messages/translate`,
+    {
+      method: 'POST',
+      body: JSON.stringify({ targetLang, messageIds }),
+    },
+    auth.tokens.accessToken,
+  );
+}
+
+/** Apply a socket event to the local message list */
+export function applyChatEvent(messages: MessageDto[], e: ChatSocketEvent): MessageDto[] {
+  if (e.type === 'message') {
+    return messages.some((m) => m.id === e.data.id) ? messages : [...messages, e.data];
+  }
+  if (e.type === 'translation') {
+    const { messageId, ...translation } = e.data;
+    return messages.map((m) =>
+      m.id === messageId
+        ? {
+            ...m,
+            translations: [
+              ...(m.translations ?? []).filter((t) => t.lang !== translation.lang),
+              translation,
+            ],
+          }
+        : m,
+    );
+  }
+  return messages;
+}
+
+/** WebSocket of a chat: new messages, translations, typing/read events */
+export function openChatSocket(
+  auth: AuthState,
+  chatId: string,
+  handlers: {
+    onEvent: (e: ChatSocketEvent) => void;
+    onError?: () => void;
+  },
+): { send: (frame: Record<string, unknown>) => void; close: () => void } {
+  const params = new URLSearchParams({ access_token: auth.tokens.accessToken });
+  const wsBase = API_BASE.replace(/^http/, 'ws');
+  const socket = new WebSocket(`${wsBase}/chats/${chatId}/ws?${params.toString()}`);
+
+  socket.onmessage = (e) => {
+    const payload = JSON.parse(e.data as string);
+    if (payload.type === 'ping') return;
+    handlers.onEvent(payload as ChatSocketEvent);
+  };
+  socket.onerror = () => handlers.onError?.();
+  socket.onclose = (e) => {
+    if (e.code !== 1000) handlers.onError?.();
+  };
+
+  return {
+    send: (frame) => {
+      if (socket.readyState === WebSocket.OPEN) socket.send(JSON.stringify(frame));
+    },
+    close: () => socket.close(1000),
+  };
+}
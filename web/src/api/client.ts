@@ -1,11 +1,26 @@
+import { clearAuth, loadAuthEncrypted, saveAuthEncrypted } from '../state/secureSession';
+import type { AuthState } from '../state/authTypes';
+
 export const API_BASE = import.meta.env.VITE_API_BASE ?? 'http://localhost:8001';
 
-export async function api<T>(
-  path: string,
-  options: RequestInit = {},
-  token?: string,
-): Promise<T> {
-  const res = await fetch(`${API_BASE}${path}`, {
+type AuthListener = (auth: AuthState | null) => void;
+
+const authListeners = new Set<AuthListener>();
+let refreshing: Promise<AuthState | null> | null = null;
+
+/**
+ * Подписка на смену сессии после обновления токенов (null — refresh-токен
+ * тоже истёк, сессия сброшена). Возвращает функцию отписки.
+ */
+export function onAuthRefreshed(listener: AuthListener): () => void {
+  authListeners.add(listener);
+  return () => {
+    authListeners.delete(listener);
+  };
+}
+
+function send(path: string, options: RequestInit, token?: string): Promise<Response> {
+  return fetch(`${API_BASE}${path}`, {
     ...options,
     headers: {
       'Content-Type': 'application/json',
@@ -13,6 +28,58 @@ export async function api<T>(
       ...(token ? { Authorization: `Bearer ${token}` } : {}),
     },
   });
+}
+
+async function refreshSession(): Promise<AuthState | null> {
+  const stored = await loadAuthEncrypted();
+  if (!stored) return null;
+
+  const res = await send('/auth/refresh', {
+    method: 'POST',
+    body: JSON.stringify({ refreshToken: stored.tokens.refreshToken }),
+  });
+  const next = res.ok ? ((await res.json()) as AuthState) : null;
+  if (next) {
+    await saveAuthEncrypted(next);
+  } else {
+    clearAuth();
+  }
+  authListeners.forEach((listener) => listener(next));
+  return next;
+}
+
+/**
+ * Новый access-токен вместо `expired`. Если сессию уже обновил другой
+ * запрос — берём сохранённый токен; одновременные 401 ждут один refresh.
+ */
+async function freshToken(expired: string): Promise<string | null> {
+  const stored = await loadAuthEncrypted();
+  if (stored && stored.tokens.accessToken !== expired) {
+    return stored.tokens.accessToken;
+  }
+  if (!refreshing) {
+    refreshing = refreshSession().finally(() => {
+      refreshing = null;
+    });
+  }
+  const next = await refreshing;
+  return next ? next.tokens.accessToken : null;
+}
+
+export async function api<T>(
+  path: string,
+  options: RequestInit = {},
+  token?: string,
+): Promise<T> {
+  let res = await send(path, options, token);
+
+  // access-токен истёк: обновляем пару по refresh-токену и повторяем запрос один раз
+  if (res.status === 401 && token) {
+    const next = await freshToken(token);
+    if (next) {
+      res = await send(path, options, next);
+    }
+  }
 
   if (!res.ok) {
     const text = await res.text().catch(() => '');
@@ -20,4 +87,4 @@ export async function api<T>(
   }
 
   return res.json() as Promise<T>;
-}
\ No newline at end of file
+}
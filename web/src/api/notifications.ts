@@ -1,5 +1,5 @@
 // web/src/api/notifications.ts
-import { api } from './client';
+import { api, API_BASE } from './client';
 import type { AuthState } from '../state/authTypes';
 
 export type NotificationType =
@@ -29,6 +29,9 @@ export interface Notification {
   read: boolean;
   createdAt: string;
   readAt?: string | null;
+  count?: number;               // >1: digest of several events
+  entityIds?: string[] | null;  // digest: every event's entity, oldest first;
+                                // entityId/text/data are the latest event's
 }
 
 /** Список уведомлений для текущего пользователя */
@@ -56,4 +59,57 @@ export async function markNotificationRead(
     { method: 'POST' },
     auth.tokens.accessToken,
   );
-}
\ No newline at end of file
+}
+
+/** Счётчик непрочитанных (для бейджа) */
+export async function getUnreadCount(auth: AuthState): Promise<number> {
+  const res = await api<{ unread: number }>(
+    '/notifications/unread-count',
+    {},
+    auth.tokens.accessToken,
+  );
+  return res.unread;
+}
+
+/** Отметить прочитанными все уведомления (или до курсора включительно) */
+export async function markAllNotificationsRead(
+  auth: AuthState,
+  cursor?: string,
+): Promise<{ updated: number; unread: number }> {
+  const params = cursor ? `?${new URLSearchParams({ cursor }).toString()}` : '';
+  return api<{ updated: number; unread: number }>(
+    `/notifications/read-all${params}`,
+    { method: 'POST' },
+    auth.tokens.accessToken,
+  );
+}
+
+/**
+ * Подписка на поток уведомлений (Server-Sent Events).
+ * EventSource сам переподключается и передаёт Last-Event-ID,
+ * поэтому пропущенные события догружаются сервером.
+ * Возвращает функцию отписки.
+ */
+export function subscribeNotifications(
+  auth: AuthState,
+  handlers: {
+    onNotification: (n: Notification) => void;
+    onResync?: () => void;
+    onUnread?: (unread: number) => void;
+    onError?: () => void;
+  },
+): () => void {
+  const params = new URLSearchParams({ access_token: auth.tokens.accessToken });
+  const source = new EventSource(`${API_BASE}/notifications/stream?${params.toString()}`);
+
+  source.addEventListener('notification', (e) => {
+    handlers.onNotification(JSON.parse((e as MessageEvent).data) as Notification);
+  });
+  source.addEventListener('resync', () => handlers.onResync?.());
+  source.addEventListener('unread', (e) => {
+    handlers.onUnread?.((JSON.parse((e as MessageEvent).data) as { unread: number }).unread);
+  });
+  source.onerror = () => handlers.onError?.();
+
+  return () => source.close();
+}
@@ -21,7 +21,7 @@ import { RegisterView } from '../modules/auth/RegisterView';
 import { LoginView } from '../modules/auth/LoginView';
 import { saveAuthEncrypted, loadAuthEncrypted } from '../state/secureSession';
 import type { AuthState, BackendOrg } from '../state/authTypes';
-import { api } from '../api/client';
+import { api, onAuthRefreshed } from '../api/client';
 import { listWallets } from '../api/wallets';
 import { listPaymentsForOrg } from '../api/payments';
 import type { Wallet } from '../api/wallets';
@@ -285,6 +285,20 @@ const App: React.FC = () => {
     return () => clearInterval(interval);
   }, []);
 
+  // Токены обновлены клиентом API после 401 (null — сессия истекла)
+  useEffect(
+    () =>
+      onAuthRefreshed((next) => {
+        setAuth(next);
+        if (next) {
+          setOrg(next.org);
+        } else {
+          setMode('onboarding');
+        }
+      }),
+    [],
+  );
+
   // Восстановление авторизации
   useEffect(() => {
     loadAuthEncrypted().then((stored) => {
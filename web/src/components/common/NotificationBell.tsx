@@ -4,13 +4,15 @@ import type { AuthState } from '../../state/authTypes';
 import { Icon } from './Icon';
 import {
   listNotifications,
+  markAllNotificationsRead,
   markNotificationRead,
+  subscribeNotifications,
   type Notification,
 } from '../../api/notifications';
 
 interface NotificationBellProps {
   auth?: AuthState;            // можно не показывать ничего, если нет auth
-  pollIntervalMs?: number;     // по умолчанию 15 сек
+  pollIntervalMs?: number;     // fallback-опрос, если поток недоступен (по умолчанию 15 сек)
 }
 
 export const NotificationBell: React.FC<NotificationBellProps> = ({
@@ -50,13 +52,37 @@ export const NotificationBell: React.FC<NotificationBellProps> = ({
     void load();
   }, [load]);
 
+  // Новые уведомления приходят через SSE; опрос включается только при ошибке потока
+  const [streamFailed, setStreamFailed] = useState(false);
+
   useEffect(() => {
     if (!auth) return;
+    return subscribeNotifications(auth, {
+      onNotification: (n) => {
+        setStreamFailed(false);
+        // дайджест приходит повторно с тем же id и обновлённым count
+        setNotifications((prev) =>
+          prev.some((p) => p.id === n.id)
+            ? prev.map((p) => (p.id === n.id ? n : p))
+            : [n, ...prev],
+        );
+      },
+      onResync: () => void load(),
+      // всё прочитано (например, в другой вкладке)
+      onUnread: (unread) => {
+        if (unread === 0) setNotifications((prev) => prev.map((n) => ({ ...n, read: true })));
+      },
+      onError: () => setStreamFailed(true),
+    });
+  }, [auth, load]);
+
+  useEffect(() => {
+    if (!auth || !streamFailed) return;
     const id = setInterval(() => {
       void load();
     }, pollIntervalMs);
     return () => clearInterval(id);
-  }, [auth, load, pollIntervalMs]);
+  }, [auth, load, pollIntervalMs, streamFailed]);
 
   if (!auth) return null;
 
@@ -75,11 +101,9 @@ export const NotificationBell: React.FC<NotificationBellProps> = ({
   };
 
   const handleMarkAll = async () => {
-    const unread = notifications.filter((n) => !n.read);
     try {
-      await Promise.all(
-        unread.map((n) => markNotificationRead(auth, n.id)),
-      );
+      // один запрос вместо запроса на каждое уведомление
+      await markAllNotificationsRead(auth);
       setNotifications((prev) => prev.map((n) => ({ ...n, read: true })));
     } catch (e) {
       console.error('Failed to mark all notifications read', e);
@@ -185,6 +209,9 @@ export const NotificationBell: React.FC<NotificationBellProps> = ({
                   </div>
                   <div className="mt-0.5 text-xs text-slate-800 truncate">
                     {n.text}
+                    {(n.count ?? 1) > 1 && (
+                      <span className="ml-1 text-slate-400">×{n.count}</span>
+                    )}
                   </div>
                   {n.entityType && (
                     <div className="mt-0.5 text-[10px] text-slate-500 sf-number">
@@ -9,10 +9,13 @@ import type { Toast } from '../../components/common/ToastStack';
 import { HS_CODES, type HSCodeMeta } from './hsCodes';
 import { getDealAggregated, type DealAggregatedView } from '../../api/deals';
 import {
+  applyChatEvent,
   getOrCreateChatForDeal,
   listChatMessagesByChatId,
+  openChatSocket,
   sendChatMessageToChat,
-  translateMessageInChat,
+  translateMessagesInChat,
+  updateChat,
   type MessageDto,
 } from '../../api/chat';
 import { createPayment } from '../../api/payments';
@@ -255,6 +258,8 @@ export const DealWorkspaceView: React.FC<DealWorkspaceViewProps> = ({
   const [chatLoading, setChatLoading] = useState(false);
   const [draft, setDraft] = useState('');
   const [sending, setSending] = useState(false);
+  const [autoTranslate, setAutoTranslate] = useState(false);
+  const [autoTranslateSaving, setAutoTranslateSaving] = useState(false);
 
   // ===== Калькулятор — входные данные пользователя =====
   const [logisticsRUB, setLogisticsRUB] = useState(50000);
@@ -368,6 +373,7 @@ useEffect(() => {
 
         const chat = await getOrCreateChatForDeal(auth, dealId);
         setChatId(chat.id);
+        setAutoTranslate(Boolean(chat.autoTranslate));
 
         const msgs = await listChatMessagesByChatId(auth, chat.id);
         setMessages(msgs);
@@ -382,9 +388,28 @@ useEffect(() => {
     void loadChat();
   }, [auth, deal.backend?.dealId]);
 
-  // ===== Polling чата (каждые 5 секунд) =====
+  // ===== Сообщения чата через WebSocket; опрос только при ошибке сокета =====
+  const [chatSocketFailed, setChatSocketFailed] = useState(false);
+
   useEffect(() => {
     if (!chatId) return;
+    setChatSocketFailed(false);
+
+    const socket = openChatSocket(auth, chatId, {
+      onEvent: (e) => {
+        if (e.type === 'resync') {
+          void listChatMessagesByChatId(auth, chatId).then(setMessages).catch(() => undefined);
+        } else {
+          setMessages((prev) => applyChatEvent(prev, e));
+        }
+      },
+      onError: () => setChatSocketFailed(true),
+    });
+    return () => socket.close();
+  }, [auth, chatId]);
+
+  useEffect(() => {
+    if (!chatId || !chatSocketFailed) return;
 
     const poll = async () => {
       try {
@@ -397,14 +422,14 @@ useEffect(() => {
 
     const interval = setInterval(poll, 5000);
     return () => clearInterval(interval);
-  }, [auth, chatId]);
+  }, [auth, chatId, chatSocketFailed]);
 
   // ===== Автоперевод входящих сообщений =====
   useEffect(() => {
     if (!chatId || messages.length === 0) return;
 
     const autoTranslate = async () => {
-      const untranslated = messages.find((m) => {
+      const untranslated = messages.filter((m) => {
         if (m.senderId === auth.user.id) return false;
         const hasRu = m.translations?.some((t) =>
           t.lang.toLowerCase().startsWith('ru'),
@@ -412,11 +437,31 @@ useEffect(() => {
         return !hasRu;
       });
 
-      if (!untranslated) return;
+      if (untranslated.length === 0) return;
 
       try {
-        await translateMessageInChat(auth, chatId, untranslated.id, 'ru');
-        // Следующий poll подхватит обновлённое сообщение
+        // один запрос на все непереведённые сообщения
+        const items = await translateMessagesInChat(
+          auth,
+          chatId,
+          'ru',
+          untranslated.map((m) => m.id),
+        );
+        setMessages((prev) =>
+          items.reduce(
+            (acc, it) =>
+              applyChatEvent(acc, {
+                type: 'translation',
+                data: {
+                  messageId: it.messageId,
+                  lang: it.targetLang,
+                  text: it.text,
+                  autoTranslated: true,
+                },
+              }),
+            prev,
+          ),
+        );
       } catch (e) {
         console.error('Failed to auto-translate', e);
       }
@@ -578,7 +623,7 @@ useEffect(() => {
         text,
         lang: 'ru',
       });
-      setMessages((prev) => [...prev, msg]);
+      setMessages((prev) => (prev.some((m) => m.id === msg.id) ? prev : [...prev, msg]));
       setDraft('');
     } catch (e) {
       console.error('Failed to send message', e);
@@ -592,6 +637,26 @@ useEffect(() => {
     }
   }, [auth, chatId, draft, addToast]);
 
+  // серверный автоперевод включается только по явному переключателю
+  const handleToggleAutoTranslate = useCallback(async () => {
+    if (!chatId) return;
+    const next = !autoTranslate;
+    try {
+      setAutoTranslateSaving(true);
+      const chat = await updateChat(auth, chatId, { autoTranslate: next });
+      setAutoTranslate(Boolean(chat.autoTranslate));
+    } catch (e) {
+      console.error('Failed to update chat settings', e);
+      addToast({
+        tone: 'warn',
+        title: 'Автоперевод',
+        message: 'Не удалось изменить настройку автоперевода.',
+      });
+    } finally {
+      setAutoTranslateSaving(false);
+    }
+  }, [auth, chatId, autoTranslate, addToast]);
+
   const handleLockFx = useCallback(() => {
     setDeal((prev) => ({
       ...prev,
@@ -922,7 +987,23 @@ useEffect(() => {
                       поставщик видит на китайском, и наоборот.
                     </HelpTip>
                   </div>
-                  <Badge tone="blue">RU ↔ CN</Badge>
+                  <div className="flex items-center gap-2">
+                    <button
+                      type="button"
+                      onClick={() => void handleToggleAutoTranslate()}
+                      disabled={!chatId || autoTranslateSaving}
+                      aria-pressed={autoTranslate}
+                      title="Переводить новые сообщения на языки всех участников"
+                      className={
+                        autoTranslate
+                          ? 'rounded-lg bg-blue-600 text-white px-2.5 py-1 text-xs font-semibold hover:bg-blue-700 disabled:opacity-50'
+                          : 'rounded-lg border border-slate-200 bg-white text-slate-700 px-2.5 py-1 text-xs font-semibold hover:bg-slate-50 disabled:opacity-50'
+                      }
+                    >
+                      Автоперевод: {autoTranslate ? 'вкл' : 'выкл'}
+                    </button>
+                    <Badge tone="blue">RU ↔ CN</Badge>
+                  </div>
                 </div>
                 {dealData && (
                   <div className="mt-1 text-xs text-slate-500">
@@ -6,10 +6,13 @@ import { Icon } from '../../components/common/Icon';
 import type { Toast } from '../../components/common/ToastStack';
 import { listSupplierDeals, type DealDto } from '../../api/deals';
 import {
+  applyChatEvent,
   getOrCreateChatForDeal,
   listChatMessagesByChatId,
+  openChatSocket,
   sendChatMessageToChat,
-  translateMessageInChat,
+  translateMessagesInChat,
+  updateChat,
   type MessageDto,
 } from '../../api/chat';
 
@@ -108,6 +111,8 @@ export const SupplierDealsChatView: React.FC<SupplierDealsChatViewProps> = ({
   const [chatLoading, setChatLoading] = useState(false);
   const [draft, setDraft] = useState('');
   const [sending, setSending] = useState(false);
+  const [autoTranslate, setAutoTranslate] = useState(false);
+  const [autoTranslateSaving, setAutoTranslateSaving] = useState(false);
 
   // Загрузка сделок
   useEffect(() => {
@@ -142,11 +147,13 @@ export const SupplierDealsChatView: React.FC<SupplierDealsChatViewProps> = ({
     setSelectedDeal(deal);
     setMessages([]);
     setChatId(null);
+    setAutoTranslate(false);
 
     try {
       setChatLoading(true);
       const chat = await getOrCreateChatForDeal(auth, deal.id);
       setChatId(chat.id);
+      setAutoTranslate(Boolean(chat.autoTranslate));
 
       const msgs = await listChatMessagesByChatId(auth, chat.id);
       setMessages(msgs);
@@ -162,9 +169,28 @@ export const SupplierDealsChatView: React.FC<SupplierDealsChatViewProps> = ({
     }
   };
 
-  // Polling сообщений
+  // Сообщения через WebSocket; опрос только при ошибке сокета
+  const [chatSocketFailed, setChatSocketFailed] = useState(false);
+
   useEffect(() => {
     if (!chatId) return;
+    setChatSocketFailed(false);
+
+    const socket = openChatSocket(auth, chatId, {
+      onEvent: (e) => {
+        if (e.type === 'resync') {
+          void listChatMessagesByChatId(auth, chatId).then(setMessages).catch(() => undefined);
+        } else {
+          setMessages((prev) => applyChatEvent(prev, e));
+        }
+      },
+      onError: () => setChatSocketFailed(true),
+    });
+    return () => socket.close();
+  }, [auth, chatId]);
+
+  useEffect(() => {
+    if (!chatId || !chatSocketFailed) return;
 
     const interval = setInterval(async () => {
       try {
@@ -176,14 +202,14 @@ export const SupplierDealsChatView: React.FC<SupplierDealsChatViewProps> = ({
     }, 3000);
 
     return () => clearInterval(interval);
-  }, [auth, chatId]);
+  }, [auth, chatId, chatSocketFailed]);
 
   // Автоперевод входящих сообщений на китайский
   useEffect(() => {
     const autoTranslate = async () => {
       if (!chatId) return;
 
-      const untranslated = messages.find((m) => {
+      const untranslated = messages.filter((m) => {
         if (m.senderId === auth.user.id) return false;
         const hasZh = m.translations?.some((t) =>
           t.lang.toLowerCase().startsWith('zh'),
@@ -191,10 +217,31 @@ export const SupplierDealsChatView: React.FC<SupplierDealsChatViewProps> = ({
         return !hasZh;
       });
 
-      if (!untranslated) return;
+      if (untranslated.length === 0) return;
 
       try {
-        await translateMessageInChat(auth, chatId, untranslated.id, 'zh-CN');
+        // один запрос на все непереведённые сообщения
+        const items = await translateMessagesInChat(
+          auth,
+          chatId,
+          'zh-CN',
+          untranslated.map((m) => m.id),
+        );
+        setMessages((prev) =>
+          items.reduce(
+            (acc, it) =>
+              applyChatEvent(acc, {
+                type: 'translation',
+                data: {
+                  messageId: it.messageId,
+                  lang: it.targetLang,
+                  text: it.text,
+                  autoTranslated: true,
+                },
+              }),
+            prev,
+          ),
+        );
       } catch (e) {
         console.error('Failed to auto-translate', e);
       }
@@ -203,6 +250,25 @@ export const SupplierDealsChatView: React.FC<SupplierDealsChatViewProps> = ({
     void autoTranslate();
   }, [auth, chatId, messages]);
 
+  // Серверный автоперевод новых сообщений: только по явному переключателю
+  const handleToggleAutoTranslate = async () => {
+    if (!chatId) return;
+    try {
+      setAutoTranslateSaving(true);
+      const chat = await updateChat(auth, chatId, { autoTranslate: !autoTranslate });
+      setAutoTranslate(Boolean(chat.autoTranslate));
+    } catch (e) {
+      console.error('Failed to update chat settings', e);
+      addToast({
+        tone: 'warn',
+        title: 'Автоперевод',
+        message: 'Не удалось изменить настройку автоперевода.',
+      });
+    } finally {
+      setAutoTranslateSaving(false);
+    }
+  };
+
   // Отправка сообщения
   const handleSend = async () => {
     const text = draft.trim();
@@ -214,7 +280,7 @@ export const SupplierDealsChatView: React.FC<SupplierDealsChatViewProps> = ({
         text,
         lang: 'zh-CN',
       });
-      setMessages((prev) => [...prev, msg]);
+      setMessages((prev) => (prev.some((m) => m.id === msg.id) ? prev : [...prev, msg]));
       setDraft('');
     } catch (e) {
       console.error('Failed to send message', e);
@@ -394,8 +460,22 @@ export const SupplierDealsChatView: React.FC<SupplierDealsChatViewProps> = ({
                 </div>
                 {selectedDeal && (
                   <div className="flex items-center gap-2">
+                    <button
+                      type="button"
+                      onClick={() => void handleToggleAutoTranslate()}
+                      disabled={!chatId || autoTranslateSaving}
+                      aria-pressed={autoTranslate}
+                      title="Переводить новые сообщения на языки всех участников"
+                      className={
+                        autoTranslate
+                          ? 'rounded-lg bg-blue-600 text-white px-2.5 py-1 text-xs font-semibold hover:bg-blue-700 disabled:opacity-50'
+                          : 'rounded-lg border border-slate-200 bg-white text-slate-700 px-2.5 py-1 text-xs font-semibold hover:bg-slate-50 disabled:opacity-50'
+                      }
+                    >
+                      Автоперевод: {autoTranslate ? 'вкл' : 'выкл'}
+                    </button>
                     <Badge tone="blue">
-                      Автоперевод RU→CN
+                      RU→CN
                     </Badge>
                     {getStatusBadge(selectedDeal.status)}
                   </div>